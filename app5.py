@@ -2,13 +2,26 @@ from flask import Flask, request, jsonify, Response, stream_with_context
 from flask_cors import CORS
 import pandas as pd
 import numpy as np
-from stable_baselines3 import PPO
 from datetime import datetime
 import sys
 import os
 import json
+import gzip
+import threading
 import time
 import requests
+from feature_store import FeatureStore
+from market_data import MarketDataStore, SymbolIndex, read_market_data
+from model_registry import ModelRegistry
+from policy_backends import available_backends, check_backend
+from trading_env import LocalTradingEnv
+from sweep import SweepExecutor, expand_grid, MAX_RUNS
+from paper_trading import PaperTradingSession, CsvTailFeed, SocketFeed, serve_replay
+from jobs import JobStore, JobQueue, JobQueueFull
+from records import StepHistory, TradeTable, format_ns, to_ns
+from metrics import compute_metrics, format_metrics
+from market_metrics import infer_periods_per_year
+from streaming import ProgressEmitter, downsample, dumps
 
 app = Flask(__name__)
 CORS(app)
@@ -20,6 +33,7 @@ CORS(app)
 # Your Render API URL (update this after deployment)
 TRADING_API_URL = os.getenv('TRADING_API_URL', 'http://localhost:8000')
 API_KEY = os.getenv('TRADING_API_KEY', None)  # Optional: if you add authentication
+COMPRESS_UPLOADS = os.getenv('TRADING_API_GZIP', '0') == '1'  # Server must accept .csv.gz uploads
 
 # Global variables
 T_indicators = ['HA_signal', 'MACD_signal', 'MA_signal', 'OBV_signal']
@@ -29,6 +43,66 @@ continuous_features = [
     'PARKINSON', 'dist_from_high', 'dist_from_low', 'PRICE_ACTION',
     'Taker Buy Quote', 'Taker Buy Base', 'Number of Trades', 'Quote Asset Volume'
 ]
+# Policy observation: these columns in this order, then the position flag
+OBSERVATION_COLUMNS = T_indicators + MR_indicators + continuous_features
+
+# Bar columns sent to environments along with the features
+ENV_BAR_COLUMNS = ['Open Time', 'Open', 'High', 'Low', 'Close', 'Volume']
+
+# Market data and its per-symbol indicator cache. When a partitioned copy of
+# the CSV exists (python market_data.py convert <csv> <dir>) and matches the
+# CSV, symbol lookups and indicator builds read it instead of the CSV.
+DATA_FILE = 'best_cluster_similar_price.csv'
+MARKET_STORE_DIR = os.getenv('MARKET_STORE_DIR', 'market_store')
+FEATURE_STORE_DIR = os.getenv('FEATURE_STORE_DIR', 'feature_store')
+market_store = MarketDataStore(MARKET_STORE_DIR)
+# How MACD/MA/OBV strengths are scaled ('global' or 'expanding'; see TechnicalIndicators).
+# Paper trading always computes 'expanding' strengths, so only 'expanding' matches it.
+STRENGTH_NORMALIZATION = os.getenv('STRENGTH_NORMALIZATION', 'global')
+feature_store = FeatureStore(DATA_FILE, cache_dir=FEATURE_STORE_DIR, market_store=market_store,
+                             strength_normalization=STRENGTH_NORMALIZATION)
+# Rebuilt by itself when DATA_FILE changes; used while the market store is not current
+csv_symbol_index = SymbolIndex(DATA_FILE)
+
+# PPO models, loaded once per process and shared across requests.
+# Extra versions can be added as MODEL_PATHS="name=path.zip,other=other.zip"
+DEFAULT_MODEL = 'ppo_trading_bot_enhanced'
+model_registry = ModelRegistry(torch_threads=os.getenv('TORCH_NUM_THREADS'))
+model_registry.register(DEFAULT_MODEL, 'ppo_trading_bot_enhanced.zip')
+for spec in filter(None, os.getenv('MODEL_PATHS', '').split(',')):
+    model_name, model_path = spec.split('=', 1)
+    model_registry.register(model_name.strip(), model_path.strip())
+
+# One sweep process pool per (model, backend), created on first use
+sweep_executors = {}
+sweep_executors_lock = threading.Lock()
+
+# Backtest progress streaming: step events aimed at per run, max events per
+# second, and points in the downsampled equity curve of the final result
+PROGRESS_EVENTS = int(os.getenv('PROGRESS_EVENTS', 200))
+MAX_EVENT_RATE = float(os.getenv('MAX_EVENT_RATE', 10))
+EQUITY_CURVE_POINTS = int(os.getenv('EQUITY_CURVE_POINTS', 1000))
+
+# Backtests run as jobs in a bounded worker pool, recorded in SQLite
+job_store = JobStore(os.getenv('JOB_DB', 'backtest_jobs.db'))
+job_queue = JobQueue(
+    job_store,
+    max_workers=int(os.getenv('MAX_CONCURRENT_JOBS', 2)),
+    max_pending=int(os.getenv('MAX_PENDING_JOBS', 8))
+)
+
+# Live paper-trading sessions, kept in memory; finished ones are dropped after
+# PAPER_SESSION_TTL seconds or once more than MAX_FINISHED_PAPER_SESSIONS are kept
+MAX_PAPER_SESSIONS = int(os.getenv('MAX_PAPER_SESSIONS', 4))
+MAX_FINISHED_PAPER_SESSIONS = int(os.getenv('MAX_FINISHED_PAPER_SESSIONS', 20))
+PAPER_SESSION_TTL = float(os.getenv('PAPER_SESSION_TTL', 3600))
+paper_sessions = {}
+paper_sessions_lock = threading.Lock()
+
+# Paper-trading feeds a request may open: CSV files under PAPER_FEED_DIR and
+# sockets on PAPER_SOCKET_HOSTS (comma-separated; none = socket feeds disabled)
+PAPER_FEED_DIR = os.getenv('PAPER_FEED_DIR', 'paper_feeds')
+PAPER_SOCKET_HOSTS = {host.strip() for host in os.getenv('PAPER_SOCKET_HOSTS', '').split(',') if host.strip()}
 
 
 # =============================================================================
@@ -36,44 +110,200 @@ continuous_features = [
 # =============================================================================
 
 class RemoteTradingAPIClient:
-    """Client for interacting with the remote Trading Environment API"""
+    """Client for interacting with the remote Trading Environment API
+    
+    Requests go through one pooled keep-alive Session, so a client should be
+    created once and shared. Every endpoint has its own (connect, read)
+    timeout, idempotent calls are retried with exponential backoff, and
+    per-endpoint latency counters are kept for monitoring (get_stats()).
+    """
     
-    def __init__(self, base_url, api_key=None):
+    # (connect, read) timeouts in seconds per endpoint
+    TIMEOUTS = {
+        'health': (1, 2),
+        'create_environment': (5, 120),
+        'reset': (5, 30),
+        'step': (5, 30),
+        'step_batch': (5, 120),
+        'step_multi': (5, 60),
+        'environment_info': (5, 30),
+        'positions': (5, 30),
+        'delete_environment': (5, 30),
+    }
+    RETRY_STATUSES = {502, 503, 504}
+    # Statuses with which a server without Arrow support rejects an Arrow upload
+    ARROW_REJECTED_STATUSES = {400, 415, 422}
+    
+    def __init__(self, base_url, api_key=None, max_retries=3, backoff=0.5,
+                 pool_size=16, compress_uploads=False):
         self.base_url = base_url.rstrip('/')
         self.headers = {'Content-Type': 'application/json'}
         if api_key:
             self.headers['X-API-Key'] = api_key
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.compress_uploads = compress_uploads
+        
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+        # Whether the server has the batched endpoints (None = not probed yet)
+        self._batch_supported = None
+        self._multi_supported = None
+        self._arrow_supported = None
+    
+    def _record(self, endpoint, elapsed, retries, error):
+        with self._stats_lock:
+            stats = self._stats.setdefault(endpoint, {
+                'calls': 0, 'errors': 0, 'retries': 0,
+                'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0
+            })
+            elapsed_ms = elapsed * 1000
+            stats['calls'] += 1
+            stats['errors'] += int(error)
+            stats['retries'] += retries
+            stats['total_ms'] += elapsed_ms
+            stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+            stats['last_ms'] = elapsed_ms
+    
+    def _request(self, method, endpoint, path, idempotent=False, **kwargs):
+        """
+        Send a request through the pooled session.
+        
+        Idempotent calls are retried on connection errors, timeouts and
+        502/503/504 responses, sleeping backoff * 2**attempt between tries.
+        Non-idempotent calls (e.g. step) are sent exactly once.
+        """
+        kwargs.setdefault('timeout', self.TIMEOUTS.get(endpoint, (5, 30)))
+        attempts = self.max_retries + 1 if idempotent else 1
+        start = time.perf_counter()
+        
+        for attempt in range(attempts):
+            last_try = attempt == attempts - 1
+            try:
+                response = self.session.request(method, f"{self.base_url}{path}", **kwargs)
+            except (requests.ConnectionError, requests.Timeout):
+                if last_try:
+                    self._record(endpoint, time.perf_counter() - start, attempt, True)
+                    raise
+            else:
+                if response.status_code not in self.RETRY_STATUSES or last_try:
+                    self._record(endpoint, time.perf_counter() - start, attempt, response.status_code >= 400)
+                    return response
+            time.sleep(self.backoff * 2 ** attempt)
+    
+    @staticmethod
+    def _route_missing(response):
+        """
+        Whether a response means the server has no such endpoint.
+        
+        A 404 from an existing endpoint (e.g. an unknown env_id) carries the
+        server's JSON error message; a missing route gets the framework's
+        default 404 page or {"detail": "Not Found"}.
+        """
+        if response.status_code != 404:
+            return False
+        try:
+            body = response.json()
+        except ValueError:
+            return True
+        return not isinstance(body, dict) or ('error' not in body and body.get('detail') == 'Not Found')
+    
+    def get_stats(self):
+        """
+        Per-endpoint call counters and latencies.
+        
+        Returns:
+            dict: endpoint -> calls, errors, retries, total/avg/max/last latency in ms
+        """
+        with self._stats_lock:
+            return {
+                endpoint: dict(stats, avg_ms=stats['total_ms'] / stats['calls'] if stats['calls'] else 0.0)
+                for endpoint, stats in self._stats.items()
+            }
     
     def health_check(self):
-        """Check if remote API is running"""
+        """Check if remote API is running
+        
+        Sent once with the short 'health' timeout and never retried, so an
+        unreachable server is reported within seconds.
+        """
         try:
-            response = requests.get(f"{self.base_url}/health", timeout=5)
+            response = self._request('GET', 'health', '/health')
             return response.status_code == 200
-        except:
+        except requests.RequestException:
             return False
     
-    def create_environment(self, csv_file_path, initial_balance=10000):
-        """Create a new trading environment on remote server"""
-        config = {
+    def _environment_config(self, initial_balance):
+        return {
             "T_indicators": T_indicators,
             "MR_indicators": MR_indicators,
             "continuous_features": continuous_features,
             "initial_balance": initial_balance
         }
+    
+    def _upload_environment(self, files, initial_balance):
+        return self._request(
+            'POST', 'create_environment', '/create_environment',
+            files=files,
+            data={'config': json.dumps(self._environment_config(initial_balance))},
+            headers={'X-API-Key': self.headers.get('X-API-Key', '')} if 'X-API-Key' in self.headers else {}
+        )
+    
+    @staticmethod
+    def environment_columns(df):
+        """Columns an environment needs: bar time and OHLCV plus the configured features"""
+        needed = ENV_BAR_COLUMNS + T_indicators + MR_indicators + continuous_features
+        return [c for c in dict.fromkeys(needed) if c in df.columns]
+    
+    def create_environment(self, data, initial_balance=10000):
+        """Create a new trading environment on remote server
         
-        with open(csv_file_path, 'rb') as f:
-            files = {'file': f}
-            data = {'config': json.dumps(config)}
-            response = requests.post(
-                f"{self.base_url}/create_environment",
-                files=files,
-                data=data,
-                headers={'X-API-Key': self.headers.get('X-API-Key', '')} if 'X-API-Key' in self.headers else {}
-            )
+        Args:
+            data: DataFrame slice, or the path of a CSV file to upload as is
+            initial_balance (float): Starting cash
+        
+        A DataFrame is sent from memory, reduced to environment_columns(), as
+        a zstd-compressed Arrow IPC file ('data.arrow'). Servers that reject
+        Arrow (400/415/422 on the first upload) get the same columns as CSV (gzip-compressed with
+        compress_uploads); the fallback is remembered for later calls.
+        """
+        if not isinstance(data, pd.DataFrame):
+            with open(data, 'rb') as f:
+                payload = f.read()
+            if self.compress_uploads:
+                files = {'file': ('data.csv.gz', gzip.compress(payload), 'application/gzip')}
+            else:
+                files = {'file': (os.path.basename(data), payload, 'text/csv')}
+            response = self._upload_environment(files, initial_balance)
+            response.raise_for_status()
+            return response.json()['env_id']
         
+        df = data[self.environment_columns(data)]
+        
+        if self._arrow_supported is not False:
+            files = {'file': ('data.arrow', arrow_ipc_bytes(df), 'application/vnd.apache.arrow.file')}
+            response = self._upload_environment(files, initial_balance)
+            # Only a rejected upload format means "no Arrow"; other errors
+            # (auth, server overload, ...) say nothing about support
+            if self._arrow_supported or response.status_code not in self.ARROW_REJECTED_STATUSES:
+                response.raise_for_status()
+                self._arrow_supported = True
+                return response.json()['env_id']
+            self._arrow_supported = False
+        
+        payload = df.to_csv(index=False).encode('utf-8')
+        if self.compress_uploads:
+            files = {'file': ('data.csv.gz', gzip.compress(payload), 'application/gzip')}
+        else:
+            files = {'file': ('data.csv', payload, 'text/csv')}
+        response = self._upload_environment(files, initial_balance)
         response.raise_for_status()
-        result = response.json()
-        return result['env_id']
+        return response.json()['env_id']
     
     def reset_environment(self, env_id, seed=None):
         """Reset environment to initial state"""
@@ -81,11 +311,8 @@ class RemoteTradingAPIClient:
         if seed is not None:
             payload["seed"] = seed
         
-        response = requests.post(
-            f"{self.base_url}/reset",
-            json=payload,
-            headers=self.headers
-        )
+        response = self._request('POST', 'reset', '/reset', idempotent=True,
+                                 json=payload, headers=self.headers)
         response.raise_for_status()
         return response.json()
     
@@ -96,38 +323,95 @@ class RemoteTradingAPIClient:
             "action": action
         }
         
-        response = requests.post(
-            f"{self.base_url}/step",
-            json=payload,
-            headers=self.headers
-        )
+        response = self._request('POST', 'step', '/step', json=payload, headers=self.headers)
         response.raise_for_status()
         return response.json()
     
+    def step_batch(self, env_id, actions):
+        """
+        Execute several actions in one environment with a single request.
+        
+        The actions are applied in order and the batch stops early at the
+        first terminated/truncated step, so the result list may be shorter
+        than actions. Only useful when the actions do not depend on the
+        intermediate observations (e.g. replaying a recorded action series).
+        Falls back to one step() call per action if the server does not
+        implement /step_batch (a 404 for an unknown env_id raises instead).
+        
+        Returns:
+            list: One step result (observation, reward, terminated, truncated, info) per executed action
+        """
+        actions = [a.tolist() if hasattr(a, 'tolist') else a for a in actions]
+        
+        if self._batch_supported is not False:
+            response = self._request('POST', 'step_batch', '/step_batch',
+                                     json={"env_id": env_id, "actions": actions},
+                                     headers=self.headers)
+            # Only a first call can find out that the route is missing
+            if self._batch_supported or not self._route_missing(response):
+                response.raise_for_status()
+                self._batch_supported = True
+                return response.json()['results']
+            self._batch_supported = False
+        
+        results = []
+        for action in actions:
+            result = self.step(env_id, action)
+            results.append(result)
+            if result['terminated'] or result['truncated']:
+                break
+        return results
+    
+    def step_multi(self, env_actions):
+        """
+        Execute one action in each of several environments with a single request.
+        
+        This is the closed-loop batched mode: the caller computes one action
+        per environment from the previous observations, sends them together,
+        and gets every environment's next step back in the same order.
+        Falls back to one step() call per environment if the server does not
+        implement /step_multi (a 404 for an unknown env_id raises instead).
+        
+        Args:
+            env_actions (list): (env_id, action) pairs
+            
+        Returns:
+            list: One step result per pair, in the same order
+        """
+        steps = [
+            {"env_id": env_id, "action": a.tolist() if hasattr(a, 'tolist') else a}
+            for env_id, a in env_actions
+        ]
+        
+        if self._multi_supported is not False:
+            response = self._request('POST', 'step_multi', '/step_multi',
+                                     json={"steps": steps}, headers=self.headers)
+            if self._multi_supported or not self._route_missing(response):
+                response.raise_for_status()
+                self._multi_supported = True
+                return response.json()['results']
+            self._multi_supported = False
+        
+        return [self.step(s["env_id"], s["action"]) for s in steps]
+    
     def get_environment_info(self, env_id):
         """Get detailed information about an environment"""
-        response = requests.get(
-            f"{self.base_url}/environment/{env_id}/info",
-            headers=self.headers
-        )
+        response = self._request('GET', 'environment_info', f"/environment/{env_id}/info",
+                                 idempotent=True, headers=self.headers)
         response.raise_for_status()
         return response.json()
     
     def get_positions(self, env_id):
         """Get current positions in the environment"""
-        response = requests.post(
-            f"{self.base_url}/environment/{env_id}/positions",
-            headers=self.headers
-        )
+        response = self._request('POST', 'positions', f"/environment/{env_id}/positions",
+                                 idempotent=True, headers=self.headers)
         response.raise_for_status()
         return response.json()
     
     def delete_environment(self, env_id):
         """Delete an environment"""
-        response = requests.delete(
-            f"{self.base_url}/environment/{env_id}",
-            headers=self.headers
-        )
+        response = self._request('DELETE', 'delete_environment', f"/environment/{env_id}",
+                                 idempotent=True, headers=self.headers)
         response.raise_for_status()
         return response.json()
 
@@ -137,57 +421,124 @@ class RemoteTradingAPIClient:
 # =============================================================================
 
 class TradingAnalyzer:
-    """Collects trading data and calculates metrics"""
+    """Collects trading data and calculates metrics
+    
+    Metrics are maintained incrementally: every record_step updates the
+    equity, running peak and drawdown, Welford mean/variance of step
+    returns, win/loss counts and sums, and the reward total in O(1). Steps
+    and closed trades go into columnar record stores (records.StepHistory
+    and records.TradeTable) rather than lists of info dicts.
+    """
     
-    def __init__(self, initial_balance=10000):
+    def __init__(self, initial_balance=10000, periods_per_year=365, action_dim=5):
         self.initial_balance = initial_balance
-        self.history = []
-    
-    def record_step(self, step, timestamp, info, reward):
-        """Record step data"""
-        self.history.append({
-            'step': step,
-            'timestamp': timestamp,
-            'info': info,
-            'reward': reward
-        })
+        self.periods_per_year = periods_per_year
+        self.history = StepHistory(action_dim=action_dim)
+        self.trade_table = TradeTable()
+        
+        self.final_value = initial_balance
+        self.peak_value = initial_balance
+        self.drawdown = 0.0
+        self.max_drawdown = 0.0
+        self.total_reward = 0.0
+        
+        # Welford running mean / sum of squared deviations of step returns
+        self.num_returns = 0
+        self.mean_return = 0.0
+        self.m2_return = 0.0
+        
+        self.num_wins = 0
+        self.num_losses = 0
+        self.total_wins = 0.0
+        self.total_losses = 0.0
+        self.total_pnl = 0.0
     
-    def extract_trades_from_history(self):
-        """Extract completed trades from history"""
-        trades = []
+    def record_step(self, step, timestamp, info, reward, action=None):
+        """Record step data
         
-        for record in self.history:
-            info = record['info']
-            timestamp = record['timestamp']
-            
-            if info and 'position_changes' in info and info['position_changes']:
-                position_changes = info['position_changes']
+        timestamp may be int64 nanoseconds, a datetime or a string.
+        """
+        timestamp_ns = to_ns(timestamp)
+        value = info['portfolio_value'] if info else None
+        self.history.append(step=step, timestamp=timestamp_ns, portfolio_value=value,
+                            reward=reward, action=action)
+        self.total_reward += reward
+        
+        if not info:
+            return
+        
+        previous_value = self.final_value
+        self.final_value = value
+        
+        if previous_value:
+            step_return = value / previous_value - 1
+            self.num_returns += 1
+            delta = step_return - self.mean_return
+            self.mean_return += delta / self.num_returns
+            self.m2_return += delta * (step_return - self.mean_return)
+        
+        self.peak_value = max(self.peak_value, value)
+        self.drawdown = (value - self.peak_value) / self.peak_value if self.peak_value else 0.0
+        self.max_drawdown = min(self.max_drawdown, self.drawdown)
+        
+        position_changes = info.get('position_changes')
+        if position_changes and position_changes.get('closed'):
+            for closed_pos in position_changes['closed']:
+                pnl = closed_pos.get('pnl', 0)
+                self.trade_table.append(
+                    timestamp=timestamp_ns,
+                    step=step,
+                    entry_price=closed_pos.get('entry_price', 0),
+                    exit_price=closed_pos.get('exit_price', 0),
+                    quantity=closed_pos.get('quantity', 0),
+                    pnl=pnl,
+                    pnl_percent=closed_pos.get('pnl_percent', 0),
+                    holding_period=closed_pos.get('holding_period', 0),
+                    close_reason=closed_pos.get('close_reason', 'unknown'),
+                    portfolio_value=info.get('portfolio_value', 0)
+                )
                 
-                if 'closed' in position_changes and position_changes['closed']:
-                    for closed_pos in position_changes['closed']:
-                        trade = {
-                            'timestamp': timestamp,
-                            'step': record['step'],
-                            'entry_price': closed_pos.get('entry_price', 0),
-                            'exit_price': closed_pos.get('exit_price', 0),
-                            'quantity': closed_pos.get('quantity', 0),
-                            'pnl': closed_pos.get('pnl', 0),
-                            'pnl_percent': closed_pos.get('pnl_percent', 0),
-                            'holding_period': closed_pos.get('holding_period', 0),
-                            'close_reason': closed_pos.get('close_reason', 'unknown'),
-                            'portfolio_value': info.get('portfolio_value', 0)
-                        }
-                        trades.append(trade)
-        
-        return trades
-    
-    def save_trades_to_csv(self, trades, save_dir='backtest_results'):
+                self.total_pnl += pnl
+                if pnl > 0:
+                    self.num_wins += 1
+                    self.total_wins += pnl
+                elif pnl < 0:
+                    self.num_losses += 1
+                    self.total_losses += -pnl
+    
+    @property
+    def num_steps(self):
+        return len(self.history)
+    
+    @property
+    def sharpe_ratio(self):
+        """Annualized Sharpe ratio of step returns so far"""
+        if self.num_returns < 2:
+            return 0.0
+        std_return = (self.m2_return / self.num_returns) ** 0.5
+        if std_return == 0:
+            return 0.0
+        return self.mean_return / std_return * self.periods_per_year ** 0.5
+    
+    def live_stats(self):
+        """Current Sharpe ratio and drawdowns (in %) for streaming"""
+        return {
+            'sharpe': round(self.sharpe_ratio, 4),
+            'drawdown': round(self.drawdown * 100, 4),
+            'max_drawdown': round(self.max_drawdown * 100, 4)
+        }
+    
+    def extract_trades_from_history(self):
+        """Return the completed trades recorded so far as a list of dicts"""
+        return self.trade_table.to_dicts()
+    
+    def save_trades_to_csv(self, trades, save_dir='backtest_results', run_id=None):
         """Save trades to CSV"""
         if not trades:
             return None
         
         os.makedirs(save_dir, exist_ok=True)
-        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        timestamp = run_id or datetime.now().strftime('%Y%m%d_%H%M%S')
         filename = os.path.join(save_dir, f'trades_{timestamp}.csv')
         
         try:
@@ -204,50 +555,74 @@ class TradingAnalyzer:
             print(f"❌ Error saving trades: {str(e)}")
             return None
     
+    def save_history(self, save_dir='backtest_results', run_id=None, fmt='parquet'):
+        """Save the step history and trade table as Parquet or Feather files
+        
+        Returns:
+            dict: Paths of the 'steps' and 'trades' files (None if not written)
+        """
+        os.makedirs(save_dir, exist_ok=True)
+        timestamp = run_id or datetime.now().strftime('%Y%m%d_%H%M%S')
+        saved = {'steps': None, 'trades': None}
+        
+        try:
+            saved['steps'] = self.history.save(os.path.join(save_dir, f'steps_{timestamp}.{fmt}'))
+            if len(self.trade_table):
+                saved['trades'] = self.trade_table.save(os.path.join(save_dir, f'trades_{timestamp}.{fmt}'))
+            print(f"✓ Step history saved to: {saved['steps']}")
+        except Exception as e:
+            print(f"❌ Error saving step history: {str(e)}")
+        return saved
+    
+    def performance_metrics(self):
+        """Numeric metrics (metrics.PerformanceMetrics) computed from the recorded columns"""
+        equity = self.history.column('portfolio_value')
+        return compute_metrics(
+            equity[~np.isnan(equity)],
+            initial_balance=self.initial_balance,
+            trade_pnl=self.trade_table.column('pnl'),
+            trade_pnl_pct=self.trade_table.column('pnl_percent'),
+            total_reward=self.total_reward,
+            periods_per_year=self.periods_per_year
+        )
+    
     def calculate_metrics(self):
         """Calculate trading metrics"""
-        portfolio_values = [h['info']['portfolio_value'] for h in self.history if h['info']]
-        
-        final_value = portfolio_values[-1] if portfolio_values else self.initial_balance
-        total_return = final_value - self.initial_balance
-        total_return_pct = (total_return / self.initial_balance) * 100
-        
-        trades = self.extract_trades_from_history()
-        num_trades = len(trades)
-        winning_trades = [t for t in trades if t['pnl'] > 0]
-        losing_trades = [t for t in trades if t['pnl'] < 0]
-        
-        win_rate = (len(winning_trades) / num_trades * 100) if num_trades > 0 else 0.0
-        total_pnl = sum(t['pnl'] for t in trades) if trades else 0.0
-        avg_win = np.mean([t['pnl'] for t in winning_trades]) if winning_trades else 0.0
-        avg_loss = np.mean([t['pnl'] for t in losing_trades]) if losing_trades else 0.0
-        
-        total_wins = sum(t['pnl'] for t in winning_trades) if winning_trades else 0.0
-        total_losses = abs(sum(t['pnl'] for t in losing_trades)) if losing_trades else 0.0
-        profit_factor = (total_wins / total_losses) if total_losses > 0 else 0.0
-        
-        expectancy = (win_rate/100 * avg_win) + ((1 - win_rate/100) * avg_loss)
-        total_reward = sum(h['reward'] for h in self.history)
-        
-        metrics = {
-            'Initial Balance': f'${self.initial_balance:,.2f}',
-            'Final Balance': f'${final_value:,.2f}',
-            'Total Return': f'${total_return:,.2f}',
-            'Total Return (%)': f'{total_return_pct:.2f}%',
-            'Total Trades': f'{num_trades:,}',
-            'Winning Trades': f'{len(winning_trades):,}',
-            'Losing Trades': f'{len(losing_trades):,}',
-            'Win Rate': f'{win_rate:.2f}%',
-            'Total PnL': f'${total_pnl:,.2f}',
-            'Avg Win': f'${avg_win:.2f}',
-            'Avg Loss': f'${avg_loss:.2f}',
-            'Profit Factor': f'{profit_factor:.3f}',
-            'Expectancy': f'${expectancy:.2f}',
-            'Total Steps': f'{len(self.history):,}',
-            'Total Reward': f'{total_reward:.2f}'
-        }
-        
-        return metrics, trades
+        metrics = format_metrics(self.performance_metrics(), [
+            'initial_balance', 'final_balance', 'total_return', 'total_return_pct',
+            'sharpe_ratio', 'max_drawdown_pct', 'num_trades', 'num_wins', 'num_losses',
+            'win_rate', 'total_pnl', 'avg_win', 'avg_loss', 'profit_factor', 'expectancy',
+            'num_steps', 'total_reward'
+        ])
+        return metrics, self.extract_trades_from_history()
+
+
+# Shared so that every request reuses the same connection pool
+remote_client = RemoteTradingAPIClient(TRADING_API_URL, API_KEY, compress_uploads=COMPRESS_UPLOADS)
+
+
+class RemoteEnvironment:
+    """Gym-style wrapper around one environment on the remote API
+    
+    Gives the remote engine the same reset/step/close interface as
+    trading_env.LocalTradingEnv so the backtest loop can drive either.
+    """
+    
+    def __init__(self, client, df, initial_balance=10000):
+        self.client = client
+        self.env_id = client.create_environment(df, initial_balance=initial_balance)
+    
+    def reset(self, seed=None):
+        result = self.client.reset_environment(self.env_id, seed=seed)
+        return result['observation'], result.get('info', {})
+    
+    def step(self, action):
+        result = self.client.step(self.env_id, action.tolist() if hasattr(action, 'tolist') else action)
+        return (result['observation'], result['reward'], result['terminated'],
+                result['truncated'], result['info'])
+    
+    def close(self):
+        self.client.delete_environment(self.env_id)
 
 
 # =============================================================================
@@ -263,10 +638,281 @@ def live_indicators(csv_path):
     return df
 
 
-def save_filtered_csv(df, save_path='temp_backtest_data.csv'):
-    """Save filtered dataframe temporarily for API upload"""
-    df.to_csv(save_path, index=False)
-    return save_path
+def get_symbol_index():
+    """Symbol summaries of DATA_FILE: the partitioned store when it is current, else the CSV index"""
+    return market_store if market_store.is_current(DATA_FILE) else csv_symbol_index
+
+
+def load_market_bars(crypto, start_time=None, end_time=None):
+    """Raw bars of one symbol, from the partitioned store when it is current"""
+    if market_store.is_current(DATA_FILE):
+        return market_store.read([crypto], start_time, end_time)
+    return read_market_data(DATA_FILE, [crypto], start_time, end_time, index=csv_symbol_index)
+
+
+def arrow_ipc_bytes(df, compression='zstd'):
+    """Serialize a DataFrame to an in-memory, compressed Arrow IPC file"""
+    import pyarrow as pa
+    
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    options = pa.ipc.IpcWriteOptions(compression=compression)
+    with pa.ipc.new_file(sink, table.schema, options=options) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def step_event(analyzer, emitter, step_count, total_steps, timestamp_ns, reward):
+    """Progress event for the current step, with the equity points buffered since the last one"""
+    current_value = analyzer.final_value
+    return {
+        'type': 'step',
+        'step': step_count,
+        'total_steps': total_steps,
+        'portfolio_value': float(current_value),
+        'initial_balance': float(analyzer.initial_balance),
+        'pnl': float(current_value - analyzer.initial_balance),
+        'timestamp': format_ns(timestamp_ns),
+        'reward': float(reward),
+        'equity': emitter.take(),
+        **analyzer.live_stats()
+    }
+
+
+def equity_curve(analyzer, points=EQUITY_CURVE_POINTS, method='lttb'):
+    """Whole-run equity curve downsampled for charting"""
+    history = analyzer.history
+    values = history.column('portfolio_value')
+    valid = ~np.isnan(values)
+    steps, values = downsample(history.column('step')[valid] + 1, values[valid], points, method)
+    return {'steps': steps.tolist(), 'values': np.round(values, 4).tolist()}
+
+
+def backtest_events(data, job_id=None):
+    """Run one backtest and yield its progress events
+    
+    This is the job function of the backtest queue: it runs in a worker
+    thread, and its events are stored by the JobQueue and replayed to
+    clients by the SSE views.
+    
+    Args:
+        data (dict): Request parameters (crypto, start_time, end_time, model, engine,
+            optional backend, progress_events and max_event_rate)
+        job_id (str): Job id, added to the names of the saved result files
+        
+    Yields:
+        dict: 'info', 'init', 'step', 'complete' or 'error' events
+    """
+    client = remote_client
+    env = None
+    env_id = None
+    analyzer = None
+    
+    try:
+        crypto = data.get('crypto')
+        start_time = data.get('start_time')
+        end_time = data.get('end_time')
+        model_name = data.get('model', DEFAULT_MODEL)
+        engine = data.get('engine', 'remote')
+        backend = data.get('backend', 'sb3')
+        
+        if not all([crypto, start_time, end_time]):
+            yield {'type': 'error', 'message': 'Missing required parameters'}
+            return
+        
+        if model_name not in model_registry.names():
+            yield {'type': 'error', 'message': f'Unknown model: {model_name}'}
+            return
+        
+        if engine not in ('local', 'remote'):
+            yield {'type': 'error', 'message': f'Unknown engine: {engine}'}
+            return
+        
+        try:
+            check_backend(backend)
+        except ValueError as e:
+            yield {'type': 'error', 'message': str(e)}
+            return
+        
+        if engine == 'remote':
+            # Check remote API connection
+            yield {'type': 'info', 'message': 'Checking remote API connection...'}
+            
+            if not client.health_check():
+                yield {'type': 'error', 'message': f'Cannot connect to remote API at {TRADING_API_URL}'}
+                return
+            
+            yield {'type': 'info', 'message': f'Connected to remote API: {TRADING_API_URL}'}
+        yield {'type': 'info', 'message': 'Loading data...'}
+        
+        # Load cached indicators for the requested symbol and time slice
+        if crypto not in feature_store.symbols():
+            yield {'type': 'error', 'message': f'No data found for {crypto}'}
+            return
+        
+        if engine == 'local':
+            # Cached observation rows; the remote engine needs the indicator frame
+            observations = feature_store.observations(crypto, OBSERVATION_COLUMNS, start=start_time, end=end_time)
+            if observations is None:
+                yield {'type': 'error', 'message': f'No data found for {crypto}'}
+                return
+            timestamps = observations.timestamps
+            total_steps = len(observations)
+        else:
+            df_test = feature_store.load(crypto, start=start_time, end=end_time)
+            df_test = df_test.dropna().reset_index(drop=True)
+            timestamps = df_test['Open Time'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+            total_steps = len(df_test)
+        
+        if total_steps == 0:
+            yield {'type': 'error', 'message': 'No data in selected time range'}
+            return
+        
+        if total_steps < 100:
+            yield {'type': 'error', 'message': 'Insufficient data points (need at least 100)'}
+            return
+        
+        yield {'type': 'init', 'message': 'Initializing backtest...', 'total_steps': total_steps}
+        
+        initial_balance = 10000
+        
+        if engine == 'local':
+            yield {'type': 'info', 'message': 'Creating local trading environment...'}
+            env = LocalTradingEnv.from_observations(observations, initial_balance=initial_balance)
+        else:
+            # Create environment on remote server
+            yield {'type': 'info', 'message': 'Creating remote trading environment...'}
+            env = RemoteEnvironment(client, df_test, initial_balance=initial_balance)
+            env_id = env.env_id
+            
+            yield {'type': 'info', 'message': f'Environment created: {env_id[:8]}...'}
+        
+        # Initialize analyzer, annualizing Sharpe by the bar interval of the data
+        analyzer = TradingAnalyzer(initial_balance=initial_balance,
+                                   periods_per_year=infer_periods_per_year(timestamps))
+        
+        # Reset environment
+        yield {'type': 'info', 'message': 'Resetting environment...'}
+        obs, _ = env.reset()
+        
+        # Load model
+        yield {'type': 'info', 'message': 'Loading AI model...'}
+        model = model_registry.get(model_name, backend=backend)
+        
+        yield {'type': 'info', 'message': 'Starting backtest...'}
+        
+        done = False
+        step_count = 0
+        
+        # Bar times are int64 ns; strings are only formatted for streamed events
+        last_bar = len(timestamps) - 1
+        
+        # Step events are rate limited and carry the equity points since the last one
+        emitter = ProgressEmitter(
+            total_steps,
+            target_events=int(data.get('progress_events', PROGRESS_EVENTS)),
+            max_rate=float(data.get('max_event_rate', MAX_EVENT_RATE))
+        )
+        
+        # Run backtest
+        while not done and step_count < total_steps:
+            # Predict action locally
+            action, _ = model.predict(np.asarray(obs, dtype=np.float32), deterministic=False)
+            
+            # Send action to the environment
+            obs, reward, terminated, truncated, info = env.step(action)
+            done = terminated or truncated
+            
+            timestamp_ns = timestamps[min(step_count, last_bar)]
+            
+            # Record step
+            analyzer.record_step(
+                step=step_count,
+                timestamp=timestamp_ns,
+                info=info,
+                reward=reward,
+                action=action
+            )
+            
+            step_count += 1
+            
+            if emitter.add(step_count, info['portfolio_value']):
+                yield step_event(analyzer, emitter, step_count, total_steps, timestamp_ns, reward)
+        
+        if emitter.pending:
+            yield step_event(analyzer, emitter, step_count, total_steps, timestamp_ns, reward)
+        
+        # Calculate metrics
+        yield {'type': 'info', 'message': 'Calculating metrics...'}
+        
+        performance = analyzer.performance_metrics()
+        trades = analyzer.extract_trades_from_history()
+        
+        # Save trades to CSV and the step history next to it
+        run_id = datetime.now().strftime('%Y%m%d_%H%M%S')
+        if job_id:
+            # Jobs finishing in the same second must not overwrite each other's files
+            run_id = f'{run_id}_{job_id}'
+        trades_csv_file = None
+        if len(trades) > 0:
+            yield {'type': 'info', 'message': f'Saving {len(trades)} trades to CSV...'}
+            trades_csv_file = analyzer.save_trades_to_csv(trades, run_id=run_id)
+        history_files = analyzer.save_history(run_id=run_id)
+        
+        # Prepare completion data
+        final_value = analyzer.final_value
+        total_return = ((final_value - initial_balance) / initial_balance) * 100
+        total_reward = analyzer.total_reward
+        
+        completion_data = {
+            'type': 'complete',
+            'results': {
+                'crypto': crypto,
+                'start_time': start_time,
+                'end_time': end_time,
+                'steps': step_count,
+                'initial_balance': float(initial_balance),
+                'final_balance': float(final_value),
+                'total_pnl': float(final_value - initial_balance),
+                'total_return': round(total_return, 2),
+                'total_reward': round(total_reward, 2),
+                'num_trades': len(trades),
+                'win_rate': round((analyzer.num_wins / len(trades) * 100) if trades else 0, 2),
+                'sharpe': round(analyzer.sharpe_ratio, 4),
+                'max_drawdown': round(analyzer.max_drawdown * 100, 2),
+                'metrics': performance.to_dict(),
+                'equity_curve': equity_curve(analyzer),
+                'trades_csv_saved': trades_csv_file,
+                'history_saved': history_files['steps'],
+                'env_id': env_id,
+                'engine': engine,
+                'backend': backend
+            }
+        }
+        yield completion_data
+        
+        # Cleanup
+        yield {'type': 'info', 'message': f'Cleaning up {engine} environment...'}
+        env.close()
+    
+    except Exception as e:
+        import traceback
+        error_trace = traceback.format_exc()
+        print(error_trace)
+        
+        # Cleanup on error
+        if env is not None:
+            try:
+                env.close()
+            except:
+                pass
+        
+        error_data = {
+            'type': 'error',
+            'message': str(e),
+            'trace': error_trace
+        }
+        yield error_data
 
 
 # =============================================================================
@@ -277,8 +923,7 @@ def save_filtered_csv(df, save_path='temp_backtest_data.csv'):
 def health_check():
     """Health check endpoint"""
     # Also check if remote API is available
-    client = RemoteTradingAPIClient(TRADING_API_URL, API_KEY)
-    remote_status = client.health_check()
+    remote_status = remote_client.health_check()
     
     return jsonify({
         'status': 'ok', 
@@ -292,12 +937,28 @@ def health_check():
 def get_cryptocurrencies():
     """Return list of available cryptocurrencies"""
     try:
-        cryptos = ['XRPJPY', 'LINKJPY', 'AVAXTRY', 'ADAJPY']
+        cryptos = get_symbol_index().symbols()
         return jsonify({'cryptocurrencies': cryptos})
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/api/remote/stats', methods=['GET'])
+def get_remote_stats():
+    """Return per-endpoint call counts and latencies of the remote API client"""
+    return jsonify({'remote_api_url': TRADING_API_URL, 'endpoints': remote_client.get_stats()})
+
+
+@app.route('/api/models', methods=['GET'])
+def get_models():
+    """Return registered PPO models, whether they are loaded, and the inference backends installed"""
+    return jsonify({
+        'default': DEFAULT_MODEL,
+        'models': model_registry.describe(),
+        'backends': list(available_backends())
+    })
+
+
 @app.route('/api/timerange', methods=['POST'])
 def get_timerange():
     """Get min and max timestamps for selected cryptocurrency"""
@@ -308,217 +969,195 @@ def get_timerange():
         if not crypto:
             return jsonify({'error': 'Cryptocurrency not specified'}), 400
         
-        df = pd.read_csv('best_cluster_similar_price.csv')
-        df_crypto = df[df['cryptocoin'] == crypto].copy()
+        entry = get_symbol_index().get(crypto)
         
-        if df_crypto.empty:
+        if entry is None:
             return jsonify({'error': f'No data found for {crypto}'}), 404
         
-        df_crypto['Open Time'] = pd.to_datetime(df_crypto['Open Time'])
-        min_time = df_crypto['Open Time'].min()
-        max_time = df_crypto['Open Time'].max()
-        
         return jsonify({
             'crypto': crypto,
-            'min_timestamp': min_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'max_timestamp': max_time.strftime('%Y-%m-%d %H:%M:%S'),
-            'total_rows': len(df_crypto)
+            'min_timestamp': entry['min_time'].strftime('%Y-%m-%d %H:%M:%S'),
+            'max_timestamp': entry['max_time'].strftime('%Y-%m-%d %H:%M:%S'),
+            'total_rows': entry['rows']
         })
     
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
 
+def _backend_error(data):
+    """400 response if the request asks for an unknown or uninstalled inference backend, else None"""
+    try:
+        check_backend(data.get('backend', 'sb3'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return None
+
+
+def _sse_job_view(job_id):
+    """SSE response replaying a job's events, resuming after Last-Event-ID"""
+    last_event_id = request.headers.get('Last-Event-ID') or request.args.get('last_event_id') or 0
+    try:
+        last_seq = int(last_event_id)
+    except ValueError:
+        last_seq = 0
+    
+    def generate():
+        for seq, event_json in job_queue.stream(job_id, last_seq=last_seq):
+            yield f"id: {seq}\ndata: {event_json}\n\n"
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no',
+            'Connection': 'keep-alive'
+        }
+    )
+
+
 @app.route('/api/backtest/stream', methods=['POST'])
 def run_backtest_stream():
-    """Run backtest using REMOTE API with streaming updates"""
+    """Submit a backtest job and stream its progress
+    
+    The backtest runs in the job pool, so closing this connection does not
+    stop it; reattach with GET /api/backtest/jobs/<job_id>/stream.
+    """
+    data = request.json or {}
+    error = _backend_error(data)
+    if error:
+        return error
+    
+    try:
+        job_id = job_queue.submit('backtest', data, backtest_events)
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 429
+    
+    response = _sse_job_view(job_id)
+    response.headers['X-Job-Id'] = job_id
+    return response
+
+
+@app.route('/api/backtest/jobs', methods=['POST'])
+def submit_backtest_job():
+    """Submit a backtest job and return its id without waiting"""
+    data = request.json or {}
+    error = _backend_error(data)
+    if error:
+        return error
+    
+    try:
+        job_id = job_queue.submit('backtest', data, backtest_events)
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 429
+    
+    return jsonify({
+        'job_id': job_id,
+        'status_url': f'/api/backtest/jobs/{job_id}',
+        'stream_url': f'/api/backtest/jobs/{job_id}/stream'
+    }), 202
+
+
+@app.route('/api/backtest/jobs', methods=['GET'])
+def list_backtest_jobs():
+    """List recent backtest jobs"""
+    return jsonify({'jobs': job_store.list()})
+
+
+@app.route('/api/backtest/jobs/<job_id>', methods=['GET'])
+def get_backtest_job(job_id):
+    """Return a job's status, parameters and result"""
+    job = job_store.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown job: {job_id}'}), 404
+    return jsonify(job)
+
+
+@app.route('/api/backtest/jobs/<job_id>/stream', methods=['GET'])
+def stream_backtest_job(job_id):
+    """Stream a job's events; honours the Last-Event-ID header to resume"""
+    if job_store.get(job_id) is None:
+        return jsonify({'error': f'Unknown job: {job_id}'}), 404
+    return _sse_job_view(job_id)
+
+
+def get_sweep_executor(model_name, backend):
+    """Shared SweepExecutor of a (model, backend), created once across concurrent requests"""
+    with sweep_executors_lock:
+        if (model_name, backend) not in sweep_executors:
+            # Export once here so the workers only load the exported file
+            model_registry.get(model_name, backend=backend)
+            sweep_executors[(model_name, backend)] = SweepExecutor(
+                feature_store, model_name, model_registry.path(model_name),
+                (T_indicators, MR_indicators, continuous_features), backend=backend
+            )
+        return sweep_executors[(model_name, backend)]
+
+
+@app.route('/api/sweep/stream', methods=['POST'])
+def run_sweep_stream():
+    """Run a grid of local backtests in a process pool with streaming per-job progress
+    
+    Body: {"cryptos": [...], "windows": [{"start_time", "end_time"}, ...],
+           "seeds": [...], "initial_balances": [...], "deterministic": [...],
+           "model": optional model name, "backend": optional inference backend}
+    """
+    data = request.json or {}
+    error = _backend_error(data)
+    if error:
+        return error
+    
     def generate():
-        client = RemoteTradingAPIClient(TRADING_API_URL, API_KEY)
-        env_id = None
-        analyzer = None
-        
         try:
-            data = request.json
-            crypto = data.get('crypto')
-            start_time = data.get('start_time')
-            end_time = data.get('end_time')
+            model_name = data.get('model', DEFAULT_MODEL)
+            backend = data.get('backend', 'sb3')
             
-            if not all([crypto, start_time, end_time]):
-                yield f"data: {json.dumps({'type': 'error', 'message': 'Missing required parameters'})}\n\n"
+            if model_name not in model_registry.names():
+                yield f"data: {dumps({'type': 'error', 'message': f'Unknown model: {model_name}'})}\n\n"
                 return
-            
-            # Check remote API connection
-            yield f"data: {json.dumps({'type': 'info', 'message': 'Checking remote API connection...'})}\n\n"
-            
-            if not client.health_check():
-                yield f"data: {json.dumps({'type': 'error', 'message': f'Cannot connect to remote API at {TRADING_API_URL}'})}\n\n"
+            runs = expand_grid(data)
+            if not runs:
+                yield f"data: {dumps({'type': 'error', 'message': 'Empty sweep: provide cryptos and windows'})}\n\n"
                 return
-            
-            yield f"data: {json.dumps({'type': 'info', 'message': f'Connected to remote API: {TRADING_API_URL}'})}\n\n"
-            yield f"data: {json.dumps({'type': 'info', 'message': 'Loading data...'})}\n\n"
-            
-            # Load and filter data
-            df = live_indicators('best_cluster_similar_price.csv')
-            df.dropna(inplace=True)
-            df_crypto = df[df['cryptocoin'] == crypto].copy()
-            
-            if df_crypto.empty:
-                yield f"data: {json.dumps({'type': 'error', 'message': f'No data found for {crypto}'})}\n\n"
+            if len(runs) > MAX_RUNS:
+                yield f"data: {dumps({'type': 'error', 'message': f'Too many runs ({len(runs)}, max {MAX_RUNS})'})}\n\n"
                 return
             
-            df_crypto['Open Time'] = pd.to_datetime(df_crypto['Open Time'])
-            start_dt = pd.to_datetime(start_time)
-            end_dt = pd.to_datetime(end_time)
-            
-            df_test = df_crypto[(df_crypto['Open Time'] >= start_dt) & 
-                               (df_crypto['Open Time'] <= end_dt)].copy()
-            
-            if df_test.empty:
-                yield f"data: {json.dumps({'type': 'error', 'message': 'No data in selected time range'})}\n\n"
-                return
-            
-            if len(df_test) < 100:
-                yield f"data: {json.dumps({'type': 'error', 'message': 'Insufficient data points (need at least 100)'})}\n\n"
+            unknown = sorted({run['crypto'] for run in runs} - set(feature_store.symbols()))
+            if unknown:
+                yield f"data: {dumps({'type': 'error', 'message': f'No data found for {unknown}'})}\n\n"
                 return
             
-            df_test = df_test.reset_index(drop=True)
-            total_steps = len(df_test)
-            
-            yield f"data: {json.dumps({'type': 'init', 'message': 'Initializing backtest...', 'total_steps': total_steps})}\n\n"
-            
-            # Save filtered data temporarily
-            temp_csv = save_filtered_csv(df_test)
-            
-            # Create environment on remote server
-            yield f"data: {json.dumps({'type': 'info', 'message': 'Creating remote trading environment...'})}\n\n"
-            
-            initial_balance = 10000
-            env_id = client.create_environment(temp_csv, initial_balance=initial_balance)
-            
-            yield f"data: {json.dumps({'type': 'info', 'message': f'Environment created: {env_id[:8]}...'})}\n\n"
-            
-            # Initialize analyzer
-            analyzer = TradingAnalyzer(initial_balance=initial_balance)
+            executor = get_sweep_executor(model_name, backend)
             
-            # Reset environment
-            yield f"data: {json.dumps({'type': 'info', 'message': 'Resetting environment...'})}\n\n"
-            reset_result = client.reset_environment(env_id)
-            obs = reset_result['observation']
+            yield f"data: {dumps({'type': 'init', 'message': f'Running {len(runs)} backtests on {executor.workers} workers...', 'total_jobs': len(runs)})}\n\n"
             
-            # Load model
-            yield f"data: {json.dumps({'type': 'info', 'message': 'Loading AI model...'})}\n\n"
-            model = PPO.load("ppo_trading_bot_enhanced.zip")
+            start = time.time()
+            results = []
+            for row in executor.run(runs):
+                results.append(row)
+                yield f"data: {dumps({'type': 'job', 'completed': len(results), 'total_jobs': len(runs), 'result': row})}\n\n"
             
-            yield f"data: {json.dumps({'type': 'info', 'message': 'Starting backtest...'})}\n\n"
+            results.sort(key=lambda r: r['job_id'])
             
-            done = False
-            step_count = 0
-            
-            # Run backtest using remote API
-            while not done and step_count < total_steps:
-                # Predict action locally
-                action, _ = model.predict(np.array(obs), deterministic=False)
-                
-                # Send action to remote environment
-                step_result = client.step(env_id, action.tolist())
-                
-                obs = step_result['observation']
-                reward = step_result['reward']
-                done = step_result['terminated'] or step_result['truncated']
-                info = step_result['info']
-                
-                # Get current timestamp
-                current_timestamp = df_test.iloc[min(step_count, len(df_test) - 1)]['Open Time'].strftime('%Y-%m-%d %H:%M:%S')
-                
-                # Record step
-                analyzer.record_step(
-                    step=step_count,
-                    timestamp=current_timestamp,
-                    info=info,
-                    reward=reward
-                )
-                
-                step_count += 1
-                
-                # Stream progress every 10 steps
-                if step_count % 10 == 0:
-                    current_value = info['portfolio_value']
-                    current_pnl = current_value - initial_balance
-                    
-                    step_data = {
-                        'type': 'step',
-                        'step': step_count,
-                        'total_steps': total_steps,
-                        'portfolio_value': float(current_value),
-                        'initial_balance': float(initial_balance),
-                        'pnl': float(current_pnl),
-                        'timestamp': current_timestamp,
-                        'reward': float(reward)
-                    }
-                    yield f"data: {json.dumps(step_data)}\n\n"
-            
-            # Calculate metrics
-            yield f"data: {json.dumps({'type': 'info', 'message': 'Calculating metrics...'})}\n\n"
-            
-            final_metrics, trades = analyzer.calculate_metrics()
-            
-            # Save trades to CSV
-            trades_csv_file = None
-            if len(trades) > 0:
-                yield f"data: {json.dumps({'type': 'info', 'message': f'Saving {len(trades)} trades to CSV...'})}\n\n"
-                trades_csv_file = analyzer.save_trades_to_csv(trades)
-            
-            # Prepare completion data
-            final_value = analyzer.history[-1]['info']['portfolio_value'] if analyzer.history else initial_balance
-            total_return = ((final_value - initial_balance) / initial_balance) * 100
-            total_reward = sum(h['reward'] for h in analyzer.history)
+            os.makedirs('backtest_results', exist_ok=True)
+            results_file = os.path.join('backtest_results', f"sweep_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv")
+            pd.DataFrame(results).to_csv(results_file, index=False)
             
             completion_data = {
                 'type': 'complete',
-                'results': {
-                    'crypto': crypto,
-                    'start_time': start_time,
-                    'end_time': end_time,
-                    'steps': step_count,
-                    'initial_balance': float(initial_balance),
-                    'final_balance': float(final_value),
-                    'total_pnl': float(final_value - initial_balance),
-                    'total_return': round(total_return, 2),
-                    'total_reward': round(total_reward, 2),
-                    'num_trades': len(trades),
-                    'win_rate': round((len([t for t in trades if t['pnl'] > 0]) / len(trades) * 100) if trades else 0, 2),
-                    'trades_csv_saved': trades_csv_file,
-                    'env_id': env_id
-                }
+                'results': results,
+                'results_csv_saved': results_file,
+                'elapsed': round(time.time() - start, 2)
             }
-            yield f"data: {json.dumps(completion_data)}\n\n"
-            
-            # Cleanup
-            if os.path.exists(temp_csv):
-                os.remove(temp_csv)
-            
-            # Delete remote environment
-            yield f"data: {json.dumps({'type': 'info', 'message': 'Cleaning up remote environment...'})}\n\n"
-            client.delete_environment(env_id)
+            yield f"data: {dumps(completion_data)}\n\n"
         
         except Exception as e:
             import traceback
             error_trace = traceback.format_exc()
             print(error_trace)
-            
-            # Cleanup on error
-            if env_id:
-                try:
-                    client.delete_environment(env_id)
-                except:
-                    pass
-            
-            error_data = {
-                'type': 'error',
-                'message': str(e),
-                'trace': error_trace
-            }
-            yield f"data: {json.dumps(error_data)}\n\n"
+            yield f"data: {dumps({'type': 'error', 'message': str(e), 'trace': error_trace})}\n\n"
     
     return Response(
         stream_with_context(generate()),
@@ -531,6 +1170,158 @@ def run_backtest_stream():
     )
 
 
+def resolve_feed_path(path):
+    """Real path of a CSV feed under PAPER_FEED_DIR, or None if it points outside it"""
+    root = os.path.realpath(PAPER_FEED_DIR)
+    resolved = os.path.realpath(os.path.join(root, path))
+    if os.path.commonpath([root, resolved]) != root:
+        return None
+    return resolved
+
+
+def prune_paper_sessions(now=None):
+    """Drop finished paper sessions past PAPER_SESSION_TTL, and the oldest beyond MAX_FINISHED_PAPER_SESSIONS"""
+    now = time.time() if now is None else now
+    with paper_sessions_lock:
+        finished = sorted(
+            (s for s in paper_sessions.values() if s.state not in ('created', 'running')),
+            key=lambda s: s.finished_at or ''
+        )
+        excess = len(finished) - MAX_FINISHED_PAPER_SESSIONS
+        for i, session in enumerate(finished):
+            age = now - datetime.fromisoformat(session.finished_at).timestamp() if session.finished_at else 0
+            if i < excess or age > PAPER_SESSION_TTL:
+                del paper_sessions[session.id]
+
+
+@app.route('/api/paper/sessions', methods=['POST'])
+def start_paper_session():
+    """Start a paper-trading session on a live bar feed
+    
+    Body: {"source": "replay" | "csv" | "socket", "model", "backend", "initial_balance",
+           "latency_budget_ms", "deterministic", "max_bars",
+           replay: "crypto", "start_time", "end_time", "warmup_bars", "interval",
+           csv: "path", "from_start",  socket: "host", "port"}
+    
+    "replay" serves the stored bars of a symbol over a local socket, as a
+    stand-in for an exchange feed; its first warmup_bars bars prime the
+    indicators. "csv" paths are relative to PAPER_FEED_DIR and "socket"
+    hosts must be listed in PAPER_SOCKET_HOSTS.
+    """
+    try:
+        data = request.json or {}
+        source = data.get('source', 'replay')
+        model_name = data.get('model', DEFAULT_MODEL)
+        backend = data.get('backend', 'sb3')
+        
+        if model_name not in model_registry.names():
+            return jsonify({'error': f'Unknown model: {model_name}'}), 400
+        error = _backend_error(data)
+        if error:
+            return error
+        
+        prune_paper_sessions()
+        with paper_sessions_lock:
+            active = [s for s in paper_sessions.values() if s.state in ('created', 'running')]
+        if len(active) >= MAX_PAPER_SESSIONS:
+            return jsonify({'error': f'Too many paper sessions running (limit {MAX_PAPER_SESSIONS})'}), 429
+        
+        warmup = None
+        if source == 'replay':
+            crypto = data.get('crypto')
+            if not crypto:
+                return jsonify({'error': 'Cryptocurrency not specified'}), 400
+            bars = load_market_bars(crypto, data.get('start_time'), data.get('end_time'))
+            if bars.empty:
+                return jsonify({'error': f'No data found for {crypto}'}), 404
+            warmup_bars = int(data.get('warmup_bars', 200))
+            warmup = bars.iloc[:warmup_bars]
+            port = serve_replay(bars.iloc[warmup_bars:], interval=float(data.get('interval', 0.0)))
+            feed = SocketFeed('127.0.0.1', port)
+            name = f'{crypto} replay'
+        elif source == 'csv':
+            path = data.get('path')
+            resolved = resolve_feed_path(path) if path else None
+            if resolved is None:
+                return jsonify({'error': f'CSV feeds must be files under {PAPER_FEED_DIR}'}), 400
+            if not os.path.isfile(resolved):
+                return jsonify({'error': f'CSV file not found: {path}'}), 400
+            feed = CsvTailFeed(resolved, from_start=bool(data.get('from_start', True)))
+            name = path
+        elif source == 'socket':
+            host = data.get('host', '127.0.0.1')
+            if host not in PAPER_SOCKET_HOSTS:
+                return jsonify({'error': f'Socket host not allowed: {host} (see PAPER_SOCKET_HOSTS)'}), 400
+            feed = SocketFeed(host, int(data['port']))
+            name = f"{host}:{data['port']}"
+        else:
+            return jsonify({'error': f'Unknown source: {source}'}), 400
+        
+        session = PaperTradingSession(
+            model_registry.get(model_name, backend=backend),
+            feed,
+            OBSERVATION_COLUMNS,
+            initial_balance=float(data.get('initial_balance', 10000)),
+            latency_budget_ms=float(data.get('latency_budget_ms', 50)),
+            deterministic=bool(data.get('deterministic', True)),
+            warmup=warmup,
+            max_bars=int(data['max_bars']) if data.get('max_bars') else None,
+            name=name,
+            strength_normalization=STRENGTH_NORMALIZATION
+        )
+        with paper_sessions_lock:
+            paper_sessions[session.id] = session.start()
+        return jsonify(session.status()), 202
+    
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@app.route('/api/paper/sessions', methods=['GET'])
+def list_paper_sessions():
+    """Return the status of every paper-trading session"""
+    prune_paper_sessions()
+    with paper_sessions_lock:
+        sessions = list(paper_sessions.values())
+    return jsonify({'sessions': [session.status() for session in sessions]})
+
+
+@app.route('/api/paper/sessions/<session_id>', methods=['GET'])
+def get_paper_session(session_id):
+    """Return a paper-trading session's account and budget counters"""
+    session = paper_sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': f'Unknown session: {session_id}'}), 404
+    return jsonify(session.status())
+
+
+@app.route('/api/paper/sessions/<session_id>/latency', methods=['GET'])
+def get_paper_latency(session_id):
+    """Return per-stage latency percentiles (ingest, features, inference, order, total)
+    
+    Query: ?buckets=1 to include the histogram buckets
+    """
+    session = paper_sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': f'Unknown session: {session_id}'}), 404
+    return jsonify({
+        'id': session_id,
+        'latency_budget_ms': session.latency_budget_ms,
+        'budget_overruns': session.budget_overruns,
+        'stages': session.latency(buckets=request.args.get('buckets') == '1')
+    })
+
+
+@app.route('/api/paper/sessions/<session_id>/stop', methods=['POST'])
+def stop_paper_session(session_id):
+    """Stop a paper-trading session; its status stays available"""
+    session = paper_sessions.get(session_id)
+    if session is None:
+        return jsonify({'error': f'Unknown session: {session_id}'}), 404
+    session.stop()
+    return jsonify(session.status())
+
+
 if __name__ == '__main__':
     # Check environment variables
     print(f"Trading API URL: {TRADING_API_URL}")
@@ -539,4 +1330,6 @@ if __name__ == '__main__':
     else:
         print(f"API Key configured: No (optional)")
     
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    # The reloader would import this module twice, starting a second set of
+    # job, sweep and paper-trading pools; debug mode is opt-in
+    app.run(debug=os.getenv('FLASK_DEBUG', '0') == '1', use_reloader=False, host='0.0.0.0', port=5000)
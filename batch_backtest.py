@@ -0,0 +1,114 @@
+import time
+
+import numpy as np
+
+
+class BatchBacktestRunner:
+    """
+    Run several backtests in lockstep with one policy forward pass per tick.
+
+    Every tick, the observations of all still-running environments are
+    stacked into one (N, obs_dim) array and passed to a single
+    model.predict call; each environment then steps with its own row of the
+    resulting actions. Environments that finish early drop out of the batch.
+
+    When all environments are app5.RemoteEnvironment instances sharing one
+    client, the tick's steps are also sent as a single /step_multi request.
+
+    Usage:
+        from batch_backtest import BatchBacktestRunner
+
+        runner = BatchBacktestRunner(model, envs, analyzers=analyzers)
+        summary = runner.run()
+        print(summary['bars_per_sec'])
+    """
+
+    def __init__(self, model, envs, deterministic=False, analyzers=None, timestamps=None, max_steps=None):
+        """
+        Args:
+            model: Policy with predict(obs_batch, deterministic) (e.g. a PPO model)
+            envs (list): Gym-style environments (reset() / step(action))
+            deterministic (bool): Use the deterministic policy action
+            analyzers (list): Optional per-env objects with record_step(step, timestamp, info, reward)
+            timestamps (list): Optional per-env sequences of bar timestamps passed to the analyzers
+            max_steps (int): Optional cap on steps per environment
+        """
+        self.model = model
+        self.envs = list(envs)
+        if not self.envs:
+            raise ValueError("BatchBacktestRunner needs at least one environment")
+        self.deterministic = deterministic
+        self.analyzers = analyzers
+        self.timestamps = timestamps
+        self.max_steps = max_steps
+
+    def _shared_remote_client(self):
+        clients = {id(getattr(env, 'client', None)) for env in self.envs}
+        if len(clients) == 1 and all(hasattr(env, 'env_id') for env in self.envs):
+            return self.envs[0].client
+        return None
+
+    def _step_active(self, active, actions, client):
+        if client is not None:
+            results = client.step_multi([(self.envs[i].env_id, a) for i, a in zip(active, actions)])
+            return [(r['observation'], r['reward'], r['terminated'], r['truncated'], r['info']) for r in results]
+        return [self.envs[i].step(a) for i, a in zip(active, actions)]
+
+    def run(self, on_tick=None):
+        """
+        Run all environments to completion.
+
+        Args:
+            on_tick (callable): Optional callback(tick, n_active) called after every tick
+
+        Returns:
+            dict: Per-env steps, final portfolio values and total rewards, plus
+                aggregate bars, ticks, elapsed seconds and bars_per_sec
+        """
+        n_envs = len(self.envs)
+        first_obs = [np.asarray(env.reset()[0], dtype=np.float32) for env in self.envs]
+        obs = np.stack(first_obs)
+
+        steps = np.zeros(n_envs, dtype=np.int64)
+        total_rewards = np.zeros(n_envs, dtype=np.float64)
+        final_values = np.full(n_envs, np.nan)
+        running = np.ones(n_envs, dtype=bool)
+        client = self._shared_remote_client()
+
+        ticks = 0
+        start = time.perf_counter()
+        while running.any():
+            active = np.flatnonzero(running)
+            actions, _ = self.model.predict(obs[active], deterministic=self.deterministic)
+
+            for i, (next_obs, reward, terminated, truncated, info) in zip(
+                    active, self._step_active(active, actions, client)):
+                obs[i] = next_obs
+                if self.analyzers is not None:
+                    timestamp = None
+                    if self.timestamps is not None:
+                        env_times = self.timestamps[i]
+                        timestamp = env_times[min(steps[i], len(env_times) - 1)]
+                    self.analyzers[i].record_step(step=int(steps[i]), timestamp=timestamp,
+                                                  info=info, reward=reward)
+                steps[i] += 1
+                total_rewards[i] += reward
+                final_values[i] = info['portfolio_value']
+                if terminated or truncated or (self.max_steps and steps[i] >= self.max_steps):
+                    running[i] = False
+
+            ticks += 1
+            if on_tick is not None:
+                on_tick(ticks, int(running.sum()))
+
+        elapsed = time.perf_counter() - start
+        bars = int(steps.sum())
+        return {
+            'steps': steps.tolist(),
+            'final_values': final_values.tolist(),
+            'total_rewards': total_rewards.tolist(),
+            'bars': bars,
+            'ticks': ticks,
+            'elapsed': elapsed,
+            'bars_per_sec': bars / elapsed if elapsed > 0 else 0.0,
+        }
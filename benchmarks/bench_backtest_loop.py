@@ -0,0 +1,77 @@
+"""
+Per-step overhead of the backtest loop around env.step() and model.predict().
+
+Compares taking the bar time with df.iloc[step]['Open Time'].strftime(...)
+on every step (the loop before timestamps were read once into an int64 ns
+array) against the current loop, which indexes the array and only formats
+timestamps for streamed events. 'record_step only' is the analyzer's own
+share of the cost.
+
+Imports app5, so run it from the directory the app runs in (it needs the
+market data file).
+
+Usage:
+    python benchmarks/bench_backtest_loop.py [--steps 100000] [--event-every 10]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app5 import TradingAnalyzer  # noqa: E402
+from records import format_ns  # noqa: E402
+
+INFO = {'portfolio_value': 10000.0, 'cash': 1.0, 'position': 0.0, 'current_step': 0,
+        'position_changes': {'opened': [], 'closed': []}}
+ACTION = np.full(5, 0.3, dtype=np.float32)
+
+
+def dataframe_rows(df, steps, event_every):
+    analyzer = TradingAnalyzer()
+    last = len(df) - 1
+    for step in range(steps):
+        timestamp = df.iloc[min(step, last)]['Open Time'].strftime('%Y-%m-%d %H:%M:%S')
+        analyzer.record_step(step=step, timestamp=timestamp, info=INFO, reward=0.0, action=ACTION)
+        if (step + 1) % event_every == 0:
+            {'timestamp': timestamp, **analyzer.live_stats()}
+
+
+def timestamp_array(df, steps, event_every):
+    analyzer = TradingAnalyzer()
+    timestamps = df['Open Time'].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    last = len(timestamps) - 1
+    for step in range(steps):
+        timestamp = timestamps[min(step, last)]
+        analyzer.record_step(step=step, timestamp=timestamp, info=INFO, reward=0.0, action=ACTION)
+        if (step + 1) % event_every == 0:
+            {'timestamp': format_ns(timestamp), **analyzer.live_stats()}
+
+
+def record_only(df, steps, event_every):
+    analyzer = TradingAnalyzer()
+    for step in range(steps):
+        analyzer.record_step(step=step, timestamp=0, info=INFO, reward=0.0, action=ACTION)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark backtest loop overhead per step')
+    parser.add_argument('--steps', type=int, default=100_000)
+    parser.add_argument('--event-every', type=int, default=10, help='Steps between streamed events')
+    args = parser.parse_args()
+
+    df = pd.DataFrame({'Open Time': pd.date_range('2024-01-01', periods=args.steps, freq='min')})
+    for name, loop in (('DataFrame row per step', dataframe_rows),
+                       ('timestamp array', timestamp_array),
+                       ('record_step only', record_only)):
+        start = time.perf_counter()
+        loop(df, args.steps, args.event_every)
+        print(f'{name:24s} {(time.perf_counter() - start) / args.steps * 1e6:8.2f} us/step')
+
+
+if __name__ == '__main__':
+    main()
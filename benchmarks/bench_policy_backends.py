@@ -0,0 +1,66 @@
+"""
+Policy inference latency per backend.
+
+Times predict() of every installed policy_backends backend at batch sizes
+1, 64 and 1024 (a single observation, a sweep batch, a large batch) and
+prints microseconds per call and observations per second.
+
+Usage:
+    python benchmarks/bench_policy_backends.py [--model ppo_trading_bot_enhanced.zip] [--threads 1]
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import torch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from model_registry import ModelRegistry  # noqa: E402
+from policy_backends import available_backends  # noqa: E402
+
+BATCH_SIZES = (1, 64, 1024)
+
+
+def time_predict(policy, obs, deterministic, min_time=0.5):
+    """Mean seconds per predict() call, repeated for at least min_time seconds"""
+    for _ in range(5):
+        policy.predict(obs, deterministic=deterministic)
+    calls, start = 0, time.perf_counter()
+    while True:
+        policy.predict(obs, deterministic=deterministic)
+        calls += 1
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return elapsed / calls
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark policy inference backends')
+    parser.add_argument('--model', default='ppo_trading_bot_enhanced.zip', help='stable-baselines3 PPO .zip file')
+    parser.add_argument('--threads', type=int, default=1, help='torch intra-op threads')
+    parser.add_argument('--stochastic', action='store_true', help='Sample actions instead of taking the mean')
+    args = parser.parse_args()
+
+    torch.set_num_threads(args.threads)
+    registry = ModelRegistry(export_dir=tempfile.mkdtemp(prefix='policy_exports_'))
+    registry.register('bench', args.model)
+    obs_dim = registry.get('bench').observation_space.shape[0]
+    observations = np.random.default_rng(0).standard_normal((max(BATCH_SIZES), obs_dim)).astype(np.float32)
+
+    print(f"{'backend':12s}" + ''.join(f'{f"batch {size}":>26s}' for size in BATCH_SIZES))
+    for backend in available_backends():
+        policy = registry.get('bench', backend=backend)
+        cells = []
+        for size in BATCH_SIZES:
+            obs = observations[0] if size == 1 else observations[:size]
+            seconds = time_predict(policy, obs, deterministic=not args.stochastic)
+            cells.append(f'{seconds * 1e6:9.1f} us {size / seconds:10,.0f}/s')
+        print(f'{backend:12s}' + ''.join(f'{cell:>26s}' for cell in cells))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,270 @@
+import hashlib
+import inspect
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+import indicators
+from indicators import TechnicalIndicators
+from market_data import MARKET_DATA_SCHEMA, read_market_data
+from observations import ObservationMatrix, build_observations, normalization_key
+
+# Hash of the indicator code, part of every cache key; the module cannot change after import
+INDICATORS_DIGEST = hashlib.sha1(inspect.getsource(indicators).encode()).hexdigest()
+
+
+class FeatureStore:
+    """
+    Per-symbol cache of computed indicators for a market data file.
+
+    Indicators are computed once per cryptocoin and written to one Parquet
+    file per symbol under cache_dir/<source name>/<key>/. The key is a hash
+    of the source file contents, the indicator parameters and the indicator
+    code, so the cache is rebuilt only when one of those changes.
+
+    Policy observation matrices derived from the indicators are cached next
+    to them (observations()), under the same key, as memory-mapped .npy files.
+
+    Usage:
+        from feature_store import FeatureStore
+
+        store = FeatureStore('best_cluster_similar_price.csv')
+        df = store.load('XRPJPY', start='2024-01-01', end='2024-02-01')
+        obs = store.observations('XRPJPY', columns, start='2024-01-01', end='2024-02-01')
+    """
+
+    MANIFEST = 'manifest.json'
+
+    def __init__(self, source_path, cache_dir='feature_store', symbol_column='cryptocoin', workers=None,
+                 market_store=None, strength_normalization='global'):
+        self.source_path = source_path
+        self.cache_dir = cache_dir
+        self.symbol_column = symbol_column
+        self.workers = workers
+        # Optional market_data.MarketDataStore converted from source_path, read instead of the CSV
+        self.market_store = market_store
+        # TechnicalIndicators strength scaling; part of the cache key via get_params()
+        self.ti = TechnicalIndicators(strength_normalization)
+        self._lock = threading.Lock()
+        self._digest_cache = {}
+        self._observations = {}
+
+    def source_digest(self):
+        """
+        Hash the source file contents.
+
+        The digest is memoized on (size, mtime) so unchanged files are only
+        hashed once per process.
+
+        Returns:
+            str: SHA-1 hex digest of the source file
+        """
+        stat = os.stat(self.source_path)
+        stamp = (stat.st_size, stat.st_mtime_ns)
+        if self._digest_cache.get('stamp') != stamp:
+            sha = hashlib.sha1()
+            with open(self.source_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    sha.update(block)
+            self._digest_cache = {'stamp': stamp, 'digest': sha.hexdigest()}
+        return self._digest_cache['digest']
+
+    def key(self):
+        """
+        Cache key for the current source file and indicator configuration.
+
+        Returns:
+            str: Short hex key
+        """
+        payload = json.dumps({
+            'source': self.source_digest(),
+            'params': self.ti.get_params(),
+            'code': INDICATORS_DIGEST,
+            'schema': MARKET_DATA_SCHEMA,
+        }, sort_keys=True, default=str)
+        return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+    def _source_dir(self):
+        name = os.path.splitext(os.path.basename(self.source_path))[0]
+        return os.path.join(self.cache_dir, name)
+
+    def _key_dir(self, key):
+        return os.path.join(self._source_dir(), key)
+
+    def _symbol_path(self, key, symbol):
+        return os.path.join(self._key_dir(key), f'{symbol}.parquet')
+
+    def _read_manifest(self, key):
+        path = os.path.join(self._key_dir(key), self.MANIFEST)
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            return json.load(f)
+
+    def is_fresh(self):
+        """Check whether the cache matches the current source and parameters"""
+        return self._read_manifest(self.key()) is not None
+
+    def build(self, force=False):
+        """
+        Compute indicators for every symbol and persist them.
+
+        Args:
+            force (bool): Rebuild even if a matching cache exists
+
+        Returns:
+            dict: Manifest with the cache key and per-symbol row counts
+        """
+        with self._lock:
+            key = self.key()
+            manifest = self._read_manifest(key)
+            if manifest is not None and not force:
+                return manifest
+
+            print(f"Building feature store for {self.source_path} (key {key})...")
+            key_dir = self._key_dir(key)
+            tmp_dir = f'{key_dir}.{os.getpid()}.tmp'
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            os.makedirs(tmp_dir)
+
+            if self.market_store is not None and self.market_store.is_current(self.source_path):
+                df = self.market_store.read()
+            else:
+                df = read_market_data(self.source_path, symbol_column=self.symbol_column)
+            df = self.ti.parse_timestamps(df)
+            df = self.ti.calculate_by_group(df, key=self.symbol_column, workers=self.workers)
+            symbols = {}
+            for symbol, group in df.groupby(self.symbol_column, observed=True, sort=False):
+                features = group.reset_index(drop=True)
+                features.to_parquet(os.path.join(tmp_dir, f'{symbol}.parquet'), index=False)
+                symbols[str(symbol)] = len(features)
+
+            manifest = {
+                'key': key,
+                'source_path': os.path.abspath(self.source_path),
+                'params': self.ti.get_params(),
+                'symbols': symbols,
+            }
+            with open(os.path.join(tmp_dir, self.MANIFEST), 'w') as f:
+                json.dump(manifest, f, indent=2, default=str)
+
+            # Publish the new key and drop caches for stale keys. A published
+            # key directory may be in use by other processes (Parquet reads,
+            # mapped .npy files), so it is only replaced when forced; a
+            # directory without a manifest is not a published build.
+            if force or self._read_manifest(key) is None:
+                shutil.rmtree(key_dir, ignore_errors=True)
+            try:
+                os.replace(tmp_dir, key_dir)
+            except OSError:
+                # Another process published the same key in the meantime: use theirs
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+                manifest = self._read_manifest(key) or manifest
+            self._prune(key)
+
+            print(f"✓ Feature store ready: {len(symbols)} symbols")
+            return manifest
+
+    def _prune(self, key):
+        """
+        Remove finished cache directories of other keys. Builds still in
+        progress (.tmp directories, possibly of another process) and
+        directories without a manifest are left alone.
+        """
+        for entry in os.listdir(self._source_dir()):
+            if entry == key or entry.endswith('.tmp'):
+                continue
+            if os.path.exists(os.path.join(self._key_dir(entry), self.MANIFEST)):
+                shutil.rmtree(self._key_dir(entry), ignore_errors=True)
+
+    def symbols(self):
+        """Return the symbols available in the store"""
+        return list(self.build()['symbols'])
+
+    def load(self, symbol, start=None, end=None, columns=None):
+        """
+        Load indicators for one symbol, optionally restricted to a time slice.
+
+        Args:
+            symbol (str): Value of the symbol column, e.g. 'XRPJPY'
+            start: Inclusive lower bound on 'Open Time'
+            end: Inclusive upper bound on 'Open Time'
+            columns (list): Columns to read (all if None)
+
+        Returns:
+            pd.DataFrame: Indicator rows for the symbol (empty if unknown)
+        """
+        manifest = self.build()
+        if symbol not in manifest['symbols']:
+            return pd.DataFrame()
+
+        filters = []
+        if start is not None:
+            filters.append(('Open Time', '>=', pd.to_datetime(start)))
+        if end is not None:
+            filters.append(('Open Time', '<=', pd.to_datetime(end)))
+
+        return pd.read_parquet(
+            self._symbol_path(manifest['key'], symbol),
+            columns=columns,
+            filters=filters or None
+        )
+
+    def _observation_dir(self, key, columns, normalization):
+        spec = json.dumps({'columns': list(columns), 'normalization': normalization_key(normalization)},
+                          sort_keys=True)
+        return os.path.join(self._key_dir(key), 'observations', hashlib.sha1(spec.encode()).hexdigest()[:16])
+
+    def observations(self, symbol, columns, start=None, end=None, normalization=None):
+        """
+        Observation matrix of one symbol, optionally restricted to a time slice.
+
+        The full matrix of a symbol is built from its indicators on first use
+        and saved as .npy files; later calls (in any process) memory-map them,
+        and a time slice is a view of the mapped arrays.
+
+        Args:
+            symbol (str): Value of the symbol column, e.g. 'XRPJPY'
+            columns (list): Feature columns, in the order the policy was trained on
+            start: Inclusive lower bound on 'Open Time'
+            end: Inclusive upper bound on 'Open Time'
+            normalization (dict): Optional {'mean', 'std', 'clip'} (see observations.build_observations)
+
+        Returns:
+            observations.ObservationMatrix: Read-only matrix (None if the symbol is unknown)
+        """
+        manifest = self.build()
+        if symbol not in manifest['symbols']:
+            return None
+
+        obs_dir = self._observation_dir(manifest['key'], columns, normalization)
+        cache_key = (obs_dir, symbol)
+        matrix = self._observations.get(cache_key)
+        if matrix is None:
+            paths = {name: os.path.join(obs_dir, f'{symbol}.{name}.npy')
+                     for name in ('observations', 'timestamps', 'prices')}
+            if not all(os.path.exists(path) for path in paths.values()):
+                built = build_observations(pd.read_parquet(self._symbol_path(manifest['key'], symbol)),
+                                           columns, normalization=normalization)
+                os.makedirs(obs_dir, exist_ok=True)
+                # observations last: its presence marks a complete entry
+                for name in ('timestamps', 'prices', 'observations'):
+                    tmp_path = f'{paths[name]}.{os.getpid()}.{threading.get_ident()}.tmp'
+                    with open(tmp_path, 'wb') as f:
+                        np.save(f, getattr(built, name))
+                    os.replace(tmp_path, paths[name])
+            matrix = ObservationMatrix(
+                np.load(paths['observations'], mmap_mode='r'),
+                np.load(paths['timestamps'], mmap_mode='r'),
+                np.load(paths['prices'], mmap_mode='r'),
+                columns
+            )
+            self._observations[cache_key] = matrix
+
+        if start is None and end is None:
+            return matrix
+        return matrix.window(start, end)
@@ -1,4 +1,12 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
+import {
+  LineChart,
+  Line,
+  XAxis,
+  YAxis,
+  Tooltip,
+  ResponsiveContainer,
+} from "recharts";
 import {
   Activity,
   Play,
@@ -12,6 +20,45 @@ interface PortfolioPageProps {
   onNavigate: (page: string) => void;
 }
 
+interface EquityPoint {
+  step: number;
+  value: number;
+}
+
+// Points kept for the live equity chart; older points are min/max decimated
+const MAX_CHART_POINTS = 2000;
+
+// Keep the lowest and highest point of each bucket (plus the endpoints) so
+// drawdowns and peaks survive decimation
+const decimateMinMax = (
+  points: EquityPoint[],
+  maxPoints: number,
+): EquityPoint[] => {
+  if (points.length <= maxPoints) return points;
+  const buckets = Math.floor((maxPoints - 2) / 2);
+  const size = points.length / buckets;
+  const kept: EquityPoint[] = [points[0]];
+  for (let b = 0; b < buckets; b++) {
+    const lo = Math.floor(b * size);
+    const hi = Math.min(Math.floor((b + 1) * size), points.length);
+    if (hi <= lo) continue;
+    let min = lo;
+    let max = lo;
+    for (let i = lo + 1; i < hi; i++) {
+      if (points[i].value < points[min].value) min = i;
+      if (points[i].value > points[max].value) max = i;
+    }
+    const first = Math.min(min, max);
+    const second = Math.max(min, max);
+    if (first !== 0) kept.push(points[first]);
+    if (second !== first && second !== points.length - 1) {
+      kept.push(points[second]);
+    }
+  }
+  kept.push(points[points.length - 1]);
+  return kept;
+};
+
 export default function PortfolioPage({
   onNavigate,
 }: PortfolioPageProps) {
@@ -30,8 +77,93 @@ export default function PortfolioPage({
   const [totalSteps, setTotalSteps] = useState(0);
   const [isComplete, setIsComplete] = useState(false);
   const [liveStats, setLiveStats] = useState<any>(null);
+  const [equitySeries, setEquitySeries] = useState<
+    EquityPoint[]
+  >([]);
+
+  // Step events are buffered here and applied at most once per animation
+  // frame, so long runs do not re-render on every message
+  const equityRef = useRef<EquityPoint[]>([]);
+  const latestStepRef = useRef<any>(null);
+  const frameRef = useRef<number | null>(null);
+
+  const flushStepUpdates = () => {
+    frameRef.current = null;
+    const data = latestStepRef.current;
+    if (!data) return;
+    latestStepRef.current = null;
+
+    setCurrentStep(data.step);
+    if (data.total_steps) {
+      setTotalSteps(data.total_steps);
+    }
+    setLiveStats({
+      initial_balance: data.initial_balance,
+      current_balance: data.portfolio_value,
+      current_pnl: data.pnl,
+      total_return: (
+        ((data.portfolio_value - data.initial_balance) /
+          data.initial_balance) *
+        100
+      ).toFixed(2),
+    });
+    setEquitySeries(equityRef.current);
+  };
 
-  const cryptos = ["XRPJPY", "LINKJPY", "AVAXTRY", "ADAJPY"];
+  const queueStepUpdate = (data: any) => {
+    if (data.equity) {
+      const { steps, values } = data.equity;
+      const points = equityRef.current.concat(
+        steps.map((step: number, i: number) => ({
+          step,
+          value: values[i],
+        })),
+      );
+      equityRef.current =
+        points.length > MAX_CHART_POINTS
+          ? decimateMinMax(points, MAX_CHART_POINTS / 2)
+          : points;
+    }
+    latestStepRef.current = data;
+    if (frameRef.current === null) {
+      frameRef.current = requestAnimationFrame(flushStepUpdates);
+    }
+  };
+
+  useEffect(() => {
+    return () => {
+      if (frameRef.current !== null) {
+        cancelAnimationFrame(frameRef.current);
+      }
+    };
+  }, []);
+
+  const [cryptos, setCryptos] = useState<string[]>([]);
+
+  // Symbols come from the data file the server is running on
+  useEffect(() => {
+    const fetchCryptos = async () => {
+      try {
+        const response = await fetch(
+          "http://localhost:5000/api/cryptocurrencies",
+        );
+        if (!response.ok) {
+          throw new Error("Failed to fetch cryptocurrencies");
+        }
+        const data = await response.json();
+        const symbols: string[] = data.cryptocurrencies || [];
+        setCryptos(symbols);
+        if (symbols.length > 0) {
+          setSelectedCrypto((current) =>
+            symbols.includes(current) ? current : symbols[0],
+          );
+        }
+      } catch (err) {
+        console.error("Error fetching cryptocurrencies:", err);
+      }
+    };
+    fetchCryptos();
+  }, []);
 
   // Helper function to convert datetime-local format to SQL format
   const toSQLDateTime = (datetimeLocal: string): string => {
@@ -143,6 +275,9 @@ export default function PortfolioPage({
     setTotalSteps(0);
     setIsComplete(false);
     setLiveStats(null);
+    setEquitySeries([]);
+    equityRef.current = [];
+    latestStepRef.current = null;
 
     const requestPayload = {
       crypto: selectedCrypto,
@@ -219,11 +354,6 @@ export default function PortfolioPage({
               try {
                 const data = JSON.parse(jsonStr);
                 messageCount++;
-                console.log(
-                  `Message ${messageCount}:`,
-                  data.type,
-                  data,
-                );
 
                 if (data.type === "init") {
                   console.log(
@@ -234,34 +364,26 @@ export default function PortfolioPage({
                 } else if (data.type === "info") {
                   console.log("Info:", data.message);
                 } else if (data.type === "step") {
-                  setCurrentStep(data.step);
-                  if (data.total_steps) {
-                    setTotalSteps(data.total_steps);
-                  }
-
-                  setLiveStats({
-                    initial_balance: data.initial_balance,
-                    current_balance: data.portfolio_value,
-                    current_pnl: data.pnl,
-                    total_return: (
-                      ((data.portfolio_value -
-                        data.initial_balance) /
-                        data.initial_balance) *
-                      100
-                    ).toFixed(2),
-                  });
-
-                  // Log every 100 steps
-                  if (data.step % 100 === 0) {
-                    console.log(
-                      `Step ${data.step}/${data.total_steps}: PnL = ${data.pnl}`,
-                    );
-                  }
+                  queueStepUpdate(data);
                 } else if (data.type === "complete") {
                   console.log(
                     "Backtest complete!",
                     data.results,
                   );
+                  if (frameRef.current !== null) {
+                    cancelAnimationFrame(frameRef.current);
+                  }
+                  flushStepUpdates();
+                  if (data.results.equity_curve) {
+                    const { steps, values } =
+                      data.results.equity_curve;
+                    setEquitySeries(
+                      steps.map((step: number, i: number) => ({
+                        step,
+                        value: values[i],
+                      })),
+                    );
+                  }
                   setIsComplete(true);
                   setBacktestResults(data.results);
                 } else if (data.type === "error") {
@@ -638,6 +760,43 @@ export default function PortfolioPage({
           </div>
         )}
 
+        {/* Equity Curve */}
+        {(loading || isComplete) && equitySeries.length > 1 && (
+          <div className="bg-white border border-[#8B6914]/30 rounded-lg shadow-lg mb-6">
+            <div className="p-4 border-b border-[#8B6914]/20">
+              <p className="text-xs text-[#1a4d5c]">
+                Portfolio Value
+              </p>
+            </div>
+            <div className="p-4 h-64">
+              <ResponsiveContainer width="100%" height="100%">
+                <LineChart data={equitySeries}>
+                  <XAxis
+                    dataKey="step"
+                    type="number"
+                    domain={["dataMin", "dataMax"]}
+                    tick={{ fontSize: 12 }}
+                  />
+                  <YAxis
+                    domain={["auto", "auto"]}
+                    tick={{ fontSize: 12 }}
+                    width={80}
+                  />
+                  <Tooltip />
+                  <Line
+                    type="linear"
+                    dataKey="value"
+                    stroke="#CD7F32"
+                    dot={false}
+                    strokeWidth={2}
+                    isAnimationActive={false}
+                  />
+                </LineChart>
+              </ResponsiveContainer>
+            </div>
+          </div>
+        )}
+
         {/* Completion Message Only */}
         {isComplete && backtestResults && (
           <div className="bg-gradient-to-br from-white to-[#fafaf5] border border-[#00cc88]/30 rounded-lg shadow-lg">
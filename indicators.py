@@ -1,6 +1,71 @@
+import inspect
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 import pandas as pd
 import numpy as np
 import vectorbt as vbt
+from numba import njit
+from numpy.lib.stride_tricks import sliding_window_view
+
+from market_data import read_market_data
+
+# Raw columns the indicators are computed from
+OHLCV_COLUMNS = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+@njit(cache=True)
+def _ha_open_nb(open_, ha_close):
+    """Heiken Ashi open recurrence: HA_Open[i] = (HA_Open[i-1] + HA_Close[i-1]) / 2"""
+    ha_open = np.empty_like(ha_close)
+    if len(ha_close) == 0:
+        return ha_open
+    ha_open[0] = open_[0]
+    for i in range(1, len(ha_close)):
+        ha_open[i] = (ha_open[i - 1] + ha_close[i - 1]) / 2
+    return ha_open
+
+
+def _rolling_mad(values, window, chunk_size=65536):
+    """
+    Rolling mean absolute deviation, equivalent to
+    rolling(window).apply(lambda x: np.mean(np.abs(x - np.mean(x))), raw=True).
+    
+    Windows are strided views over the input, evaluated in chunks to bound
+    the temporary (chunk_size, window) deviation array.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(len(values), np.nan)
+    if len(values) < window:
+        return out
+    
+    windows = sliding_window_view(values, window)
+    for start in range(0, len(windows), chunk_size):
+        chunk = windows[start:start + chunk_size]
+        mean = chunk.mean(axis=1)
+        out[start + window - 1:start + window - 1 + len(chunk)] = \
+            np.abs(chunk - mean[:, None]).mean(axis=1)
+    return out
+
+
+def _calc_group_from_shm(shm_name, shape, start, stop, strength_normalization='global'):
+    """
+    Process pool worker: compute indicators for rows [start, stop) of the
+    shared (len(OHLCV_COLUMNS), n_rows) float64 block.
+    
+    Returns:
+        pd.DataFrame: Indicator columns only (OHLCV inputs are dropped)
+    """
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+        group = pd.DataFrame({col: block[i, start:stop].copy() for i, col in enumerate(OHLCV_COLUMNS)})
+        del block
+    finally:
+        shm.close()
+    
+    result = TechnicalIndicators(strength_normalization).calculate_from_dataframe(group)
+    return result.drop(columns=OHLCV_COLUMNS)
 
 
 class TechnicalIndicators:
@@ -18,24 +83,79 @@ class TechnicalIndicators:
         
         # Or calculate from DataFrame
         df = ti.calculate_from_dataframe(your_dataframe)
+        
+        # Or per symbol, in parallel, for a multi-coin DataFrame
+        df = ti.calculate_by_group(your_dataframe, key='cryptocoin', workers=4)
     """
     
-    def __init__(self):
+    STRENGTH_NORMALIZATIONS = ('global', 'expanding')
+    
+    def __init__(self, strength_normalization='global'):
+        """
+        Args:
+            strength_normalization (str): How MACD, MA and OBV strengths are scaled.
+                'global' divides by the min/max over the whole series (the original
+                behaviour, which looks ahead); 'expanding' uses the min/max up to and
+                including each bar, which is what online_indicators.OnlineIndicators
+                can reproduce bar by bar.
+        """
+        if strength_normalization not in self.STRENGTH_NORMALIZATIONS:
+            raise ValueError(f"Unknown strength_normalization: {strength_normalization}")
+        self.strength_normalization = strength_normalization
         self.signal_indicators = ['RSI', 'MACD', 'MA', 'HA', 'STOCH', 'BBANDS', 'CCI', 'OBV']
         self.continuous_indicators = ['CMF', 'VWAP', 'ATR', 'VOLATILITY', 'PARKINSON', 'PRICE_ACTION']
     
-    def calculate_from_csv(self, csv_file):
+    def get_params(self):
+        """
+        Describe the indicator configuration.
+        
+        Returns:
+            dict: Indicator lists and the default parameters of every _calc_* method
+        """
+        params = {
+            'strength_normalization': self.strength_normalization,
+            'signal_indicators': list(self.signal_indicators),
+            'continuous_indicators': list(self.continuous_indicators),
+        }
+        for name in self.signal_indicators + self.continuous_indicators:
+            signature = inspect.signature(getattr(self, f'_calc_{name}'))
+            params[name] = {
+                arg: p.default for arg, p in signature.parameters.items()
+                if p.default is not inspect.Parameter.empty
+            }
+        return params
+    
+    def calculate_from_csv(self, csv_file, symbols=None, start=None, end=None):
         """
         Calculate indicators from a CSV file.
         
+        The file is read with the typed, chunked reader from market_data, so
+        only the requested symbols and time window are kept in memory.
+        
         Args:
             csv_file (str): Path to CSV file with OHLCV data
+            symbols: Optional symbol or list of symbols to keep
+            start: Optional inclusive lower bound on 'Open Time'
+            end: Optional inclusive upper bound on 'Open Time'
             
         Returns:
             pd.DataFrame: DataFrame with calculated indicators
         """
-        df = pd.read_csv(csv_file)
+        df = read_market_data(csv_file, symbols=symbols, start=start, end=end)
+        self.parse_timestamps(df)
+        
+        return self.calculate_from_dataframe(df)
+    
+    def parse_timestamps(self, df):
+        """
+        Parse the timestamp column in place.
         
+        Args:
+            df (pd.DataFrame): Raw OHLCV data with an 'Open Time' or 'Datetime' column
+            
+        Returns:
+            pd.DataFrame: The same DataFrame, with 'Open Time' as datetime
+        """
         # Handle both 'Datetime' and 'Open Time' column names
         if 'Open Time' in df.columns:
             df['Open Time'] = pd.to_datetime(df['Open Time'])
@@ -43,7 +163,7 @@ class TechnicalIndicators:
             df['Datetime'] = pd.to_datetime(df['Datetime'])
             df['Open Time'] = df['Datetime']
         
-        return self.calculate_from_dataframe(df)
+        return df
     
     def calculate_from_dataframe(self, df):
         """
@@ -99,6 +219,68 @@ class TechnicalIndicators:
         
         return df
     
+    def calculate_by_group(self, df, key='cryptocoin', workers=None):
+        """
+        Calculate indicators separately for each group (e.g. each symbol).
+        
+        Rolling windows, cumulative sums and the Heiken Ashi recursion are
+        restarted at every group. Groups are computed in a process pool; the
+        OHLCV inputs are placed in one shared memory block that the workers
+        read in place instead of receiving pickled copies.
+        
+        Args:
+            df (pd.DataFrame): OHLCV data for one or more groups
+            key (str): Column identifying the group
+            workers (int): Number of worker processes (defaults to CPU count,
+                1 computes in the current process)
+            
+        Returns:
+            pd.DataFrame: DataFrame with calculated indicators, rows in the original order
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        
+        # Stable sort so that each group is one contiguous slice
+        codes, _ = pd.factorize(df[key], sort=False)
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        bounds = np.flatnonzero(np.diff(sorted_codes)) + 1
+        starts = np.concatenate(([0], bounds))
+        stops = np.concatenate((bounds, [len(df)]))
+        
+        if workers <= 1 or len(starts) <= 1:
+            parts = [
+                self.calculate_from_dataframe(
+                    df[OHLCV_COLUMNS].iloc[order[start:stop]].reset_index(drop=True)
+                ).drop(columns=OHLCV_COLUMNS)
+                for start, stop in zip(starts, stops)
+            ]
+        else:
+            shape = (len(OHLCV_COLUMNS), len(df))
+            shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+            try:
+                block = np.ndarray(shape, dtype=np.float64, buffer=shm.buf)
+                for i, col in enumerate(OHLCV_COLUMNS):
+                    block[i] = df[col].to_numpy(dtype=np.float64)[order]
+                del block
+                
+                with ProcessPoolExecutor(max_workers=min(workers, len(starts))) as pool:
+                    futures = [
+                        pool.submit(_calc_group_from_shm, shm.name, shape, int(start), int(stop),
+                                    self.strength_normalization)
+                        for start, stop in zip(starts, stops)
+                    ]
+                    parts = [future.result() for future in futures]
+            finally:
+                shm.close()
+                shm.unlink()
+        
+        # Undo the sort and attach the indicator columns to the original rows
+        features = pd.concat(parts, ignore_index=True)
+        features = features.iloc[np.argsort(order, kind='stable')]
+        features.index = df.index
+        return pd.concat([df, features], axis=1)
+    
     def _calc_RSI(self, df):
         """Calculate RSI indicator"""
         rsi = vbt.RSI.run(df['Close'], window=14)
@@ -116,12 +298,18 @@ class TechnicalIndicators:
         df['MACD_exits'] = macd.macd_crossed_below(macd.signal)
         
         macd_diff = (macd.macd - macd.signal).abs()
-        macd_range = macd_diff.max() - macd_diff.min()
         
-        if macd_range > 0:
-            norm_macd = ((macd_diff - macd_diff.min()) / macd_range).clip(0, 1)
+        if self.strength_normalization == 'expanding':
+            diff_min = macd_diff.cummin()
+            macd_range = macd_diff.cummax() - diff_min
+            norm_macd = ((macd_diff - diff_min) / macd_range.where(macd_range > 0)).clip(0, 1)
+            norm_macd = norm_macd.where(macd_range > 0, 0.0)
         else:
-            norm_macd = pd.Series(0.0, index=df.index)
+            macd_range = macd_diff.max() - macd_diff.min()
+            if macd_range > 0:
+                norm_macd = ((macd_diff - macd_diff.min()) / macd_range).clip(0, 1)
+            else:
+                norm_macd = pd.Series(0.0, index=df.index)
         
         signal_mask = df['MACD_entries'] | df['MACD_exits']
         df.loc[signal_mask, 'MACD_strength'] = norm_macd[signal_mask]
@@ -137,7 +325,10 @@ class TechnicalIndicators:
         df['MA_exits'] = ma_short < ma_long
 
         ma_diff = (ma_short - ma_long).abs()
-        ma_diff_max = ma_diff.max() if ma_diff.max() != 0 else 1
+        if self.strength_normalization == 'expanding':
+            ma_diff_max = ma_diff.cummax().replace(0, 1)
+        else:
+            ma_diff_max = ma_diff.max() if ma_diff.max() != 0 else 1
         
         signal_changes = (df['MA_entries'] != df['MA_entries'].shift(1)) | \
                         (df['MA_exits'] != df['MA_exits'].shift(1))
@@ -147,10 +338,8 @@ class TechnicalIndicators:
     def _calc_HA(self, df):
         """Calculate Heiken Ashi indicator"""
         df["HA_Close"] = (df["Open"] + df["High"] + df["Low"] + df["Close"]) / 4
-        df["HA_Open"] = df["Open"]
-        
-        for i in range(1, len(df)):
-            df.loc[i, "HA_Open"] = (df.loc[i - 1, "HA_Open"] + df.loc[i - 1, "HA_Close"]) / 2
+        df["HA_Open"] = _ha_open_nb(df["Open"].to_numpy(dtype=np.float64),
+                                    df["HA_Close"].to_numpy(dtype=np.float64))
         
         df["HA_High"] = df[["High", "HA_Open", "HA_Close"]].max(axis=1)
         df["HA_Low"] = df[["Low", "HA_Open", "HA_Close"]].min(axis=1)
@@ -177,12 +366,16 @@ class TechnicalIndicators:
         df['OBV_exits'] = obv_diff < 0
         
         obv_diff_abs = obv_diff.abs()
-        obv_max = obv_diff_abs.max()
         
-        if obv_max > 0:
-            norm_obv = (obv_diff_abs / obv_max).clip(0, 1)
+        if self.strength_normalization == 'expanding':
+            obv_max = obv_diff_abs.cummax()
+            norm_obv = (obv_diff_abs / obv_max.where(obv_max > 0)).clip(0, 1).where(obv_max > 0, 0.0)
         else:
-            norm_obv = pd.Series(0.0, index=df.index)
+            obv_max = obv_diff_abs.max()
+            if obv_max > 0:
+                norm_obv = (obv_diff_abs / obv_max).clip(0, 1)
+            else:
+                norm_obv = pd.Series(0.0, index=df.index)
         
         signal_mask = df['OBV_entries'] | df['OBV_exits']
         df.loc[signal_mask, 'OBV_strength'] = norm_obv[signal_mask]
@@ -225,9 +418,7 @@ class TechnicalIndicators:
         """Calculate Commodity Channel Index indicator"""
         tp = (df['High'] + df['Low'] + df['Close']) / 3
         tp_ma = tp.rolling(window=window).mean()
-        tp_md = tp.rolling(window=window).apply(
-            lambda x: np.mean(np.abs(x - np.mean(x))), raw=True
-        )
+        tp_md = pd.Series(_rolling_mad(tp.to_numpy(), window), index=tp.index)
         
         tp_md_safe = tp_md.replace(0, np.nan).fillna(1)
         cci = (tp - tp_ma) / (constant * tp_md_safe)
@@ -0,0 +1,208 @@
+import json
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from streaming import dumps
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+
+
+class JobStore:
+    """
+    SQLite-backed table of jobs and the events they emit.
+
+    Every event a job produces is stored with a per-job sequence number, so
+    a client can (re)attach to a job at any time and replay everything
+    after the last sequence number it saw.
+    """
+
+    def __init__(self, db_path='backtest_jobs.db'):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS jobs (
+                    id TEXT PRIMARY KEY,
+                    kind TEXT NOT NULL,
+                    status TEXT NOT NULL,
+                    params TEXT NOT NULL,
+                    result TEXT,
+                    error TEXT,
+                    created_at TEXT NOT NULL,
+                    started_at TEXT,
+                    finished_at TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_events (
+                    job_id TEXT NOT NULL,
+                    seq INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (job_id, seq)
+                )
+            """)
+            # Jobs cannot survive a restart of the worker pool
+            conn.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Interrupted by server restart', finished_at = ? "
+                "WHERE status IN ('queued', 'running')",
+                (self._now(),)
+            )
+
+    def _connect(self):
+        return sqlite3.connect(self.db_path, timeout=30)
+
+    @staticmethod
+    def _now():
+        return datetime.now().isoformat(timespec='seconds')
+
+    def create(self, kind, params):
+        job_id = str(uuid.uuid4())
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, status, params, created_at) VALUES (?, ?, 'queued', ?, ?)",
+                (job_id, kind, dumps(params), self._now())
+            )
+        return job_id
+
+    def set_status(self, job_id, status, result=None, error=None):
+        with self._connect() as conn:
+            if status == 'running':
+                conn.execute("UPDATE jobs SET status = ?, started_at = ? WHERE id = ?",
+                             (status, self._now(), job_id))
+            else:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ?",
+                    (status, dumps(result) if result is not None else None, error, self._now(), job_id)
+                )
+
+    def append_event(self, job_id, seq, event):
+        with self._connect() as conn:
+            conn.execute("INSERT INTO job_events (job_id, seq, data) VALUES (?, ?, ?)",
+                         (job_id, seq, dumps(event)))
+
+    def events_after(self, job_id, last_seq):
+        """Return (seq, json string) pairs with seq > last_seq, in order"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT seq, data FROM job_events WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, last_seq)
+            ).fetchall()
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job['params'] = json.loads(job['params'])
+        job['result'] = json.loads(job['result']) if job['result'] else None
+        return job
+
+    def list(self, limit=50):
+        with self._connect() as conn:
+            conn.row_factory = sqlite3.Row
+            rows = conn.execute(
+                "SELECT id, kind, status, error, created_at, started_at, finished_at "
+                "FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+
+class JobQueue:
+    """
+    Runs event-producing jobs on a bounded local worker pool.
+
+    A job is a function fn(params, job_id) returning an iterator of event
+    dicts (the same payloads the SSE endpoints stream). Events are written to the JobStore
+    as they are produced, independently of any client connection, and the
+    last 'complete' or 'error' event decides the job's final status.
+
+    At most max_workers jobs run at once; at most max_pending more wait in
+    the queue, after which submit() raises JobQueueFull.
+
+    Usage:
+        queue = JobQueue(JobStore('jobs.db'), max_workers=2)
+        job_id = queue.submit('backtest', params, backtest_events)
+        for seq, data in queue.stream(job_id, last_seq=0):
+            ...
+    """
+
+    FINAL_STATUSES = ('completed', 'failed')
+
+    def __init__(self, store, max_workers=2, max_pending=8):
+        self.store = store
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='job')
+        self._active = 0
+        self._lock = threading.Lock()
+
+    def submit(self, kind, params, fn):
+        """
+        Queue fn(params, job_id) as a new job.
+
+        Returns:
+            str: Job id
+        """
+        with self._lock:
+            if self._active >= self.max_workers + self.max_pending:
+                raise JobQueueFull(f'Too many backtests in progress (limit {self.max_workers + self.max_pending})')
+            self._active += 1
+
+        job_id = self.store.create(kind, params)
+        self._pool.submit(self._run, job_id, params, fn)
+        return job_id
+
+    def _run(self, job_id, params, fn):
+        self.store.set_status(job_id, 'running')
+        seq = 0
+        final_event = None
+        try:
+            for event in fn(params, job_id):
+                seq += 1
+                self.store.append_event(job_id, seq, event)
+                if event.get('type') in ('complete', 'error'):
+                    final_event = event
+
+            if final_event is not None and final_event['type'] == 'complete':
+                self.store.set_status(job_id, 'completed', result=final_event.get('results'))
+            else:
+                message = final_event.get('message') if final_event else 'Job finished without a result'
+                self.store.set_status(job_id, 'failed', error=message)
+        except Exception as e:
+            error_trace = traceback.format_exc()
+            print(error_trace)
+            self.store.append_event(job_id, seq + 1, {'type': 'error', 'message': str(e), 'trace': error_trace})
+            self.store.set_status(job_id, 'failed', error=str(e))
+        finally:
+            with self._lock:
+                self._active -= 1
+
+    def stream(self, job_id, last_seq=0, poll_interval=0.25):
+        """
+        Yield (seq, json string) for every event after last_seq until the job finishes.
+
+        Safe to call any number of times, concurrently or after a disconnect.
+        """
+        while True:
+            rows = self.store.events_after(job_id, last_seq)
+            for seq, data in rows:
+                last_seq = seq
+                yield seq, data
+
+            if not rows:
+                job = self.store.get(job_id)
+                if job is None or job['status'] in self.FINAL_STATUSES:
+                    # Drain events written between the last read and the status change
+                    for seq, data in self.store.events_after(job_id, last_seq):
+                        yield seq, data
+                    return
+                time.sleep(poll_interval)
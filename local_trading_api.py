@@ -0,0 +1,148 @@
+"""
+Local stand-in for the remote Trading Environment API.
+
+Implements the endpoints used by app5.RemoteTradingAPIClient, including the
+batched /step_batch and /step_multi endpoints and Arrow IPC uploads, on top of
+trading_env.LocalTradingEnv. It is meant for exercising the client offline,
+not for reproducing the remote environment's trading rules.
+
+Run it on the default TRADING_API_URL port:
+    python local_trading_api.py
+"""
+import io
+import json
+import threading
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+from flask import Flask, request, jsonify
+
+from trading_env import LocalTradingEnv
+
+app = Flask(__name__)
+
+environments = {}
+environments_lock = threading.Lock()
+
+
+def _step_result(obs, reward, terminated, truncated, info):
+    return {
+        'observation': obs.tolist(),
+        'reward': reward,
+        'terminated': terminated,
+        'truncated': truncated,
+        'info': info,
+    }
+
+
+def _get_env(env_id):
+    with environments_lock:
+        return environments.get(env_id)
+
+
+@app.route('/health', methods=['GET'])
+def health():
+    return jsonify({'status': 'ok', 'environments': len(environments)})
+
+
+@app.route('/create_environment', methods=['POST'])
+def create_environment():
+    config = json.loads(request.form.get('config', '{}'))
+    upload = request.files['file']
+    if upload.filename.endswith(('.arrow', '.feather')):
+        df = pa.ipc.open_file(pa.BufferReader(upload.read())).read_pandas()
+    else:
+        compression = 'gzip' if upload.filename.endswith('.gz') else None
+        df = pd.read_csv(io.BytesIO(upload.read()), compression=compression)
+    env_id = str(uuid.uuid4())
+    with environments_lock:
+        environments[env_id] = LocalTradingEnv(
+            df,
+            config.get('T_indicators', []),
+            config.get('MR_indicators', []),
+            config.get('continuous_features', []),
+            initial_balance=config.get('initial_balance', 10000)
+        )
+    return jsonify({'env_id': env_id})
+
+
+@app.route('/reset', methods=['POST'])
+def reset():
+    payload = request.json
+    env = _get_env(payload['env_id'])
+    if env is None:
+        return jsonify({'error': 'Unknown environment'}), 404
+    obs, info = env.reset(seed=payload.get('seed'))
+    return jsonify({'observation': obs.tolist(), 'info': info})
+
+
+@app.route('/step', methods=['POST'])
+def step():
+    payload = request.json
+    env = _get_env(payload['env_id'])
+    if env is None:
+        return jsonify({'error': 'Unknown environment'}), 404
+    return jsonify(_step_result(*env.step(payload['action'])))
+
+
+@app.route('/step_batch', methods=['POST'])
+def step_batch():
+    """Apply a list of actions to one environment, stopping at the first terminal step"""
+    payload = request.json
+    env = _get_env(payload['env_id'])
+    if env is None:
+        return jsonify({'error': 'Unknown environment'}), 404
+
+    results = []
+    for action in payload['actions']:
+        result = _step_result(*env.step(action))
+        results.append(result)
+        if result['terminated'] or result['truncated']:
+            break
+    return jsonify({'results': results})
+
+
+@app.route('/step_multi', methods=['POST'])
+def step_multi():
+    """Apply one action to each of several environments"""
+    steps = request.json['steps']
+    envs = [_get_env(s['env_id']) for s in steps]
+    if any(env is None for env in envs):
+        return jsonify({'error': 'Unknown environment'}), 404
+    return jsonify({'results': [_step_result(*env.step(s['action'])) for env, s in zip(envs, steps)]})
+
+
+@app.route('/environment/<env_id>/info', methods=['GET'])
+def environment_info(env_id):
+    env = _get_env(env_id)
+    if env is None:
+        return jsonify({'error': 'Unknown environment'}), 404
+    return jsonify({
+        'env_id': env_id,
+        'current_step': env.current_step,
+        'total_steps': len(env.prices),
+        'portfolio_value': env._portfolio_value(env.prices[min(env.current_step, len(env.prices) - 1)]),
+    })
+
+
+@app.route('/environment/<env_id>/positions', methods=['POST'])
+def positions(env_id):
+    env = _get_env(env_id)
+    if env is None:
+        return jsonify({'error': 'Unknown environment'}), 404
+    open_positions = [{'entry_price': env.entry_price, 'quantity': env.quantity}] if env.quantity > 0 else []
+    return jsonify({'positions': open_positions})
+
+
+@app.route('/environment/<env_id>', methods=['DELETE'])
+def delete_environment(env_id):
+    with environments_lock:
+        removed = environments.pop(env_id, None)
+    if removed is None:
+        return jsonify({'error': 'Unknown environment'}), 404
+    return jsonify({'deleted': env_id})
+
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=8000, threaded=True)
@@ -0,0 +1,513 @@
+import itertools
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+# Column dtypes of the market data file. OHLCV feed the indicator
+# calculations (including cumulative sums) and stay float64; the remaining
+# numeric columns are only used as float32 observation features.
+MARKET_DATA_SCHEMA = {
+    'Open': 'float64',
+    'High': 'float64',
+    'Low': 'float64',
+    'Close': 'float64',
+    'Volume': 'float64',
+    'Quote Asset Volume': 'float32',
+    'Number of Trades': 'float32',
+    'Taker Buy Base': 'float32',
+    'Taker Buy Quote': 'float32',
+    'cryptocoin': 'category',
+}
+TIME_COLUMNS = ('Open Time', 'Datetime')
+DEFAULT_CHUNKSIZE = 250_000
+
+
+def read_header(csv_path):
+    """Return the column names of a CSV file without reading any data"""
+    return list(pd.read_csv(csv_path, nrows=0).columns)
+
+
+def read_market_data(csv_path, symbols=None, start=None, end=None, columns=None,
+                     symbol_column='cryptocoin', time_column='Open Time',
+                     chunksize=DEFAULT_CHUNKSIZE, index=None):
+    """
+    Read the market data file with a typed schema, keeping only what is asked for.
+
+    The file is streamed in chunks; each chunk is filtered by symbol and time
+    window before the next one is read, so peak memory scales with the
+    selected slice rather than the file. Timestamps are parsed while reading
+    and the symbol column is categorical.
+
+    Args:
+        csv_path (str): Path to the market data CSV
+        symbols: One symbol or a list of symbols to keep (default: all)
+        start: Optional inclusive lower bound on the time column
+        end: Optional inclusive upper bound on the time column
+        columns (list): Columns to read (default: all); the symbol and time
+            columns are always included
+        symbol_column (str): Name of the symbol column
+        time_column (str): Name of the time column
+        chunksize (int): Rows per chunk
+        index (SymbolIndex): Optional index of the same file; a single symbol
+            stored contiguously is then read by seeking straight to its rows
+
+    Returns:
+        pd.DataFrame: Matching rows in file order with a fresh RangeIndex
+    """
+    header = read_header(csv_path)
+    if time_column not in header:
+        time_column = next((c for c in TIME_COLUMNS if c in header), None)
+
+    usecols = header if columns is None else [c for c in header if c in columns
+                                              or c in (symbol_column, time_column)]
+    dtype = {c: t for c, t in MARKET_DATA_SCHEMA.items() if c in usecols}
+    if symbol_column in usecols:
+        dtype[symbol_column] = 'category'
+
+    if isinstance(symbols, str):
+        symbols = [symbols]
+    start = pd.Timestamp(start) if start is not None else None
+    end = pd.Timestamp(end) if end is not None else None
+
+    read_kwargs = {
+        'usecols': usecols,
+        'dtype': dtype,
+        'parse_dates': [time_column] if time_column else None,
+    }
+    empty = pd.read_csv(csv_path, nrows=0, **read_kwargs)
+    if time_column:
+        empty[time_column] = pd.to_datetime(empty[time_column])
+    read_kwargs['chunksize'] = chunksize
+    if index is not None and symbols is not None and len(symbols) == 1:
+        entry = index.get(symbols[0])
+        if entry is None:
+            return empty
+        if entry['contiguous']:
+            # Skip the header and the rows before the symbol without parsing them
+            read_kwargs.update(header=None, names=header, skiprows=entry['row_start'] + 1,
+                               nrows=entry['rows'])
+
+    parts = []
+    with pd.read_csv(csv_path, **read_kwargs) as reader:
+        for chunk in reader:
+            mask = np.ones(len(chunk), dtype=bool)
+            if symbols is not None and symbol_column in chunk:
+                mask &= chunk[symbol_column].isin(symbols).to_numpy()
+            if time_column and start is not None:
+                mask &= (chunk[time_column] >= start).to_numpy()
+            if time_column and end is not None:
+                mask &= (chunk[time_column] <= end).to_numpy()
+            if mask.any():
+                parts.append(chunk[mask] if not mask.all() else chunk)
+
+    if not parts:
+        return empty
+
+    df = pd.concat(parts, ignore_index=True)
+    if symbol_column in df:
+        # Chunks carry their own categories, which concat turns into object
+        column = df[symbol_column]
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            df[symbol_column] = column.cat.remove_unused_categories()
+        else:
+            df[symbol_column] = column.astype('category')
+    return df
+
+
+class SymbolIndex:
+    """
+    Per-symbol summary of a market data file.
+
+    The index holds, for every cryptocoin, the first and last 'Open Time',
+    the row count and the range of data rows it occupies. It is built
+    lazily on first use and rebuilt whenever the file's size or mtime change.
+
+    Usage:
+        from market_data import SymbolIndex
+
+        index = SymbolIndex('best_cluster_similar_price.csv')
+        index.symbols()          # ['XRPJPY', 'LINKJPY', ...]
+        index.get('XRPJPY')      # {'min_time': ..., 'max_time': ..., 'rows': ...}
+    """
+
+    def __init__(self, csv_path, symbol_column='cryptocoin', time_column='Open Time'):
+        self.csv_path = csv_path
+        self.symbol_column = symbol_column
+        self.time_column = time_column
+        self._lock = threading.Lock()
+        self._stamp = None
+        self._entries = {}
+
+    def _file_stamp(self):
+        stat = os.stat(self.csv_path)
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _build(self, chunksize=DEFAULT_CHUNKSIZE):
+        """Stream the symbol and time columns and summarize each symbol"""
+        row_column = '__row'
+        summaries = []
+        offset = 0
+        with pd.read_csv(self.csv_path, usecols=[self.symbol_column, self.time_column],
+                         dtype={self.symbol_column: 'category'}, parse_dates=[self.time_column],
+                         chunksize=chunksize) as reader:
+            for chunk in reader:
+                chunk[row_column] = np.arange(offset, offset + len(chunk))
+                offset += len(chunk)
+                summaries.append(
+                    chunk.groupby(self.symbol_column, observed=True, sort=False)
+                    .agg(min_time=(self.time_column, 'min'), max_time=(self.time_column, 'max'),
+                         rows=(row_column, 'size'), row_start=(row_column, 'min'),
+                         row_stop=(row_column, 'max'))
+                )
+
+        if not summaries:
+            return {}
+        summary = pd.concat(summaries)
+        summary.index = summary.index.astype(str)
+        summary = summary.groupby(level=0, sort=False).agg(
+            {'min_time': 'min', 'max_time': 'max', 'rows': 'sum', 'row_start': 'min', 'row_stop': 'max'}
+        ).sort_values('row_start')
+
+        entries = {}
+        for symbol, row in summary.iterrows():
+            entries[str(symbol)] = {
+                'min_time': row['min_time'],
+                'max_time': row['max_time'],
+                'rows': int(row['rows']),
+                # Data row positions (header excluded); the symbol's rows are
+                # exactly [row_start, row_stop) when contiguous is True
+                'row_start': int(row['row_start']),
+                'row_stop': int(row['row_stop']) + 1,
+                'contiguous': bool(row['row_stop'] - row['row_start'] + 1 == row['rows']),
+            }
+        return entries
+
+    def refresh(self, force=False):
+        """
+        Rebuild the index if the file changed since the last build.
+
+        Args:
+            force (bool): Rebuild even if the file is unchanged
+
+        Returns:
+            dict: Mapping of symbol to its index entry
+        """
+        with self._lock:
+            stamp = self._file_stamp()
+            if force or stamp != self._stamp:
+                self._entries = self._build()
+                self._stamp = stamp
+            return self._entries
+
+    def symbols(self):
+        """Return the symbols in the order they first appear in the file"""
+        return list(self.refresh())
+
+    def get(self, symbol):
+        """
+        Look up one symbol.
+
+        Args:
+            symbol (str): Value of the symbol column, e.g. 'XRPJPY'
+
+        Returns:
+            dict: Index entry, or None if the symbol is not in the file
+        """
+        return self.refresh().get(symbol)
+
+
+class MarketDataStore:
+    """
+    Columnar copy of the market data file, partitioned by symbol (and optionally month).
+
+    convert() streams the CSV once into Arrow IPC or Parquet files laid out as
+    root/cryptocoin=<symbol>/[month=<YYYY-MM>/]part-<i>.<ext>, plus a
+    manifest with the source file's size and mtime and the time range and
+    row count of every partition. Readers memory-map the files, open only
+    the partitions whose time range overlaps the request and push the time
+    predicate down into the scan, so a slice touches only its own bytes.
+
+    The store answers symbols() and get() like SymbolIndex, straight from the
+    manifest.
+
+    Usage:
+        from market_data import MarketDataStore
+
+        store = MarketDataStore.convert('best_cluster_similar_price.csv', 'market_store')
+        store.get('XRPJPY')      # {'min_time': ..., 'max_time': ..., 'rows': ...}
+        df = store.read('XRPJPY', start='2024-01-01', end='2024-02-01')
+
+    Or from the command line:
+        python market_data.py convert best_cluster_similar_price.csv market_store --by-month
+    """
+
+    MANIFEST = 'manifest.json'
+    EXTENSIONS = {'arrow': 'arrow', 'parquet': 'parquet'}
+
+    def __init__(self, root, symbol_column='cryptocoin', time_column='Open Time'):
+        self.root = root
+        self.symbol_column = symbol_column
+        self.time_column = time_column
+        self._lock = threading.Lock()
+        self._manifest = None
+        self._manifest_stamp = None
+
+    @staticmethod
+    def _source_stamp(csv_path):
+        stat = os.stat(csv_path)
+        return {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+
+    @classmethod
+    def convert(cls, csv_path, root, fmt='arrow', by_month=False, symbol_column='cryptocoin',
+                time_column='Open Time', chunksize=DEFAULT_CHUNKSIZE, force=False):
+        """
+        Convert a market data CSV into a partitioned store.
+
+        The CSV is read in typed chunks (see read_market_data) and written
+        batch by batch, so conversion memory is bounded by the chunk size.
+        The new store replaces root with a rename, so readers never see a
+        missing or partial store. If another process has meanwhile published
+        the same conversion (same source file state and options) at root, that
+        store is kept, as it may be in use, and this one is discarded.
+
+        Args:
+            csv_path (str): Source CSV
+            root (str): Output directory
+            fmt (str): 'arrow' (IPC files, best for memory mapping) or 'parquet'
+            by_month (bool): Also partition each symbol by calendar month
+            chunksize (int): CSV rows per batch
+            force (bool): Replace root even if it holds the same conversion
+
+        Returns:
+            MarketDataStore: The new store
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        if fmt not in cls.EXTENSIONS:
+            raise ValueError(f"Unknown format: {fmt} (expected one of {list(cls.EXTENSIONS)})")
+
+        stamp = cls._source_stamp(csv_path)
+        keys = [symbol_column] + (['month'] if by_month else [])
+        header = read_header(csv_path)
+        dtype = {c: t for c, t in MARKET_DATA_SCHEMA.items() if c in header}
+        dtype[symbol_column] = 'str'
+        summaries = []
+
+        def batches():
+            schema = None
+            with pd.read_csv(csv_path, dtype=dtype, parse_dates=[time_column], chunksize=chunksize) as reader:
+                for chunk in reader:
+                    if by_month:
+                        chunk['month'] = chunk[time_column].to_numpy().astype('datetime64[M]').astype(str)
+                    summaries.append(
+                        chunk.groupby(keys, sort=False)[time_column].agg(['min', 'max', 'size'])
+                    )
+                    table = pa.Table.from_pandas(chunk, preserve_index=False)
+                    schema = schema or table.schema.remove_metadata()
+                    yield from table.cast(schema).to_batches()
+
+        batch_iter = batches()
+        first = next(batch_iter, None)
+        if first is None:
+            raise ValueError(f"{csv_path} has no data rows")
+
+        tmp_root = f"{root.rstrip(os.sep)}.{os.getpid()}.tmp"
+        shutil.rmtree(tmp_root, ignore_errors=True)
+        ds.write_dataset(
+            itertools.chain([first], batch_iter),
+            tmp_root,
+            schema=first.schema,
+            format='ipc' if fmt == 'arrow' else 'parquet',
+            partitioning=ds.partitioning(pa.schema([first.schema.field(k) for k in keys]), flavor='hive'),
+            basename_template='part-{i}.' + cls.EXTENSIONS[fmt],
+            max_partitions=1 << 20,
+            max_open_files=1024,
+            max_rows_per_group=1 << 16,
+            preserve_order=True,
+            existing_data_behavior='error',
+        )
+
+        summary = pd.concat(summaries).groupby(level=list(range(len(keys))), sort=False).agg(
+            {'min': 'min', 'max': 'max', 'size': 'sum'}
+        )
+        partitions = []
+        for key, row in summary.iterrows():
+            key = key if isinstance(key, tuple) else (key,)
+            directory = os.path.join(*[f'{name}={value}' for name, value in zip(keys, key)])
+            partitions.append({
+                'symbol': str(key[0]),
+                'month': str(key[1]) if by_month else None,
+                'files': sorted(os.path.join(directory, name)
+                                for name in os.listdir(os.path.join(tmp_root, directory))),
+                'min_time': row['min'].isoformat(),
+                'max_time': row['max'].isoformat(),
+                'rows': int(row['size']),
+            })
+
+        manifest = {
+            'source_path': os.path.abspath(csv_path),
+            'source': stamp,
+            'format': fmt,
+            'by_month': by_month,
+            'symbol_column': symbol_column,
+            'time_column': time_column,
+            'partitions': partitions,
+        }
+        with open(os.path.join(tmp_root, cls.MANIFEST), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        store = cls(root, symbol_column=symbol_column, time_column=time_column)
+        published = store.manifest()
+        same_options = ('source_path', 'source', 'format', 'by_month', 'symbol_column', 'time_column')
+        if (not force and published is not None
+                and all(published.get(name) == manifest[name] for name in same_options)):
+            shutil.rmtree(tmp_root, ignore_errors=True)
+            return store
+
+        # Move the old store aside rather than deleting it before the new one is in place
+        old_root = f"{root.rstrip(os.sep)}.{os.getpid()}.old"
+        if os.path.exists(root):
+            os.replace(root, old_root)
+        os.replace(tmp_root, root)
+        shutil.rmtree(old_root, ignore_errors=True)
+        return store
+
+    def manifest(self):
+        """Return the store's manifest (None if the store does not exist), reloading it if it changed"""
+        path = os.path.join(self.root, self.MANIFEST)
+        with self._lock:
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                self._manifest, self._manifest_stamp = None, None
+                return None
+            stamp = (stat.st_size, stat.st_mtime_ns)
+            if stamp != self._manifest_stamp:
+                with open(path) as f:
+                    self._manifest = json.load(f)
+                self._manifest_stamp = stamp
+            return self._manifest
+
+    def is_current(self, csv_path):
+        """Check that the store exists and was converted from csv_path as it is now"""
+        manifest = self.manifest()
+        if manifest is None or not os.path.exists(csv_path):
+            return False
+        return (manifest['source_path'] == os.path.abspath(csv_path)
+                and manifest['source'] == self._source_stamp(csv_path))
+
+    def _partitions(self, symbol):
+        return [p for p in self.manifest()['partitions'] if p['symbol'] == symbol]
+
+    def symbols(self):
+        """Return the symbols in the order they first appear in the source file"""
+        return list(dict.fromkeys(p['symbol'] for p in self.manifest()['partitions']))
+
+    def get(self, symbol):
+        """
+        Look up one symbol (same keys as a SymbolIndex entry's time range and row count).
+
+        Returns:
+            dict: min_time, max_time and rows, or None if the symbol is not in the store
+        """
+        partitions = self._partitions(symbol)
+        if not partitions:
+            return None
+        return {
+            'min_time': min(pd.Timestamp(p['min_time']) for p in partitions),
+            'max_time': max(pd.Timestamp(p['max_time']) for p in partitions),
+            'rows': sum(p['rows'] for p in partitions),
+        }
+
+    def read(self, symbols=None, start=None, end=None, columns=None):
+        """
+        Read rows for some symbols and an inclusive time window.
+
+        Only partitions overlapping the window are opened; they are memory
+        mapped and the time filter is applied inside the scan.
+
+        Args:
+            symbols: One symbol or a list of symbols (default: all)
+            start: Optional inclusive lower bound on the time column
+            end: Optional inclusive upper bound on the time column
+            columns (list): Columns to return (default: all); the symbol and
+                time columns are always included
+
+        Returns:
+            pd.DataFrame: Matching rows, symbols in store order and rows in
+                source order within a symbol, with a categorical symbol column
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        from pyarrow import fs
+
+        manifest = self.manifest()
+        if manifest is None:
+            raise FileNotFoundError(f"No market data store at {self.root}")
+        if isinstance(symbols, str):
+            symbols = [symbols]
+        wanted = set(self.symbols() if symbols is None else symbols)
+        start = pd.Timestamp(start) if start is not None else None
+        end = pd.Timestamp(end) if end is not None else None
+
+        selected = [
+            p for p in manifest['partitions']
+            if p['symbol'] in wanted
+            and (start is None or pd.Timestamp(p['max_time']) >= start)
+            and (end is None or pd.Timestamp(p['min_time']) <= end)
+        ]
+
+        time_field = ds.field(self.time_column)
+        condition = None
+        if start is not None:
+            condition = time_field >= pa.scalar(start.to_datetime64())
+        if end is not None:
+            upper = time_field <= pa.scalar(end.to_datetime64())
+            condition = upper if condition is None else condition & upper
+
+        filesystem = fs.LocalFileSystem(use_mmap=True)
+        file_format = 'ipc' if manifest['format'] == 'arrow' else 'parquet'
+        frames = []
+        # With nothing to read, scan zero rows of any partition to get the columns
+        for partition in selected or manifest['partitions'][:1]:
+            dataset = ds.dataset([os.path.join(self.root, f) for f in partition['files']],
+                                 format=file_format, filesystem=filesystem)
+            names = [c for c in dataset.schema.names
+                     if columns is None or c in columns or c == self.time_column]
+            table = dataset.to_table(columns=names, filter=condition)
+            if not selected:
+                table = table.slice(0, 0)
+            frame = table.to_pandas()
+            frame[self.symbol_column] = partition['symbol']
+            frames.append(frame)
+
+        df = pd.concat(frames, ignore_index=True)
+        df[self.symbol_column] = df[self.symbol_column].astype(
+            pd.CategoricalDtype([s for s in self.symbols() if s in wanted])
+        )
+        return df
+
+
+if __name__ == '__main__':
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Market data tools')
+    commands = parser.add_subparsers(dest='command', required=True)
+    convert = commands.add_parser('convert', help='Convert the market data CSV into a partitioned store')
+    convert.add_argument('csv_path')
+    convert.add_argument('root')
+    convert.add_argument('--format', choices=sorted(MarketDataStore.EXTENSIONS), default='arrow')
+    convert.add_argument('--by-month', action='store_true', help='Also partition each symbol by month')
+    convert.add_argument('--chunksize', type=int, default=DEFAULT_CHUNKSIZE)
+    convert.add_argument('--force', action='store_true', help='Replace an identical existing conversion')
+    args = parser.parse_args()
+
+    store = MarketDataStore.convert(args.csv_path, args.root, fmt=args.format,
+                                    by_month=args.by_month, chunksize=args.chunksize, force=args.force)
+    partitions = store.manifest()['partitions']
+    print(f"✓ Wrote {len(store.symbols())} symbols in {len(partitions)} partitions to {args.root}")
@@ -2,22 +2,41 @@ import pandas as pd
 import numpy as np
 import json
 from datetime import datetime
+from metrics import compute_metrics, format_metrics
+
+SECONDS_PER_YEAR = 365 * 24 * 3600
+
+
+def infer_periods_per_year(timestamps, default=365):
+    """Number of bars per year implied by the median spacing of the timestamps
+    (datetime strings, datetimes or int64 nanoseconds)"""
+    if timestamps is None or len(timestamps) < 2:
+        return default
+    ns = pd.to_datetime(pd.Series(timestamps)).to_numpy(dtype='datetime64[ns]').astype(np.int64)
+    interval = np.median(np.diff(ns)) / 1e9
+    return SECONDS_PER_YEAR / interval if interval > 0 else default
+
 
 class MetricsRecalculator:
     """Recalculate trading metrics correctly from saved data"""
     
-    def __init__(self, csv_path=None, json_path=None):
+    def __init__(self, csv_path=None, json_path=None, periods_per_year=None):
         """
         Load data from either CSV or JSON file
         csv_path: Path to CSV with columns: timestamp, portfolio_value, action, reward, positions
         json_path: Path to JSON with analyzer data
+        periods_per_year: Annualization factor; derived from the bar interval of the
+                          timestamps when omitted (365 if there are no timestamps)
         """
+        timestamps = None
         if csv_path:
             self.df = pd.read_csv(csv_path)
             self.portfolio_values = self.df['portfolio_value'].values
             self.actions = self.df['action'].values
             self.rewards = self.df['reward'].values
             self.initial_balance = self.portfolio_values[0]
+            if 'timestamp' in self.df.columns:
+                timestamps = self.df['timestamp']
         elif json_path:
             with open(json_path, 'r') as f:
                 data = json.load(f)
@@ -25,122 +44,121 @@ class MetricsRecalculator:
             self.actions = np.array(data['actions'])
             self.rewards = np.array(data['rewards'])
             self.initial_balance = data.get('initial_balance', 10000)
+            timestamps = data.get('timestamps')
         else:
             raise ValueError("Provide either csv_path or json_path")
+        
+        self.periods_per_year = periods_per_year or self.infer_periods_per_year(timestamps)
+    
+    infer_periods_per_year = staticmethod(infer_periods_per_year)
+    
+    def trade_boundaries(self):
+        """
+        Entry and exit bar indices of completed trades.
+        
+        Action 1 enters when flat and action 2 exits when in a position;
+        repeated signals in the same state are ignored. Keeping only the
+        buy/sell events whose code differs from the previous event (starting
+        from flat) yields exactly the alternating entry/exit sequence.
+        """
+        actions = np.asarray(self.actions)
+        events = np.flatnonzero((actions == 1) | (actions == 2))
+        codes = actions[events]
+        state_change = codes != np.concatenate(([2], codes[:-1]))
+        events = events[state_change]
+        
+        entries = events[0::2]
+        exits = events[1::2]
+        return entries[:len(exits)], exits, entries[len(exits):]
     
     def identify_actual_trades(self):
         """Identify actual trades (when position changes)"""
-        trades = []
-        in_position = False
-        entry_price = 0
-        entry_idx = 0
+        entries, exits, _ = self.trade_boundaries()
+        if len(exits) == 0:
+            return pd.DataFrame()
         
-        for i in range(len(self.actions)):
-            action = self.actions[i]
-            portfolio_value = self.portfolio_values[i]
-            
-            # Action 0 = hold, 1 = buy, 2 = sell (adjust based on your action space)
-            if action == 1 and not in_position:  # Buy/Enter
-                in_position = True
-                entry_price = portfolio_value
-                entry_idx = i
-            elif action == 2 and in_position:  # Sell/Exit
-                exit_price = portfolio_value
-                pnl = exit_price - entry_price
-                pnl_pct = (pnl / entry_price) * 100
-                
-                trades.append({
-                    'entry_idx': entry_idx,
-                    'exit_idx': i,
-                    'entry_price': entry_price,
-                    'exit_price': exit_price,
-                    'pnl': pnl,
-                    'pnl_pct': pnl_pct,
-                    'win': pnl > 0
-                })
-                in_position = False
+        portfolio = np.asarray(self.portfolio_values)
+        entry_price = portfolio[entries]
+        exit_price = portfolio[exits]
+        pnl = exit_price - entry_price
         
-        return pd.DataFrame(trades) if trades else pd.DataFrame()
+        return pd.DataFrame({
+            'entry_idx': entries,
+            'exit_idx': exits,
+            'entry_price': entry_price,
+            'exit_price': exit_price,
+            'pnl': pnl,
+            'pnl_pct': (pnl / entry_price) * 100,
+            'win': pnl > 0
+        })
     
-    def calculate_correct_metrics(self):
-        """Calculate metrics based on actual trades"""
-        portfolio_array = np.array(self.portfolio_values)
-        final_value = portfolio_array[-1]
-        
-        # Overall portfolio metrics
-        total_return = ((final_value - self.initial_balance) / self.initial_balance) * 100
+    def exposure(self):
+        """Fraction of bars spent in a position (an unclosed final entry counts to the end)"""
+        entries, exits, open_entry = self.trade_boundaries()
+        delta = np.zeros(len(self.actions) + 1, dtype=np.int64)
+        np.add.at(delta, entries, 1)
+        np.add.at(delta, exits, -1)
+        np.add.at(delta, open_entry, 1)
+        in_position = np.cumsum(delta[:-1]) > 0
+        return in_position.mean() if len(in_position) else 0.0
+    
+    def rolling_sharpe(self, window=100):
+        """
+        Annualized Sharpe ratio over a sliding window of step returns.
         
-        # Calculate returns (step-by-step for Sharpe/Sortino)
+        Returns:
+            np.ndarray: One value per return, NaN for the first window - 1
+        """
+        portfolio_array = np.asarray(self.portfolio_values, dtype=np.float64)
         returns = np.diff(portfolio_array) / portfolio_array[:-1]
-        mean_return = np.mean(returns)
-        std_return = np.std(returns)
-        
-        # Sharpe Ratio (annualized, assuming 365 periods per year)
-        sharpe_ratio = (mean_return / std_return) * np.sqrt(365) if std_return > 0 else 0
-        
-        # Maximum Drawdown
-        cumulative = portfolio_array / self.initial_balance
-        running_max = np.maximum.accumulate(cumulative)
-        drawdown = (cumulative - running_max) / running_max
-        max_drawdown_pct = np.min(drawdown) * 100
-        
-        # Volatility
-        volatility = std_return * np.sqrt(365) * 100
+        result = np.full(len(returns), np.nan)
+        if len(returns) < window:
+            return result
         
-        # Trade-based metrics
+        csum = np.concatenate(([0.0], np.cumsum(returns)))
+        csum_sq = np.concatenate(([0.0], np.cumsum(returns ** 2)))
+        mean = (csum[window:] - csum[:-window]) / window
+        var = np.maximum((csum_sq[window:] - csum_sq[:-window]) / window - mean ** 2, 0)
+        std = np.sqrt(var)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result[window - 1:] = np.where(std > 0, mean / std * np.sqrt(self.periods_per_year), 0.0)
+        return result
+    
+    def performance_metrics(self):
+        """Numeric metrics (metrics.PerformanceMetrics) for the whole run"""
+        portfolio_array = np.asarray(self.portfolio_values, dtype=np.float64)
         trades_df = self.identify_actual_trades()
+        # Saved curves either start at the initial balance or right after the first step
+        initial_balance = None if self.initial_balance == portfolio_array[0] else self.initial_balance
+        return compute_metrics(
+            portfolio_array,
+            initial_balance=initial_balance,
+            trade_pnl=trades_df['pnl'].values if not trades_df.empty else (),
+            trade_pnl_pct=trades_df['pnl_pct'].values if not trades_df.empty else (),
+            total_reward=float(np.sum(self.rewards)),
+            periods_per_year=self.periods_per_year
+        ), trades_df
+    
+    def calculate_correct_metrics(self, rolling_window=100):
+        """Calculate metrics based on actual trades"""
+        performance, trades_df = self.performance_metrics()
         
-        if not trades_df.empty:
-            num_trades = len(trades_df)
-            winning_trades = trades_df[trades_df['win'] == True]
-            losing_trades = trades_df[trades_df['win'] == False]
-            
-            num_wins = len(winning_trades)
-            num_losses = len(losing_trades)
-            win_rate = (num_wins / num_trades * 100) if num_trades > 0 else 0
-            
-            avg_win = winning_trades['pnl_pct'].mean() if num_wins > 0 else 0
-            avg_loss = losing_trades['pnl_pct'].mean() if num_losses > 0 else 0
-            
-            total_win_amount = winning_trades['pnl'].sum() if num_wins > 0 else 0
-            total_loss_amount = abs(losing_trades['pnl'].sum()) if num_losses > 0 else 0
-            profit_factor = total_win_amount / total_loss_amount if total_loss_amount > 0 else 0
-            
-            # Expectancy
-            expectancy = (win_rate/100 * avg_win) - ((1 - win_rate/100) * abs(avg_loss))
-        else:
-            num_trades = 0
-            num_wins = 0
-            num_losses = 0
-            win_rate = 0
-            avg_win = 0
-            avg_loss = 0
-            profit_factor = 0
-            expectancy = 0
-        
-        # Total reward
-        total_reward = np.sum(self.rewards)
-        
-        metrics = {
-            'Initial Balance': f'${self.initial_balance:,.2f}',
-            'Final Balance': f'${final_value:,.2f}',
-            'Total Return': f'${final_value - self.initial_balance:,.2f}',
-            'Total Return (%)': f'{total_return:.2f}%',
-            'Sharpe Ratio': f'{sharpe_ratio:.3f}',
-            'Max Drawdown': f'{max_drawdown_pct:.2f}%',
-            'Volatility (Annual)': f'{volatility:.2f}%',
-            '---': '---',
-            'Total Trades': f'{num_trades}',
-            'Winning Trades': f'{num_wins}',
-            'Losing Trades': f'{num_losses}',
-            'Win Rate': f'{win_rate:.2f}%',
-            'Avg Win': f'{avg_win:.2f}%',
-            'Avg Loss': f'{avg_loss:.2f}%',
-            'Profit Factor': f'{profit_factor:.3f}',
-            'Expectancy': f'{expectancy:.2f}%',
-            'Total Reward': f'{total_reward:,.2f}',
-            'Total Steps': f'{len(self.portfolio_values):,}'
-        }
+        metrics = format_metrics(performance, [
+            'initial_balance', 'final_balance', 'total_return', 'total_return_pct',
+            'sharpe_ratio', 'sortino_ratio', 'calmar_ratio', 'max_drawdown_pct',
+            'max_drawdown_duration', 'volatility_pct'
+        ])
+        rolling = self.rolling_sharpe(rolling_window)
+        rolling = rolling[~np.isnan(rolling)]
+        metrics[f'Rolling Sharpe ({rolling_window}) Min/Max'] = (
+            f'{rolling.min():.3f} / {rolling.max():.3f}' if len(rolling) else 'n/a'
+        )
+        metrics['Exposure'] = f'{self.exposure() * 100:.2f}%'
+        metrics['---'] = '---'
+        metrics.update(format_metrics(performance, [
+            'num_trades', 'num_wins', 'num_losses', 'win_rate', 'avg_win_pct', 'avg_loss_pct',
+            'profit_factor', 'expectancy_pct', 'total_reward', 'num_steps'
+        ]))
         
         return metrics, trades_df
 
@@ -0,0 +1,298 @@
+from dataclasses import asdict, dataclass, fields
+
+import numpy as np
+
+
+@dataclass
+class PerformanceMetrics:
+    """Numeric backtest metrics for one run (ratios as fractions, money in account currency)"""
+
+    initial_balance: float
+    final_balance: float
+    total_return: float
+    total_return_pct: float
+    sharpe_ratio: float
+    sortino_ratio: float
+    calmar_ratio: float
+    max_drawdown_pct: float
+    max_drawdown_duration: int
+    volatility_pct: float
+    num_steps: int
+    num_trades: int
+    num_wins: int
+    num_losses: int
+    win_rate: float
+    total_pnl: float
+    avg_win: float
+    avg_loss: float
+    avg_win_pct: float
+    avg_loss_pct: float
+    profit_factor: float
+    expectancy: float
+    expectancy_pct: float
+    total_reward: float
+
+    def to_dict(self):
+        return asdict(self)
+
+
+INT_FIELDS = {f.name for f in fields(PerformanceMetrics) if f.type in (int, 'int')}
+
+# Label and format used by format_metrics for each field
+LABELS = {
+    'initial_balance': ('Initial Balance', '${:,.2f}'),
+    'final_balance': ('Final Balance', '${:,.2f}'),
+    'total_return': ('Total Return', '${:,.2f}'),
+    'total_return_pct': ('Total Return (%)', '{:.2f}%'),
+    'sharpe_ratio': ('Sharpe Ratio', '{:.3f}'),
+    'sortino_ratio': ('Sortino Ratio', '{:.3f}'),
+    'calmar_ratio': ('Calmar Ratio', '{:.3f}'),
+    'max_drawdown_pct': ('Max Drawdown', '{:.2f}%'),
+    'max_drawdown_duration': ('Max Drawdown Duration', '{:,} bars'),
+    'volatility_pct': ('Volatility (Annual)', '{:.2f}%'),
+    'num_steps': ('Total Steps', '{:,}'),
+    'num_trades': ('Total Trades', '{:,}'),
+    'num_wins': ('Winning Trades', '{:,}'),
+    'num_losses': ('Losing Trades', '{:,}'),
+    'win_rate': ('Win Rate', '{:.2f}%'),
+    'total_pnl': ('Total PnL', '${:,.2f}'),
+    'avg_win': ('Avg Win ($)', '${:.2f}'),
+    'avg_loss': ('Avg Loss ($)', '${:.2f}'),
+    'avg_win_pct': ('Avg Win (%)', '{:.2f}%'),
+    'avg_loss_pct': ('Avg Loss (%)', '{:.2f}%'),
+    'profit_factor': ('Profit Factor', '{:.3f}'),
+    'expectancy': ('Expectancy ($)', '${:.2f}'),
+    'expectancy_pct': ('Expectancy (%)', '{:.2f}%'),
+    'total_reward': ('Total Reward', '{:,.2f}'),
+}
+
+
+def pad_rows(rows, fill=np.nan):
+    """
+    Stack 1-D sequences of different lengths into a 2-D float64 array.
+
+    Rows shorter than the longest are padded at the end with fill (NaN), which
+    every function in this module treats as "no data".
+    """
+    rows = [np.asarray(row, dtype=np.float64) for row in rows]
+    width = max((len(row) for row in rows), default=0)
+    out = np.full((len(rows), width), fill)
+    for i, row in enumerate(rows):
+        out[i, :len(row)] = row
+    return out
+
+
+def _as_batch(values):
+    values = np.asarray(values, dtype=np.float64)
+    return values[np.newaxis, :] if values.ndim == 1 else values
+
+
+def equity_metrics(equity, initial_balance=None, periods_per_year=365):
+    """
+    Vectorized equity-curve metrics.
+
+    Args:
+        equity: Portfolio values after each step, 1-D for one run or 2-D
+            (runs, steps) with NaN padding after each run's last step
+        initial_balance: Scalar or per-run starting value. When given it is
+            prepended to the curve, so the first return is measured against it;
+            when None the first equity value is the starting point
+        periods_per_year (float): Annualization factor for Sharpe, Sortino,
+            volatility and Calmar
+
+    Returns:
+        dict: Field name -> (runs,) array
+    """
+    equity = _as_batch(equity)
+    n_runs = equity.shape[0]
+    if initial_balance is None:
+        curve = equity
+        initial = curve[:, 0] if curve.shape[1] else np.full(n_runs, np.nan)
+    else:
+        initial = np.broadcast_to(np.asarray(initial_balance, dtype=np.float64), (n_runs,))
+        curve = np.concatenate([initial[:, np.newaxis], equity], axis=1)
+
+    valid = ~np.isnan(curve)
+    length = valid.sum(axis=1)
+    final = np.where(length > 0, curve[np.arange(n_runs), np.maximum(length - 1, 0)], initial)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = curve[:, 1:] / curve[:, :-1] - 1
+        returns[~np.isfinite(returns)] = np.nan
+        n_returns = (~np.isnan(returns)).sum(axis=1)
+        has_returns = n_returns > 0
+
+        mean = np.where(has_returns, np.nansum(returns, axis=1) / np.maximum(n_returns, 1), 0.0)
+        deviation = np.nan_to_num(returns - mean[:, np.newaxis])
+        std = np.sqrt((deviation ** 2).sum(axis=1) / np.maximum(n_returns, 1))
+        downside = np.sqrt((np.nan_to_num(np.minimum(returns, 0)) ** 2).sum(axis=1) / np.maximum(n_returns, 1))
+
+        annualization = np.sqrt(periods_per_year)
+        sharpe = np.where((n_returns > 1) & (std > 0), mean / std * annualization, 0.0)
+        sortino = np.where(downside > 0, mean / downside * annualization, 0.0)
+
+        # NaN padding never becomes a new peak because fmax ignores NaN
+        running_max = np.fmax.accumulate(curve, axis=1) if curve.shape[1] else curve
+        drawdown = (curve - running_max) / running_max
+        max_drawdown = np.where(length > 0, np.nan_to_num(np.nanmin(np.where(valid, drawdown, 0.0), axis=1)), 0.0)
+
+        bars = np.arange(curve.shape[1])
+        at_peak = valid & (curve >= running_max)
+        last_peak = np.maximum.accumulate(np.where(at_peak, bars, 0), axis=1) if curve.shape[1] else at_peak
+        duration = np.where(valid, bars - last_peak, 0).max(axis=1, initial=0)
+
+        years = n_returns / periods_per_year
+        annual_return = np.where(years > 0, (final / initial) ** (1 / np.where(years > 0, years, 1)) - 1, 0.0)
+        calmar = np.where(max_drawdown < 0, annual_return / np.abs(max_drawdown), 0.0)
+
+        total_return = final - initial
+        total_return_pct = np.where(initial != 0, total_return / initial * 100, 0.0)
+
+    return {
+        'initial_balance': initial.astype(np.float64),
+        'final_balance': final,
+        'total_return': total_return,
+        'total_return_pct': total_return_pct,
+        'sharpe_ratio': sharpe,
+        'sortino_ratio': sortino,
+        'calmar_ratio': calmar,
+        'max_drawdown_pct': max_drawdown * 100,
+        'max_drawdown_duration': duration.astype(np.int64),
+        'volatility_pct': std * annualization * 100,
+        'num_steps': np.maximum(length - (initial_balance is not None), 0).astype(np.int64),
+    }
+
+
+def trade_metrics(pnl, pnl_pct=None):
+    """
+    Vectorized closed-trade metrics.
+
+    A trade wins when pnl > 0 and loses when pnl < 0; breakeven trades count
+    towards num_trades only. Expectancy is the mean PnL per trade,
+    win_rate * avg_win + loss_rate * avg_loss with avg_loss negative, so both
+    callers now report the same sign.
+
+    Args:
+        pnl: Trade PnL in account currency, 1-D or NaN-padded 2-D (runs, trades)
+        pnl_pct: Optional trade PnL in percent, same shape as pnl
+
+    Returns:
+        dict: Field name -> (runs,) array
+    """
+    pnl = _as_batch(pnl)
+    pct = _as_batch(pnl_pct) if pnl_pct is not None else np.full(pnl.shape, np.nan)
+
+    traded = ~np.isnan(pnl)
+    wins = pnl > 0
+    losses = pnl < 0
+    num_trades = traded.sum(axis=1)
+    num_wins = wins.sum(axis=1)
+    num_losses = losses.sum(axis=1)
+
+    total_wins = np.where(wins, pnl, 0.0).sum(axis=1)
+    total_losses = np.where(losses, pnl, 0.0).sum(axis=1)
+    total_pnl = np.where(traded, pnl, 0.0).sum(axis=1)
+
+    def _mean(values, mask, count):
+        return np.where(count > 0, np.where(mask, values, 0.0).sum(axis=1) / np.maximum(count, 1), 0.0)
+
+    pct_traded = traded & ~np.isnan(pct)
+    return {
+        'num_trades': num_trades.astype(np.int64),
+        'num_wins': num_wins.astype(np.int64),
+        'num_losses': num_losses.astype(np.int64),
+        'win_rate': np.where(num_trades > 0, num_wins / np.maximum(num_trades, 1) * 100, 0.0),
+        'total_pnl': total_pnl,
+        'avg_win': _mean(pnl, wins, num_wins),
+        'avg_loss': _mean(pnl, losses, num_losses),
+        'avg_win_pct': _mean(pct, wins & pct_traded, (wins & pct_traded).sum(axis=1)),
+        'avg_loss_pct': _mean(pct, losses & pct_traded, (losses & pct_traded).sum(axis=1)),
+        'profit_factor': np.where(total_losses < 0, total_wins / np.where(total_losses < 0, -total_losses, 1), 0.0),
+        'expectancy': _mean(pnl, traded, num_trades),
+        'expectancy_pct': _mean(pct, pct_traded, pct_traded.sum(axis=1)),
+    }
+
+
+def compute_batch(equity, initial_balance=None, trade_pnl=None, trade_pnl_pct=None,
+                  total_reward=None, periods_per_year=365):
+    """
+    Metrics for many runs at once (e.g. the rows of a parameter sweep).
+
+    Args:
+        equity: 2-D (runs, steps) portfolio values, NaN-padded (see pad_rows)
+        initial_balance: Scalar or per-run starting value (see equity_metrics)
+        trade_pnl: Optional 2-D (runs, trades) trade PnL, NaN-padded
+        trade_pnl_pct: Optional 2-D trade PnL in percent
+        total_reward: Optional per-run total reward
+        periods_per_year (float): Annualization factor
+
+    Returns:
+        dict: Every PerformanceMetrics field -> (runs,) array
+    """
+    result = equity_metrics(equity, initial_balance, periods_per_year)
+    n_runs = len(result['final_balance'])
+    if trade_pnl is None:
+        trade_pnl = np.empty((n_runs, 0))
+    result.update(trade_metrics(trade_pnl, trade_pnl_pct))
+    reward = np.zeros(n_runs) if total_reward is None else np.asarray(total_reward, dtype=np.float64)
+    result['total_reward'] = np.broadcast_to(reward, (n_runs,))
+    return result
+
+
+def compute_metrics(equity, initial_balance=None, trade_pnl=(), trade_pnl_pct=None,
+                    total_reward=0.0, periods_per_year=365):
+    """
+    Metrics for one run.
+
+    Args:
+        equity: 1-D portfolio values after each step
+        initial_balance: Starting value, or None to start from equity[0]
+        trade_pnl: Closed-trade PnL in account currency
+        trade_pnl_pct: Optional closed-trade PnL in percent
+        total_reward (float): Sum of environment rewards
+        periods_per_year (float): Annualization factor
+
+    Returns:
+        PerformanceMetrics
+    """
+    batch = compute_batch(
+        np.asarray(equity, dtype=np.float64)[np.newaxis, :],
+        initial_balance=initial_balance,
+        trade_pnl=np.asarray(trade_pnl, dtype=np.float64).reshape(1, -1),
+        trade_pnl_pct=None if trade_pnl_pct is None else np.asarray(trade_pnl_pct, dtype=np.float64).reshape(1, -1),
+        total_reward=[total_reward],
+        periods_per_year=periods_per_year
+    )
+    return PerformanceMetrics(**{
+        name: int(values[0]) if name in INT_FIELDS else float(values[0])
+        for name, values in batch.items()
+    })
+
+
+def batch_rows(batch):
+    """Split a compute_batch result into one plain dict of Python numbers per run"""
+    names = list(batch)
+    n_runs = len(batch[names[0]]) if names else 0
+    return [
+        {name: int(batch[name][i]) if name in INT_FIELDS else float(batch[name][i]) for name in names}
+        for i in range(n_runs)
+    ]
+
+
+def format_metrics(metrics, field_names=None):
+    """
+    Format metrics as display strings, e.g. {'Sharpe Ratio': '1.234', ...}
+
+    Args:
+        metrics: PerformanceMetrics or a dict of field -> number
+        field_names (list): Fields to include, in order (default: all)
+
+    Returns:
+        dict: Label -> formatted string
+    """
+    values = metrics.to_dict() if isinstance(metrics, PerformanceMetrics) else metrics
+    formatted = {}
+    for name in field_names or LABELS:
+        label, fmt = LABELS[name]
+        formatted[label] = fmt.format(values[name])
+    return formatted
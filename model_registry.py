@@ -0,0 +1,141 @@
+import hashlib
+import os
+import threading
+from datetime import datetime
+
+import torch
+from stable_baselines3 import PPO
+
+from policy_backends import EXTENSIONS, check_backend, load_backend
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded PPO models.
+
+    Each registered model file is loaded once and shared by every request.
+    Before a cached model is handed out, the file's size and mtime are
+    checked, and if they changed the file is re-hashed; the model is only
+    reloaded when the content hash differs (hot reload). Several named
+    versions can be registered side by side.
+
+    Models are loaded on CPU for inference only, so one instance can be used
+    by concurrent request threads.
+
+    get(name, backend=...) serves the same policy through a faster
+    inference backend (policy_backends: 'onnx', 'torchscript' or 'numpy').
+    ONNX / TorchScript exports are written to export_dir, named by the model
+    file's content hash, and rebuilt along with the model on hot reload.
+
+    Usage:
+        from model_registry import ModelRegistry
+
+        registry = ModelRegistry(torch_threads=2)
+        registry.register('enhanced', 'ppo_trading_bot_enhanced.zip')
+        model = registry.get('enhanced')
+        fast = registry.get('enhanced', backend='onnx')
+    """
+
+    def __init__(self, torch_threads=None, device='cpu', export_dir='model_exports'):
+        self.device = device
+        self.export_dir = export_dir
+        self._models = {}
+        self._lock = threading.Lock()
+        if torch_threads:
+            torch.set_num_threads(int(torch_threads))
+
+    @staticmethod
+    def _file_sha1(path):
+        sha = hashlib.sha1()
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                sha.update(block)
+        return sha.hexdigest()
+
+    def register(self, name, path):
+        """
+        Register a model file under a name. The file is loaded on first use.
+
+        Args:
+            name (str): Name used to look the model up, e.g. 'enhanced'
+            path (str): Path to a stable-baselines3 PPO .zip file
+        """
+        with self._lock:
+            self._models[name] = {
+                'path': path,
+                'lock': threading.Lock(),
+                'model': None,
+                'backends': {},
+                'stamp': None,
+                'sha1': None,
+                'loaded_at': None,
+            }
+
+    def get(self, name, backend='sb3'):
+        """
+        Return the loaded model, loading or hot reloading it if needed.
+
+        Args:
+            name (str): Registered model name
+            backend (str): 'sb3' for the PPO model itself, or 'onnx',
+                'torchscript' or 'numpy' (see policy_backends); ValueError if
+                it is unknown or not installed
+
+        Returns:
+            PPO or policy_backends.PolicyBackend: Model ready for predict()
+        """
+        check_backend(backend)
+        entry = self._models.get(name)
+        if entry is None:
+            raise KeyError(f"Unknown model: {name}")
+
+        with entry['lock']:
+            stat = os.stat(entry['path'])
+            stamp = (stat.st_size, stat.st_mtime_ns)
+            if entry['model'] is None or stamp != entry['stamp']:
+                sha1 = self._file_sha1(entry['path'])
+                if entry['model'] is None or sha1 != entry['sha1']:
+                    model = PPO.load(entry['path'], device=self.device)
+                    model.policy.set_training_mode(False)
+                    entry['model'] = model
+                    entry['backends'] = {}
+                    entry['sha1'] = sha1
+                    entry['loaded_at'] = datetime.now().isoformat(timespec='seconds')
+                    print(f"✓ Loaded model '{name}' from {entry['path']} ({sha1[:8]})")
+                entry['stamp'] = stamp
+            if backend == 'sb3':
+                return entry['model']
+            if backend not in entry['backends']:
+                export_path = None
+                if backend in EXTENSIONS:
+                    os.makedirs(self.export_dir, exist_ok=True)
+                    export_path = os.path.join(self.export_dir, f"{name}-{entry['sha1'][:12]}{EXTENSIONS[backend]}")
+                entry['backends'][backend] = load_backend(backend, entry['model'], export_path)
+            return entry['backends'][backend]
+
+    def path(self, name):
+        """Return the file path registered for a model name"""
+        return self._models[name]['path']
+
+    def names(self):
+        """Return the registered model names"""
+        return list(self._models)
+
+    def describe(self):
+        """
+        Summarize the registered models.
+
+        Returns:
+            list: One dict per model with its path, load state and content hash
+        """
+        return [
+            {
+                'name': name,
+                'path': entry['path'],
+                'loaded': entry['model'] is not None,
+                'backends': sorted(entry['backends']),
+                'sha1': entry['sha1'],
+                'loaded_at': entry['loaded_at'],
+            }
+            for name, entry in self._models.items()
+        ]
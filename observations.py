@@ -0,0 +1,85 @@
+import numpy as np
+
+from records import to_ns
+
+
+class ObservationMatrix:
+    """
+    Policy observations of one symbol, materialized once.
+
+    observations is a C-contiguous (T, obs_dim) float32 matrix: the feature
+    columns in training order (normalized if requested), followed by a
+    position-flag column left at 0 for the environment to fill in. Rows are
+    the bars without any missing indicator value, the same rows a backtest
+    gets from FeatureStore.load(...).dropna(). timestamps (int64 ns) and
+    prices (close, float64) are aligned with the rows.
+
+    Slicing a time window returns views, so windows of a memory-mapped
+    matrix cost no copy.
+
+    Usage:
+        matrix = build_observations(df, columns)
+        window = matrix.window('2024-01-01', '2024-02-01')
+        env = LocalTradingEnv.from_observations(window)
+    """
+
+    def __init__(self, observations, timestamps, prices, columns):
+        self.observations = observations
+        self.timestamps = timestamps
+        self.prices = prices
+        self.columns = list(columns)
+
+    def __len__(self):
+        return len(self.observations)
+
+    @property
+    def features(self):
+        """(T, n_features) view without the position-flag column"""
+        return self.observations[:, :-1]
+
+    def window(self, start=None, end=None):
+        """Rows with start <= time <= end (inclusive, like FeatureStore.load), as views"""
+        lo = 0 if start is None else int(np.searchsorted(self.timestamps, to_ns(start), 'left'))
+        hi = len(self) if end is None else int(np.searchsorted(self.timestamps, to_ns(end), 'right'))
+        return ObservationMatrix(self.observations[lo:hi], self.timestamps[lo:hi], self.prices[lo:hi], self.columns)
+
+
+def normalization_key(normalization):
+    """JSON-friendly form of a normalization spec, for cache keys"""
+    if normalization is None:
+        return None
+    return {
+        'mean': np.asarray(normalization['mean'], dtype=np.float64).tolist(),
+        'std': np.asarray(normalization['std'], dtype=np.float64).tolist(),
+        'clip': normalization.get('clip'),
+    }
+
+
+def build_observations(df, columns, normalization=None, time_column='Open Time', price_column='Close'):
+    """
+    Materialize the observation matrix of an indicator DataFrame.
+
+    Args:
+        df (pd.DataFrame): Indicator rows of one symbol, in time order
+        columns (list): Feature columns, in the order the policy was trained on
+        normalization (dict): Optional {'mean', 'std', 'clip'} applied per feature
+            column as clip((x - mean) / std, -clip, clip); None keeps raw values,
+            which is what the shipped PPO models expect
+        time_column (str): Bar time column
+        price_column (str): Execution price column
+
+    Returns:
+        ObservationMatrix
+    """
+    df = df.dropna()
+    features = df[list(columns)].to_numpy(dtype=np.float64)
+    if normalization is not None:
+        features = (features - np.asarray(normalization['mean'])) / np.asarray(normalization['std'])
+        if normalization.get('clip') is not None:
+            np.clip(features, -normalization['clip'], normalization['clip'], out=features)
+
+    observations = np.zeros((len(df), len(columns) + 1), dtype=np.float32)
+    observations[:, :-1] = features
+    timestamps = df[time_column].to_numpy(dtype='datetime64[ns]').view(np.int64)
+    prices = df[price_column].to_numpy(dtype=np.float64)
+    return ObservationMatrix(observations, np.ascontiguousarray(timestamps), np.ascontiguousarray(prices), columns)
@@ -0,0 +1,505 @@
+import math
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+from indicators import TechnicalIndicators
+
+NAN = float('nan')
+
+# vectorbt's threshold for recomputing a rolling variance from scratch
+_INV_COND_TOL = 2.220446049250313e-13
+
+
+def _div(a, b):
+    """a / b with NumPy semantics (inf or NaN instead of ZeroDivisionError)"""
+    if b == 0:
+        if a == 0 or a != a:
+            return NAN
+        return math.copysign(math.inf, a) * math.copysign(1.0, b)
+    return a / b
+
+
+def _clip(x, low, high):
+    """Clip that passes NaN through, like Series.clip"""
+    return x if x != x else min(max(x, low), high)
+
+
+class _CumsumMean:
+    """Rolling mean in vectorbt's formulation: differences of a running cumsum, NaNs counted out"""
+
+    def __init__(self, window):
+        self.window = window
+        self._cumsum = 0.0
+        self._nancnt = 0
+        self._history = deque(maxlen=window)
+
+    def update(self, x):
+        if x != x:
+            self._nancnt += 1
+        else:
+            self._cumsum += x
+        if len(self._history) == self.window:
+            old_cumsum, old_nancnt = self._history[0]
+            count = self.window - (self._nancnt - old_nancnt)
+            total = self._cumsum - old_cumsum
+        else:
+            count = len(self._history) + 1 - self._nancnt
+            total = self._cumsum
+        self._history.append((self._cumsum, self._nancnt))
+        return total / count if count >= self.window else NAN
+
+
+class _KahanWindowSum:
+    """Rolling sum or mean in pandas' formulation (compensated add/remove of a running sum)"""
+
+    def __init__(self, window, mean=False):
+        self.window = window
+        self.mean = mean
+        self._values = deque(maxlen=window)
+        self._sum = 0.0
+        self._nobs = 0
+        self._neg = 0
+        self._comp_add = 0.0
+        self._comp_remove = 0.0
+        self._same = 0
+        self._prev = NAN
+
+    def update(self, x):
+        if len(self._values) == self.window:
+            old = self._values[0]
+            if old == old:
+                self._nobs -= 1
+                y = -old - self._comp_remove
+                t = self._sum + y
+                self._comp_remove = t - self._sum - y
+                self._sum = t
+                if math.copysign(1.0, old) < 0:
+                    self._neg -= 1
+        if not self._values:
+            self._prev = x
+        self._values.append(x)
+        if x == x:
+            self._nobs += 1
+            y = x - self._comp_add
+            t = self._sum + y
+            self._comp_add = t - self._sum - y
+            self._sum = t
+            if math.copysign(1.0, x) < 0:
+                self._neg += 1
+            self._same = self._same + 1 if x == self._prev else 1
+            self._prev = x
+
+        if self._nobs < self.window:
+            return NAN
+        if not self.mean:
+            return self._prev * self._nobs if self._same >= self._nobs else self._sum
+        result = self._sum / self._nobs
+        if self._same >= self._nobs:
+            return self._prev
+        if self._neg == 0 and result < 0:
+            return 0.0
+        if self._neg == self._nobs and result > 0:
+            return 0.0
+        return result
+
+
+class _WindowStd:
+    """
+    Rolling standard deviation with compensated Welford updates.
+
+    flavor='vectorbt' follows vectorbt's rolling_std_nb (used by BBANDS);
+    flavor='pandas' follows Series.rolling().std().
+    """
+
+    def __init__(self, window, ddof=0, flavor='pandas'):
+        self.window = window
+        self.ddof = ddof
+        self.flavor = flavor
+        self._values = deque(maxlen=window)
+        self._reset()
+
+    def _reset(self):
+        self._nobs = 0
+        self._mean = 0.0
+        self._m2 = 0.0
+        self._comp_add = 0.0
+        self._comp_remove = 0.0
+        self._same = 0
+        self._prev = NAN
+        self._unstable = False
+
+    def _add(self, x):
+        if x != x:
+            return
+        self._same = self._same + 1 if x == self._prev else 1
+        self._prev = x
+        prev_m2 = self._m2
+        self._nobs += 1
+        prev_mean = self._mean - self._comp_add
+        y = x - self._comp_add
+        delta = y - self._mean
+        self._comp_add = delta + self._mean - y
+        self._mean += delta / self._nobs
+        self._m2 += (x - prev_mean) * (x - self._mean)
+        if prev_m2 * _INV_COND_TOL > self._m2:
+            self._unstable = True
+
+    def _remove(self, x):
+        if x != x:
+            return
+        prev_m2 = self._m2
+        self._nobs -= 1
+        if self._nobs:
+            prev_mean = self._mean - self._comp_remove
+            y = x - self._comp_remove
+            delta = y - self._mean
+            self._comp_remove = delta + self._mean - y
+            self._mean -= delta / self._nobs
+            self._m2 -= (x - prev_mean) * (x - self._mean)
+            if prev_m2 * _INV_COND_TOL > self._m2:
+                self._unstable = True
+        else:
+            self._mean = 0.0
+            self._m2 = 0.0
+            self._unstable = False
+
+    def update(self, x):
+        first = not self._values
+        if len(self._values) == self.window:
+            self._remove(self._values[0])
+        self._values.append(x)
+        if first:
+            self._prev = x
+        self._add(x)
+        if first or (self.flavor == 'vectorbt' and self._unstable):
+            self._reset()
+            self._prev = self._values[0]
+            for value in self._values:
+                self._add(value)
+            self._unstable = False
+
+        if self._nobs < max(self.window, 1) or self._nobs <= self.ddof:
+            return NAN
+        if self.flavor == 'pandas':
+            if self._nobs == 1 or self._same >= self._nobs:
+                return 0.0
+            return math.sqrt(max(self._m2 / (self._nobs - self.ddof), 0.0))
+        return math.sqrt(self._m2 / (self._nobs - self.ddof)) if self._m2 >= 0 else NAN
+
+
+class _WindowExtreme:
+    """Rolling max (or min) over a monotonic deque; NaN until the window holds `window` values"""
+
+    def __init__(self, window, mode='max'):
+        self.window = window
+        self.better = (lambda a, b: a >= b) if mode == 'max' else (lambda a, b: a <= b)
+        self._candidates = deque()
+        self._missing = deque(maxlen=window)
+        self._i = 0
+
+    def update(self, x):
+        i = self._i
+        self._i += 1
+        self._missing.append(x != x)
+        if x == x:
+            while self._candidates and self.better(x, self._candidates[-1][1]):
+                self._candidates.pop()
+            self._candidates.append((i, x))
+        while self._candidates and self._candidates[0][0] <= i - self.window:
+            self._candidates.popleft()
+        if len(self._missing) - sum(self._missing) < self.window or not self._candidates:
+            return NAN
+        return self._candidates[0][1]
+
+
+class _CrossedAbove:
+    """vectorbt's crossed_above: True on the first bar a is above b after having been below it"""
+
+    def __init__(self):
+        self._was_below = False
+        self._crossed_ago = -1
+
+    def update(self, a, b):
+        if a != a or b != b:
+            self._crossed_ago = -1
+            self._was_below = False
+            return False
+        if a > b:
+            if self._was_below:
+                self._crossed_ago += 1
+                return self._crossed_ago == 0
+            return False
+        self._crossed_ago = -1
+        if a < b:
+            self._was_below = True
+        return False
+
+
+class _RunningExtreme:
+    """Expanding min or max that ignores NaN"""
+
+    def __init__(self, mode='max'):
+        self.mode = mode
+        self.value = NAN
+
+    def update(self, x):
+        if x == x:
+            if self.value != self.value:
+                self.value = x
+            else:
+                self.value = max(self.value, x) if self.mode == 'max' else min(self.value, x)
+        return self.value if x == x else NAN
+
+
+class OnlineIndicators:
+    """
+    Bar-by-bar version of TechnicalIndicators.
+
+    Every indicator keeps only bounded rolling state (running sums, rolling
+    variance, monotonic deques for highs/lows, the Heiken Ashi recursion,
+    crossover flags), so update() costs the same on the first bar and the
+    millionth. Rolling means, sums and deviations follow the same
+    formulations as the vectorbt / pandas calls of the batch path.
+
+    MACD, MA and OBV strengths are normalized with the expanding min/max up
+    to the current bar, i.e. TechnicalIndicators(strength_normalization=
+    'expanding'); replaying a history through update() reproduces that
+    batch output.
+
+    Usage:
+        from online_indicators import OnlineIndicators
+
+        engine = OnlineIndicators()
+        engine.warmup(history_df)
+        row = engine.update({'Open': ..., 'High': ..., 'Low': ..., 'Close': ..., 'Volume': ...})
+        row['RSI_signal'], row['RSI_strength']
+    """
+
+    # The only TechnicalIndicators strength_normalization a bar-by-bar engine can reproduce
+    strength_normalization = 'expanding'
+    SIGNAL_INDICATORS = TechnicalIndicators().signal_indicators
+    CONTINUOUS_COLUMNS = ['RSI', 'CMF', 'VWAP', 'ATR', 'VOLATILITY', 'PARKINSON',
+                          'dist_from_high', 'dist_from_low', 'PRICE_ACTION']
+    FEATURE_COLUMNS = ([f'{name}_strength' for name in SIGNAL_INDICATORS] + CONTINUOUS_COLUMNS
+                       + [f'{name}_signal' for name in SIGNAL_INDICATORS])
+
+    def __init__(self):
+        self.bars = 0
+        self._prev_close = NAN
+
+        # RSI
+        self._rsi_up = _CumsumMean(14)
+        self._rsi_down = _CumsumMean(14)
+        # MACD
+        self._macd_fast = _CumsumMean(12)
+        self._macd_slow = _CumsumMean(26)
+        self._macd_signal = _CumsumMean(9)
+        self._macd_above = _CrossedAbove()
+        self._macd_below = _CrossedAbove()
+        self._macd_min = _RunningExtreme('min')
+        self._macd_max = _RunningExtreme('max')
+        # MA
+        self._ma_short = _CumsumMean(20)
+        self._ma_long = _CumsumMean(50)
+        self._ma_max = _RunningExtreme('max')
+        self._ma_prev = None
+        # HA
+        self._ha_prev = None
+        # OBV
+        self._obv = 0.0
+        self._obv_prev = NAN
+        self._obv_max = _RunningExtreme('max')
+        # STOCH
+        self._stoch_low = _WindowExtreme(14, 'min')
+        self._stoch_high = _WindowExtreme(14, 'max')
+        self._stoch_d = _CumsumMean(3)
+        self._stoch_prev = None
+        # BBANDS
+        self._bb_mean = _CumsumMean(20)
+        self._bb_std = _WindowStd(20, ddof=0, flavor='vectorbt')
+        # CCI
+        self._cci_tp = deque(maxlen=20)
+        self._cci_mean = _KahanWindowSum(20, mean=True)
+        # CMF
+        self._cmf_mfv = _KahanWindowSum(20)
+        self._cmf_volume = _KahanWindowSum(20)
+        # VWAP
+        self._vwap_pv = 0.0
+        self._vwap_volume = 0.0
+        # ATR, VOLATILITY, PARKINSON, PRICE_ACTION
+        self._atr = _KahanWindowSum(14, mean=True)
+        self._volatility = _WindowStd(20, ddof=1, flavor='pandas')
+        self._parkinson = _KahanWindowSum(20, mean=True)
+        self._pa_high = _WindowExtreme(20, 'max')
+        self._pa_low = _WindowExtreme(20, 'min')
+
+    @staticmethod
+    def _signal(entry, exit_):
+        return 1 if entry else (-1 if exit_ else 0)
+
+    def _changed(self, previous, current):
+        return previous is None or previous != current
+
+    def update(self, bar):
+        """
+        Consume one bar and return its feature row.
+
+        Args:
+            bar (Mapping): At least Open, High, Low, Close and Volume; any other
+                fields (e.g. 'Open Time', 'cryptocoin') are passed through
+
+        Returns:
+            dict: The bar's fields followed by FEATURE_COLUMNS, as in the batch output
+        """
+        o, h, l, c, v = (float(bar[k]) for k in ('Open', 'High', 'Low', 'Close', 'Volume'))
+        prev_close = self._prev_close
+        self._prev_close = c
+        self.bars += 1
+        strength = {}
+        signal = {}
+
+        # RSI (simple moving averages of gains and losses, as vbt.RSI)
+        delta = c - prev_close
+        up = 0.0 if delta < 0 else delta
+        down = abs(0.0 if delta > 0 else delta)
+        rsi = 100 - _div(100, 1 + _div(self._rsi_up.update(up), self._rsi_down.update(down)))
+        rsi_entry, rsi_exit = rsi < 30, rsi > 70
+        strength['RSI'] = (_clip((30 - rsi) / 30, 0, 1) if rsi_entry
+                           else _clip((rsi - 70) / 30, 0, 1) if rsi_exit else 0.0)
+        signal['RSI'] = self._signal(rsi_entry, rsi_exit)
+
+        # MACD
+        macd = self._macd_fast.update(c) - self._macd_slow.update(c)
+        macd_signal = self._macd_signal.update(macd)
+        macd_entry = self._macd_above.update(macd, macd_signal)
+        macd_exit = self._macd_below.update(macd_signal, macd)
+        macd_diff = abs(macd - macd_signal)
+        diff_min = self._macd_min.update(macd_diff)
+        macd_range = self._macd_max.update(macd_diff) - diff_min
+        norm_macd = _clip(_div(macd_diff - diff_min, macd_range), 0, 1) if macd_range > 0 else 0.0
+        strength['MACD'] = norm_macd if (macd_entry or macd_exit) else 0.0
+        signal['MACD'] = self._signal(macd_entry, macd_exit)
+
+        # MA
+        ma_short, ma_long = self._ma_short.update(c), self._ma_long.update(c)
+        ma_state = (ma_short > ma_long, ma_short < ma_long)
+        ma_diff = abs(ma_short - ma_long)
+        ma_max = self._ma_max.update(ma_diff)
+        ma_max = 1.0 if ma_max == 0 else ma_max
+        strength['MA'] = _clip(_div(ma_diff, ma_max), 0, 1) if self._changed(self._ma_prev, ma_state) else 0.0
+        self._ma_prev = ma_state
+        signal['MA'] = self._signal(*ma_state)
+
+        # HA
+        ha_close = (o + h + l + c) / 4
+        ha_open = o if self._ha_prev is None else (self._ha_prev[0] + self._ha_prev[1]) / 2
+        self._ha_prev = (ha_open, ha_close)
+        ha_high = max(h, ha_open, ha_close)
+        ha_low = min(l, ha_open, ha_close)
+        green = ha_close > ha_open and ha_low == ha_open
+        red = ha_close < ha_open and ha_high == ha_open
+        ha_range = ha_high - ha_low
+        ha_strength = 0.0 if ha_range == 0 else _clip(abs(ha_close - ha_open) / ha_range, 0, 1)
+        strength['HA'] = ha_strength if (green or red) else 0.0
+        signal['HA'] = self._signal(green, red)
+
+        # OBV
+        signed_volume = -v if c < prev_close else v
+        self._obv += 0.0 if signed_volume != signed_volume else signed_volume
+        obv_diff = self._obv - self._obv_prev
+        self._obv_prev = self._obv
+        obv_abs = abs(obv_diff)
+        obv_max = self._obv_max.update(obv_abs)
+        obv_entry, obv_exit = obv_diff > 0, obv_diff < 0
+        norm_obv = _clip(obv_abs / obv_max, 0, 1) if obv_max > 0 else 0.0
+        strength['OBV'] = norm_obv if (obv_entry or obv_exit) else 0.0
+        signal['OBV'] = self._signal(obv_entry, obv_exit)
+
+        # STOCH
+        roll_min, roll_max = self._stoch_low.update(l), self._stoch_high.update(h)
+        percent_k = _div(100 * (c - roll_min), roll_max - roll_min)
+        percent_d = self._stoch_d.update(percent_k)
+        stoch_state = (percent_k > percent_d, percent_k < percent_d)
+        strength['STOCH'] = (_clip(abs(percent_k - percent_d) / 100, 0, 1)
+                             if self._changed(self._stoch_prev, stoch_state) else 0.0)
+        self._stoch_prev = stoch_state
+        signal['STOCH'] = self._signal(*stoch_state)
+
+        # BBANDS
+        bb_mid = self._bb_mean.update(c)
+        bb_std = self._bb_std.update(c)
+        bb_upper, bb_lower = bb_mid + 2 * bb_std, bb_mid - 2 * bb_std
+        bandwidth = _div(bb_upper - bb_lower, bb_mid)
+        bandwidth = 1.0 if (bandwidth == 0 or bandwidth != bandwidth) else bandwidth
+        bb_entry, bb_exit = c < bb_lower, c > bb_upper
+        strength['BBANDS'] = (_clip((bb_lower - c) / bandwidth, 0, 1) if bb_entry
+                              else _clip((c - bb_upper) / bandwidth, 0, 1) if bb_exit else 0.0)
+        signal['BBANDS'] = self._signal(bb_entry, bb_exit)
+
+        # CCI
+        tp = (h + l + c) / 3
+        tp_ma = self._cci_mean.update(tp)
+        self._cci_tp.append(tp)
+        tp_md = NAN
+        if len(self._cci_tp) == self._cci_tp.maxlen:
+            window = np.fromiter(self._cci_tp, dtype=np.float64, count=len(self._cci_tp))
+            tp_md = float(np.abs(window - window.mean()).mean())
+        tp_md = 1.0 if (tp_md == 0 or tp_md != tp_md) else tp_md
+        cci = (tp - tp_ma) / (0.015 * tp_md)
+        cci_entry = cci < -100 or cci > 100
+        cci_exit = (-50 < cci < 0) or (0 < cci < 50)
+        norm_cci = _clip(_clip(cci, -300, 300) / 300 * 0.5 + 0.5, 0, 1)
+        strength['CCI'] = norm_cci if (cci_entry or cci_exit) else 0.0
+        signal['CCI'] = self._signal(cci_entry, cci_exit)
+
+        # Continuous features
+        hl = h - l
+        mfm = NAN if hl == 0 else ((c - l) - (h - c)) / hl
+        cmf = _clip(_div(self._cmf_mfv.update(mfm * v), self._cmf_volume.update(v)), -1, 1)
+        self._vwap_pv += c * v
+        self._vwap_volume += v
+        parkinson = (1 / (4 * np.log(2))) * (float(np.log(h / l)) ** 2)
+        pa_high, pa_low = self._pa_high.update(h), self._pa_low.update(l)
+        features = {
+            'RSI': rsi,
+            'CMF': 0.0 if cmf != cmf else cmf,
+            'VWAP': _div(self._vwap_pv, self._vwap_volume),
+            'ATR': self._atr.update(max(h, c) - min(l, c)),
+            'VOLATILITY': self._volatility.update(_div(c, prev_close) - 1),
+            'PARKINSON': self._parkinson.update(parkinson),
+            'dist_from_high': _div(c - pa_high, pa_high),
+            'dist_from_low': _div(c - pa_low, pa_low),
+            'PRICE_ACTION': 0.0 if hl == 0 else _clip(abs(c - o) / hl, 0, 1),
+        }
+
+        row = dict(bar)
+        for name in self.SIGNAL_INDICATORS:
+            value = strength[name]
+            row[f'{name}_strength'] = 0.0 if value != value else _clip(value, 0, 1)
+        row.update(features)
+        for name in self.SIGNAL_INDICATORS:
+            row[f'{name}_signal'] = signal[name]
+        return row
+
+    def warmup(self, df):
+        """Feed historical bars through the engine without keeping their rows"""
+        for bar in df.to_dict('records'):
+            self.update(bar)
+        return self
+
+    def replay(self, df):
+        """
+        Feed a DataFrame bar by bar and collect the rows.
+
+        Returns:
+            pd.DataFrame: Same columns as TechnicalIndicators(strength_normalization=
+                'expanding').calculate_from_dataframe(df)
+        """
+        rows = [self.update(bar) for bar in df.to_dict('records')]
+        out = pd.DataFrame(rows, index=df.index, columns=list(df.columns) + self.FEATURE_COLUMNS)
+        out = out.astype(df.dtypes.to_dict())
+        for name in self.SIGNAL_INDICATORS:
+            out[f'{name}_signal'] = out[f'{name}_signal'].astype(np.int64)
+        return out
@@ -0,0 +1,423 @@
+import csv
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+
+import numpy as np
+
+from online_indicators import OnlineIndicators
+from trading_env import TradingAccount
+
+
+class LatencyHistogram:
+    """
+    Thread-safe latency histogram with log-spaced buckets.
+
+    Buckets span 1 µs to 10 s at 40 per decade (~6% wide), so percentiles
+    are accurate to a few percent at any scale with a fixed 281-slot array,
+    however many samples are recorded.
+
+    Usage:
+        hist = LatencyHistogram()
+        hist.record(0.0021)          # seconds
+        hist.percentile(99)          # seconds
+        hist.summary()               # milliseconds
+    """
+
+    EDGES = np.logspace(-6, 1, 7 * 40 + 1)
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._counts = np.zeros(len(self.EDGES) + 1, dtype=np.int64)
+            self.count = 0
+            self.total = 0.0
+            self.min = np.inf
+            self.max = 0.0
+
+    def record(self, seconds):
+        bucket = int(np.searchsorted(self.EDGES, seconds))
+        with self._lock:
+            self._counts[bucket] += 1
+            self.count += 1
+            self.total += seconds
+            self.min = min(self.min, seconds)
+            self.max = max(self.max, seconds)
+
+    def percentile(self, q):
+        """Upper edge of the bucket holding the q-th percentile, clamped to the observed range"""
+        with self._lock:
+            if not self.count:
+                return None
+            rank = max(int(np.ceil(q / 100 * self.count)), 1)
+            bucket = int(np.searchsorted(np.cumsum(self._counts), rank))
+            edge = self.EDGES[min(bucket, len(self.EDGES) - 1)]
+            return float(min(max(edge, self.min), self.max))
+
+    def summary(self):
+        """Count, mean, p50, p90, p99 and max in milliseconds"""
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count * 1e3, 4),
+            'p50_ms': round(self.percentile(50) * 1e3, 4),
+            'p90_ms': round(self.percentile(90) * 1e3, 4),
+            'p99_ms': round(self.percentile(99) * 1e3, 4),
+            'max_ms': round(self.max * 1e3, 4),
+        }
+
+    def buckets(self):
+        """Non-empty buckets as [{'le_ms', 'count'}], le_ms None for the overflow bucket"""
+        with self._lock:
+            counts = self._counts.copy()
+        return [
+            {'le_ms': round(float(self.EDGES[i]) * 1e3, 6) if i < len(self.EDGES) else None,
+             'count': int(counts[i])}
+            for i in np.flatnonzero(counts)
+        ]
+
+
+def _parse_field(value):
+    if value == '':
+        return np.nan
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+class CsvTailFeed:
+    """
+    Bars appended to a CSV file, like `tail -f`.
+
+    The first line is the header. Rows already in the file are replayed when
+    from_start is True; afterwards the file is polled for new complete lines.
+    Numeric fields are parsed as floats, anything else is kept as a string.
+
+    Yields (received_ns, bar) with received_ns from time.perf_counter_ns()
+    taken as soon as the line was read.
+    """
+
+    def __init__(self, path, from_start=True, poll_interval=0.05, idle_timeout=None):
+        """
+        Args:
+            path (str): CSV file with the market data header
+            from_start (bool): Replay rows already in the file before tailing
+            poll_interval (float): Seconds between polls once at end of file
+            idle_timeout (float): Stop after this many seconds without a new row (None = never)
+        """
+        self.path = path
+        self.from_start = from_start
+        self.poll_interval = poll_interval
+        self.idle_timeout = idle_timeout
+        self._closed = threading.Event()
+
+    def close(self):
+        self._closed.set()
+
+    def __iter__(self):
+        with open(self.path, newline='') as f:
+            header = next(csv.reader([f.readline()]))
+            if not self.from_start:
+                f.seek(0, os.SEEK_END)
+            pending = ''
+            last_row = time.monotonic()
+            while not self._closed.is_set():
+                line = f.readline()
+                if not line:
+                    if self.idle_timeout is not None and time.monotonic() - last_row > self.idle_timeout:
+                        return
+                    self._closed.wait(self.poll_interval)
+                    continue
+                pending += line
+                if not pending.endswith('\n'):
+                    # Writer is mid-line; wait for the rest
+                    continue
+                received = time.perf_counter_ns()
+                values = next(csv.reader([pending]), None)
+                pending = ''
+                last_row = time.monotonic()
+                if values:
+                    yield received, {key: _parse_field(value) for key, value in zip(header, values)}
+
+
+class SocketFeed:
+    """
+    Bars streamed over TCP as newline-delimited JSON objects.
+
+    Yields (received_ns, bar) like CsvTailFeed until the server closes the
+    connection or close() is called.
+    """
+
+    def __init__(self, host, port, connect_timeout=5.0):
+        self.host = host
+        self.port = port
+        self.connect_timeout = connect_timeout
+        self._sock = None
+        self._closed = threading.Event()
+
+    def close(self):
+        self._closed.set()
+        if self._sock is not None:
+            try:
+                self._sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+
+    def __iter__(self):
+        self._sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+        self._sock.settimeout(None)
+        with self._sock, self._sock.makefile('r', encoding='utf-8') as stream:
+            for line in stream:
+                received = time.perf_counter_ns()
+                if self._closed.is_set():
+                    return
+                if line.strip():
+                    yield received, json.loads(line)
+
+
+def serve_replay(df, host='127.0.0.1', port=0, interval=0.0):
+    """
+    Serve the rows of a DataFrame to one SocketFeed client, as a stand-in for
+    an exchange feed.
+
+    Args:
+        df (pd.DataFrame): Bars in the market data layout
+        host (str): Interface to listen on
+        port (int): Port to listen on (0 = any free port)
+        interval (float): Seconds between bars (0 = as fast as the client reads)
+
+    Returns:
+        int: The port the server listens on
+    """
+    server = socket.create_server((host, port))
+    records = df.to_dict('records')
+
+    def serve():
+        with server:
+            conn, _ = server.accept()
+            with conn:
+                try:
+                    for record in records:
+                        conn.sendall((json.dumps(record, default=str) + '\n').encode('utf-8'))
+                        if interval:
+                            time.sleep(interval)
+                except OSError:
+                    # Client went away
+                    pass
+
+    threading.Thread(target=serve, name='bar-replay', daemon=True).start()
+    return server.getsockname()[1]
+
+
+class PaperTradingSession:
+    """
+    Trades a PPO policy on bars from a live feed, one decision per bar.
+
+    For each bar the feature row is updated incrementally with
+    OnlineIndicators, the observation (features + position flag, as in
+    LocalTradingEnv) is passed to the policy once, and the action is
+    executed at the bar's close on a TradingAccount. Bars whose features are
+    still NaN (indicator warmup) only update the indicators.
+
+    OnlineIndicators can only scale the MACD, MA and OBV strengths by their
+    expanding min/max. A policy backtested on 'global' strengths (the
+    FeatureStore default) therefore sees differently distributed strength
+    features here; pass the backtest's strength_normalization so status()
+    reports the mismatch.
+
+    Latency is recorded per stage in LatencyHistograms:
+        ingest     line received by the feed -> processing starts (queueing)
+        features   indicator update and observation build
+        inference  model.predict
+        order      account update
+        total      line received -> order done, checked against latency_budget_ms
+
+    Usage:
+        session = PaperTradingSession(model, SocketFeed('127.0.0.1', port),
+                                      feature_columns, warmup=history_df)
+        session.start()
+        session.status(), session.latency()
+        session.stop()
+    """
+
+    STAGES = ('ingest', 'features', 'inference', 'order', 'total')
+
+    def __init__(self, model, feed, feature_columns, initial_balance=10000,
+                 latency_budget_ms=50.0, deterministic=True, warmup=None,
+                 max_bars=None, name=None, strength_normalization='global', **account_kwargs):
+        """
+        Args:
+            model: Object with predict(obs, deterministic) (a stable-baselines3 PPO)
+            feed: Iterable of (received_ns, bar) with a close() method
+            feature_columns (list): Observation columns, in the training order
+            initial_balance (float): Starting cash
+            latency_budget_ms (float): End-to-end budget per bar
+            deterministic (bool): Deterministic policy actions
+            warmup (pd.DataFrame): Historical bars to prime the indicators with
+            max_bars (int): Stop after this many feed bars (None = run until the feed ends)
+            name (str): Label shown in status()
+            strength_normalization (str): TechnicalIndicators strength scaling of the
+                features the policy was backtested with (compared with the live engine's)
+            **account_kwargs: fee, min_position_size, max_stop_loss, max_take_profit
+        """
+        self.id = str(uuid.uuid4())
+        self.name = name
+        self.model = model
+        self.feed = feed
+        self.feature_columns = list(feature_columns)
+        self.latency_budget_ms = float(latency_budget_ms)
+        self.deterministic = deterministic
+        self.max_bars = max_bars
+        self.account = TradingAccount(initial_balance=initial_balance, **account_kwargs)
+        self.engine = OnlineIndicators()
+        self.strength_normalization = strength_normalization
+        if warmup is not None and len(warmup):
+            self.engine.warmup(warmup)
+
+        self.histograms = {stage: LatencyHistogram() for stage in self.STAGES}
+        self._obs = np.zeros(len(self.feature_columns) + 1, dtype=np.float32)
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.state = 'created'
+        self.error = None
+        self.started_at = None
+        self.finished_at = None
+        self.bars = 0
+        self.warmup_bars = 0
+        self.decisions = 0
+        self.budget_overruns = 0
+        self.num_trades = 0
+        self.last_bar = None
+        self.recent_trades = deque(maxlen=50)
+
+    def start(self):
+        """Run the session on a background thread"""
+        self._thread = threading.Thread(target=self.run, name=f'paper-{self.id[:8]}', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=5.0):
+        self._stop.set()
+        self.feed.close()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def run(self):
+        """Consume the feed until it ends, max_bars is reached or stop() is called"""
+        self.state = 'running'
+        self.started_at = datetime.now().isoformat(timespec='seconds')
+        try:
+            for received_ns, bar in self.feed:
+                if self._stop.is_set():
+                    break
+                self._process(received_ns, bar)
+                if self.max_bars is not None and self.bars >= self.max_bars:
+                    break
+            self.state = 'stopped'
+        except Exception as e:
+            self.error = str(e)
+            self.state = 'failed'
+        finally:
+            self.feed.close()
+            self.finished_at = datetime.now().isoformat(timespec='seconds')
+        return self.status()
+
+    def _process(self, received_ns, bar):
+        hist = self.histograms
+        account = self.account
+        t0 = time.perf_counter_ns()
+        hist['ingest'].record((t0 - received_ns) * 1e-9)
+
+        row = self.engine.update(bar)
+        obs = self._obs
+        obs[:-1] = [row[column] for column in self.feature_columns]
+        obs[-1] = 1.0 if account.quantity > 0 else 0.0
+        t1 = time.perf_counter_ns()
+        hist['features'].record((t1 - t0) * 1e-9)
+
+        price = float(row['Close'])
+        self.bars += 1
+        position_changes = {'opened': [], 'closed': []}
+
+        if np.isnan(obs).any():
+            self.warmup_bars += 1
+        else:
+            action, _ = self.model.predict(obs, deterministic=self.deterministic)
+            action = np.clip(np.asarray(action, dtype=np.float64).ravel(), 0.0, 1.0)
+            t2 = time.perf_counter_ns()
+            hist['inference'].record((t2 - t1) * 1e-9)
+
+            position_changes = account.apply_action(price, action)
+            self.decisions += 1
+            for closed in position_changes['closed']:
+                closed['timestamp'] = str(row.get('Open Time', ''))
+                self.recent_trades.append(closed)
+                self.num_trades += 1
+            t3 = time.perf_counter_ns()
+            hist['order'].record((t3 - t2) * 1e-9)
+
+            total = (t3 - received_ns) * 1e-9
+            hist['total'].record(total)
+            if total * 1e3 > self.latency_budget_ms:
+                self.budget_overruns += 1
+
+        account.current_step += 1
+        self.last_bar = {
+            'timestamp': str(row.get('Open Time', '')),
+            'close': price,
+            'opened': len(position_changes['opened']),
+            'closed': len(position_changes['closed']),
+        }
+
+    def status(self):
+        """Session state, account and budget counters"""
+        price = self.last_bar['close'] if self.last_bar else np.nan
+        portfolio_value = self.account._portfolio_value(price) if self.last_bar else self.account.cash
+        return {
+            'id': self.id,
+            'name': self.name,
+            'state': self.state,
+            'error': self.error,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'bars': self.bars,
+            'warmup_bars': self.warmup_bars,
+            'decisions': self.decisions,
+            'latency_budget_ms': self.latency_budget_ms,
+            'budget_overruns': self.budget_overruns,
+            'initial_balance': self.account.initial_balance,
+            'portfolio_value': float(portfolio_value),
+            'cash': float(self.account.cash),
+            'position': float(self.account.quantity),
+            'num_trades': self.num_trades,
+            'recent_trades': list(self.recent_trades),
+            'last_bar': self.last_bar,
+            'strength_normalization': self.engine.strength_normalization,
+            'backtest_strength_normalization': self.strength_normalization,
+            'normalization_mismatch': self.engine.strength_normalization != self.strength_normalization,
+        }
+
+    def latency(self, buckets=False):
+        """
+        Per-stage latency summaries (count, mean, p50, p90, p99, max in ms).
+
+        Args:
+            buckets (bool): Also include the non-empty histogram buckets
+        """
+        out = {}
+        for stage, hist in self.histograms.items():
+            out[stage] = hist.summary()
+            if buckets:
+                out[stage]['buckets'] = hist.buckets()
+        return out
@@ -0,0 +1,279 @@
+import importlib.util
+import json
+import os
+
+import numpy as np
+import torch
+from torch import nn
+
+BACKENDS = ('sb3', 'onnx', 'torchscript', 'numpy')
+EXTENSIONS = {'onnx': '.onnx', 'torchscript': '.pt'}
+# Optional modules a backend needs on top of torch and numpy
+REQUIREMENTS = {'onnx': ('onnx', 'onnxruntime')}
+
+
+def missing_requirements(backend):
+    """Optional modules the backend needs that are not installed"""
+    return [module for module in REQUIREMENTS.get(backend, ()) if importlib.util.find_spec(module) is None]
+
+
+def available_backends():
+    """Backends whose optional dependencies are installed, in BACKENDS order"""
+    return tuple(backend for backend in BACKENDS if not missing_requirements(backend))
+
+
+def check_backend(backend):
+    """
+    Raise ValueError if a backend is unknown or cannot run in this environment,
+    so callers can reject a request before loading or exporting anything.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown backend: {backend} (expected one of {', '.join(BACKENDS)})")
+    missing = missing_requirements(backend)
+    if missing:
+        raise ValueError(f"The {backend} backend is not available: install {' and '.join(missing)} "
+                         f"(pip install {' '.join(missing)})")
+
+
+class _MeanActions(nn.Module):
+    """Actor half of an SB3 MLP ActorCriticPolicy: observation -> mean action"""
+
+    def __init__(self, policy):
+        super().__init__()
+        self.features_extractor = policy.pi_features_extractor
+        self.policy_net = policy.mlp_extractor.policy_net
+        self.action_net = policy.action_net
+
+    def forward(self, obs):
+        return self.action_net(self.policy_net(self.features_extractor(obs)))
+
+
+def _check_supported(model):
+    policy = model.policy
+    if type(policy.action_dist).__name__ != 'DiagGaussianDistribution' or policy.squash_output:
+        raise ValueError('Only MLP policies with an unsquashed diagonal Gaussian action distribution '
+                         'can be exported')
+    if len(model.observation_space.shape) != 1:
+        raise ValueError('Only flat Box observation spaces can be exported')
+
+
+def policy_metadata(model):
+    """
+    What a backend needs besides the network: action std and bounds.
+
+    Returns:
+        dict: obs_dim, log_std, action_low, action_high
+    """
+    _check_supported(model)
+    return {
+        'obs_dim': int(model.observation_space.shape[0]),
+        'log_std': model.policy.log_std.detach().cpu().numpy().astype(float).tolist(),
+        'action_low': np.asarray(model.action_space.low, dtype=float).tolist(),
+        'action_high': np.asarray(model.action_space.high, dtype=float).tolist(),
+    }
+
+
+def export_policy(model, path, fmt):
+    """
+    Export the actor of a loaded PPO model.
+
+    Writes the network (mean action for a batch of float32 observations,
+    with a dynamic batch dimension) to path and the action distribution
+    parameters to path + '.json'.
+
+    Args:
+        model (PPO): Loaded stable-baselines3 model
+        path (str): Output file
+        fmt (str): 'onnx' or 'torchscript'
+
+    Returns:
+        str: path
+    """
+    metadata = policy_metadata(model)
+    actor = _MeanActions(model.policy).cpu().eval()
+    example = torch.zeros((1, metadata['obs_dim']), dtype=torch.float32)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+
+    if fmt not in EXTENSIONS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    try:
+        with torch.no_grad():
+            if fmt == 'torchscript':
+                torch.jit.trace(actor, example).save(tmp_path)
+            else:
+                torch.onnx.export(
+                    actor, (example,), tmp_path,
+                    input_names=['obs'], output_names=['mean_actions'],
+                    dynamic_axes={'obs': {0: 'batch'}, 'mean_actions': {0: 'batch'}},
+                    opset_version=17, dynamo=False
+                )
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    # Metadata first: the network file's presence marks a complete export
+    with open(tmp_path + '.json', 'w') as f:
+        json.dump(dict(metadata, format=fmt), f, indent=2)
+    os.replace(tmp_path + '.json', path + '.json')
+    os.replace(tmp_path, path)
+    return path
+
+
+class PolicyBackend:
+    """
+    Inference-only policy with the PPO.predict() interface.
+
+    Subclasses compute the mean action of a (N, obs_dim) float32 batch.
+    Deterministic actions are the mean; stochastic actions add
+    exp(log_std) * N(0, 1) noise, the same diagonal Gaussian SB3 samples
+    from (with NumPy's generator instead of torch's). Both are clipped to
+    the action bounds as PPO.predict does.
+    """
+
+    name = None
+
+    def __init__(self, metadata, seed=None):
+        self.obs_dim = metadata['obs_dim']
+        self.std = np.exp(np.asarray(metadata['log_std'], dtype=np.float32))
+        self.action_low = np.asarray(metadata['action_low'], dtype=np.float32)
+        self.action_high = np.asarray(metadata['action_high'], dtype=np.float32)
+        self.rng = np.random.default_rng(seed)
+
+    def set_random_seed(self, seed=None):
+        """Reseed stochastic sampling (same name as PPO.set_random_seed)"""
+        self.rng = np.random.default_rng(seed)
+
+    def mean_actions(self, obs):
+        raise NotImplementedError
+
+    def predict(self, observation, state=None, episode_start=None, deterministic=False):
+        """
+        Args:
+            observation: One observation (obs_dim,) or a batch (N, obs_dim)
+            deterministic (bool): Return the mean action instead of a sample
+
+        Returns:
+            tuple: (actions, None), actions shaped like the input batch
+        """
+        obs = np.asarray(observation, dtype=np.float32)
+        single = obs.ndim == 1
+        if single:
+            obs = obs[None]
+        actions = self.mean_actions(np.ascontiguousarray(obs))
+        if not deterministic:
+            actions = actions + self.std * self.rng.standard_normal(actions.shape, dtype=np.float32)
+        np.clip(actions, self.action_low, self.action_high, out=actions)
+        return (actions[0] if single else actions), None
+
+
+class NumpyPolicy(PolicyBackend):
+    """Actor MLP evaluated with NumPy matmuls (Linear/Tanh/ReLU layers only)"""
+
+    name = 'numpy'
+    ACTIVATIONS = {nn.Tanh: np.tanh, nn.ReLU: lambda x: np.maximum(x, 0, out=x)}
+
+    def __init__(self, model, seed=None):
+        super().__init__(policy_metadata(model), seed=seed)
+        self.layers = []
+        modules = list(model.policy.mlp_extractor.policy_net) + [model.policy.action_net]
+        for module in modules:
+            if isinstance(module, nn.Linear):
+                weight = module.weight.detach().cpu().numpy().astype(np.float32).T.copy()
+                bias = module.bias.detach().cpu().numpy().astype(np.float32)
+                self.layers.append(('linear', weight, bias))
+            elif type(module) in self.ACTIVATIONS:
+                self.layers.append(('activation', self.ACTIVATIONS[type(module)], None))
+            else:
+                raise ValueError(f"Unsupported layer for the numpy backend: {module}")
+
+    def mean_actions(self, obs):
+        x = obs
+        for kind, a, b in self.layers:
+            if kind == 'linear':
+                x = x @ a
+                x += b
+            else:
+                x = a(x)
+        return x
+
+
+class TorchScriptPolicy(PolicyBackend):
+    """Traced actor loaded with torch.jit, run under inference_mode"""
+
+    name = 'torchscript'
+
+    def __init__(self, path, seed=None):
+        with open(path + '.json') as f:
+            super().__init__(json.load(f), seed=seed)
+        self.module = torch.jit.optimize_for_inference(torch.jit.load(path, map_location='cpu').eval())
+
+    def mean_actions(self, obs):
+        with torch.inference_mode():
+            return self.module(torch.from_numpy(obs)).numpy()
+
+
+class OnnxPolicy(PolicyBackend):
+    """Exported actor run with onnxruntime on CPU"""
+
+    name = 'onnx'
+
+    def __init__(self, path, seed=None, threads=1):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("The onnx backend needs onnxruntime (pip install onnxruntime)") from None
+
+        with open(path + '.json') as f:
+            super().__init__(json.load(f), seed=seed)
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+
+    def mean_actions(self, obs):
+        return self.session.run(None, {'obs': obs})[0]
+
+
+def load_backend(backend, model, export_path=None, seed=None):
+    """
+    Build an inference backend for a loaded PPO model.
+
+    Args:
+        backend (str): One of BACKENDS; 'sb3' returns the model itself
+        model (PPO): Loaded stable-baselines3 model
+        export_path (str): Exported network for 'onnx' / 'torchscript';
+            exported from the model first if the file does not exist
+        seed (int): Seed for stochastic sampling
+
+    Returns:
+        Object with predict(observation, deterministic)
+    """
+    check_backend(backend)
+    if backend == 'sb3':
+        return model
+    if backend == 'numpy':
+        return NumpyPolicy(model, seed=seed)
+
+    if not os.path.exists(export_path) or not os.path.exists(export_path + '.json'):
+        export_policy(model, export_path, backend)
+    if backend == 'torchscript':
+        return TorchScriptPolicy(export_path, seed=seed)
+    return OnnxPolicy(export_path, seed=seed)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    from stable_baselines3 import PPO
+
+    parser = argparse.ArgumentParser(description='Export a PPO policy for fast CPU inference')
+    parser.add_argument('model_path', help='stable-baselines3 PPO .zip file')
+    parser.add_argument('--format', choices=sorted(EXTENSIONS), default='onnx')
+    parser.add_argument('-o', '--output', help='Output file (default: model path with the format extension)')
+    args = parser.parse_args()
+
+    output = args.output or os.path.splitext(args.model_path)[0] + EXTENSIONS[args.format]
+    export_policy(PPO.load(args.model_path, device='cpu'), output, args.format)
+    print(f"✓ Exported {args.model_path} to {output} ({args.format})")
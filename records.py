@@ -0,0 +1,171 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+
+NAT = np.iinfo(np.int64).min
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_ns(timestamp):
+    """Convert an int (ns since epoch), datetime-like or string to int64 nanoseconds"""
+    if timestamp is None:
+        return NAT
+    if isinstance(timestamp, (int, np.integer)):
+        return int(timestamp)
+    return pd.Timestamp(timestamp).value
+
+
+def format_ns(ns, fmt='%Y-%m-%d %H:%M:%S'):
+    """Format int64 nanoseconds as a timestamp string ('' for missing)"""
+    if ns == NAT:
+        return ''
+    # Plain datetime arithmetic; about twice as fast as building a pd.Timestamp
+    return (EPOCH + timedelta(microseconds=int(ns) // 1000)).strftime(fmt)
+
+
+class ColumnBuffer:
+    """
+    Preallocated, growable columnar record store.
+
+    Each field lives in its own contiguous NumPy array (vector fields as a
+    (width, capacity) block, so every component is contiguous too). Appends
+    are amortized O(1) and capacity doubles when full. Because columns are
+    contiguous, to_pandas() and to_arrow() wrap the filled part of each
+    array without copying numeric data.
+
+    Usage:
+        buf = ColumnBuffer([('step', 'i8'), ('value', 'f8'), ('action', 'f4', 5)])
+        buf.append(step=0, value=1.0, action=[0.1, 0.2, 0.3, 0.4, 0.5])
+        df = buf.to_pandas()
+    """
+
+    def __init__(self, fields, capacity=4096, datetime_fields=()):
+        """
+        Args:
+            fields (list): (name, dtype) or (name, dtype, width) tuples
+            capacity (int): Initial number of rows to preallocate
+            datetime_fields (tuple): int64 ns fields exported as datetime64[ns]
+        """
+        self.fields = [(f[0], np.dtype(f[1]), f[2] if len(f) > 2 else None) for f in fields]
+        self.datetime_fields = set(datetime_fields)
+        self._capacity = max(int(capacity), 1)
+        self._size = 0
+        self._columns = {name: self._allocate(dtype, width, self._capacity) for name, dtype, width in self.fields}
+
+    @staticmethod
+    def _allocate(dtype, width, capacity):
+        shape = (width, capacity) if width else (capacity,)
+        if dtype.kind == 'f':
+            return np.full(shape, np.nan, dtype=dtype)
+        return np.zeros(shape, dtype=dtype)
+
+    def _grow(self):
+        capacity = self._capacity * 2
+        for name, dtype, width in self.fields:
+            column = self._allocate(dtype, width, capacity)
+            column[..., :self._size] = self._columns[name][..., :self._size]
+            self._columns[name] = column
+        self._capacity = capacity
+
+    def append(self, **values):
+        """Append one row; missing float fields are left as NaN"""
+        if self._size == self._capacity:
+            self._grow()
+        i = self._size
+        for name, value in values.items():
+            if value is not None:
+                self._columns[name][..., i] = value
+        self._size += 1
+
+    def __len__(self):
+        return self._size
+
+    @property
+    def nbytes(self):
+        return sum(column[..., :self._size].nbytes for column in self._columns.values())
+
+    def column(self, name):
+        """View of the filled part of one field (no copy)"""
+        return self._columns[name][..., :self._size]
+
+    def last(self, name):
+        return self._columns[name][..., self._size - 1] if self._size else None
+
+    def to_dict(self):
+        """Flat name -> array views; vector fields become name_0, name_1, ..."""
+        columns = {}
+        for name, dtype, width in self.fields:
+            view = self.column(name)
+            if name in self.datetime_fields:
+                view = view.view('datetime64[ns]')
+            if width:
+                for j in range(width):
+                    columns[f'{name}_{j}'] = view[j]
+            else:
+                columns[name] = view
+        return columns
+
+    def to_pandas(self):
+        """DataFrame backed by the buffer's arrays (numeric columns are not copied)"""
+        return pd.DataFrame(self.to_dict(), copy=False)
+
+    def to_arrow(self):
+        """pyarrow Table; numeric columns wrap the buffer's memory"""
+        import pyarrow as pa
+        return pa.table({name: pa.array(values) for name, values in self.to_dict().items()})
+
+    def to_records(self):
+        """Row-oriented NumPy structured array copy of the filled rows"""
+        data = self.to_dict()
+        records = np.empty(self._size, dtype=[(name, values.dtype) for name, values in data.items()])
+        for name, values in data.items():
+            records[name] = values
+        return records
+
+    def save(self, path):
+        """Write to Parquet (.parquet) or Feather (.feather) depending on the extension"""
+        table = self.to_arrow()
+        if path.endswith('.feather'):
+            import pyarrow.feather as feather
+            feather.write_feather(table, path)
+        else:
+            import pyarrow.parquet as pq
+            pq.write_table(table, path)
+        return path
+
+
+class StepHistory(ColumnBuffer):
+    """Per-step backtest record: step, timestamp (int64 ns), portfolio value, reward and action"""
+
+    def __init__(self, action_dim=5, capacity=4096):
+        super().__init__(
+            [('step', 'i8'), ('timestamp', 'i8'), ('portfolio_value', 'f8'),
+             ('reward', 'f8'), ('action', 'f4', action_dim)],
+            capacity=capacity,
+            datetime_fields=('timestamp',)
+        )
+
+
+class TradeTable(ColumnBuffer):
+    """Closed trades, one row per position close"""
+
+    def __init__(self, capacity=256):
+        super().__init__(
+            [('timestamp', 'i8'), ('step', 'i8'), ('entry_price', 'f8'), ('exit_price', 'f8'),
+             ('quantity', 'f8'), ('pnl', 'f8'), ('pnl_percent', 'f8'), ('holding_period', 'i8'),
+             ('close_reason', 'O'), ('portfolio_value', 'f8')],
+            capacity=capacity,
+            datetime_fields=('timestamp',)
+        )
+
+    def to_dicts(self, timestamp_format='%Y-%m-%d %H:%M:%S'):
+        """Trades as a list of dicts, with timestamps formatted as strings"""
+        columns = {name: self.column(name) for name, _, _ in self.fields}
+        trades = []
+        for i in range(len(self)):
+            trade = {name: values[i].item() if hasattr(values[i], 'item') else values[i]
+                     for name, values in columns.items()}
+            trade['timestamp'] = format_ns(trade['timestamp'], timestamp_format)
+            trades.append(trade)
+        return trades
@@ -0,0 +1,200 @@
+import json
+import math
+import time
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _finite(obj):
+    """Copy of a JSON-like structure with non-finite floats replaced by None"""
+    if isinstance(obj, float):
+        return obj if math.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {key: _finite(value) for key, value in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [_finite(value) for value in obj]
+    return obj
+
+
+def _json_default(obj):
+    if isinstance(obj, (np.ndarray, np.generic)):
+        return _finite(obj.tolist())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(obj):
+    """
+    Serialize an event to a JSON string.
+
+    Uses orjson when it is installed (several times faster, serializes NumPy
+    arrays and scalars, writes NaN as null); otherwise the json module with
+    the same output: NaN/inf become null and NumPy values are converted.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS).decode()
+    return json.dumps(_finite(obj), default=_json_default, allow_nan=False, separators=(',', ':'))
+
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Keeps the first and last points and, from each of n_out - 2 equal
+    buckets in between, the point forming the largest triangle with the
+    previously kept point and the mean of the next bucket. Preserves the
+    visual shape of a line far better than taking every k-th point.
+
+    Returns:
+        np.ndarray: Sorted indices of the kept points
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    kept = np.empty(n_out, dtype=np.int64)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        next_lo, next_hi = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        avg_x = x[next_lo:next_hi].mean()
+        avg_y = y[next_lo:next_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        kept[i + 1] = a
+    return kept
+
+
+def minmax_indices(y, n_out):
+    """
+    Min/max decimation: the lowest and highest point of each of n_out // 2
+    equal buckets, plus the first and last point, in order.
+
+    Cheaper than LTTB and keeps every extreme (e.g. drawdown troughs).
+
+    Returns:
+        np.ndarray: Sorted indices of the kept points
+    """
+    y = np.asarray(y, dtype=np.float64)
+    n = len(y)
+    if n_out >= n or n_out < 4:
+        return np.arange(n)
+
+    buckets = (n_out - 2) // 2
+    edges = np.linspace(0, n, buckets + 1).astype(np.int64)
+    kept = [0, n - 1]
+    for lo, hi in zip(edges[:-1], edges[1:]):
+        if hi > lo:
+            kept.append(lo + int(np.argmin(y[lo:hi])))
+            kept.append(lo + int(np.argmax(y[lo:hi])))
+    return np.unique(kept)
+
+
+def downsample(x, y, n_out, method='lttb'):
+    """
+    Downsample a series for charting.
+
+    Args:
+        x, y: Equal-length arrays (e.g. step numbers and portfolio values)
+        n_out (int): Maximum number of points to keep
+        method (str): 'lttb' or 'minmax'
+
+    Returns:
+        tuple: (x, y) arrays of at most n_out points
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    if method == 'lttb':
+        kept = lttb_indices(x, y, n_out)
+    elif method == 'minmax':
+        kept = minmax_indices(y, n_out)
+    else:
+        raise ValueError(f"Unknown downsampling method: {method}")
+    return x[kept], y[kept]
+
+
+class ProgressEmitter:
+    """
+    Decides when a long-running loop streams a progress event.
+
+    Emission is time-based and size-aware: an event is due once
+    total_steps / target_events steps have passed, but never more than
+    max_rate events per second, and at least once per heartbeat seconds
+    while the loop makes progress. Short runs therefore update smoothly and
+    long runs emit a bounded number of events.
+
+    Every step's equity point is buffered, and each event carries the points
+    since the previous one, min/max decimated to points_per_event, so a
+    client can draw the whole curve from the stream alone.
+
+    Usage:
+        emitter = ProgressEmitter(total_steps)
+        for step in ...:
+            if emitter.add(step, portfolio_value):
+                yield {'type': 'step', ..., 'equity': emitter.take()}
+        if emitter.pending:
+            yield {'type': 'step', ..., 'equity': emitter.take()}
+    """
+
+    def __init__(self, total_steps, target_events=200, max_rate=10.0, heartbeat=1.0,
+                 points_per_event=100, clock=time.monotonic):
+        """
+        Args:
+            total_steps (int): Expected number of steps
+            target_events (int): Events to aim for over the whole run
+            max_rate (float): Maximum events per second
+            heartbeat (float): Emit at least this often (seconds) regardless of step count
+            points_per_event (int): Maximum equity points carried by one event
+            clock: Monotonic time source in seconds
+        """
+        self.step_interval = max(math.ceil(total_steps / max(target_events, 1)), 1)
+        self.min_interval = 1.0 / max_rate if max_rate else 0.0
+        self.heartbeat = heartbeat
+        self.points_per_event = points_per_event
+        self.clock = clock
+        self.events = 0
+        self._steps = []
+        self._values = []
+        self._last_step = 0
+        self._last_time = clock()
+
+    @property
+    def pending(self):
+        return len(self._steps)
+
+    def add(self, step, value):
+        """Buffer one equity point; returns True when an event is due"""
+        self._steps.append(step)
+        self._values.append(value)
+        elapsed = self.clock() - self._last_time
+        if elapsed < self.min_interval:
+            return False
+        return step - self._last_step >= self.step_interval or elapsed >= self.heartbeat
+
+    def take(self):
+        """
+        Consume the buffered points.
+
+        Returns:
+            dict: {'steps': [...], 'values': [...]} with at most points_per_event points
+        """
+        steps = np.asarray(self._steps, dtype=np.int64)
+        values = np.asarray(self._values, dtype=np.float64)
+        if len(steps) > self.points_per_event:
+            kept = minmax_indices(values, self.points_per_event)
+            steps, values = steps[kept], values[kept]
+        if len(self._steps):
+            self._last_step = self._steps[-1]
+        self._last_time = self.clock()
+        self._steps = []
+        self._values = []
+        self.events += 1
+        return {'steps': steps.tolist(), 'values': np.round(values, 4).tolist()}
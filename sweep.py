@@ -0,0 +1,233 @@
+import itertools
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import torch
+
+from batch_backtest import BatchBacktestRunner
+from feature_store import FeatureStore
+from metrics import batch_rows, compute_batch, pad_rows
+from model_registry import ModelRegistry
+from trading_env import LocalTradingEnv
+
+MAX_RUNS = 500
+MAX_BATCH = 64
+
+# Per-process state of sweep workers, set up once by _init_worker
+_worker = {}
+
+
+class EquityRecorder:
+    """Minimal analyzer for sweep runs: keeps the equity curve and closed-trade PnL"""
+
+    def __init__(self, initial_balance):
+        self.initial_balance = initial_balance
+        self.equity = []
+        self.trade_pnls = []
+        self.total_reward = 0.0
+
+    def record_step(self, step, timestamp, info, reward):
+        self.equity.append(info['portfolio_value'])
+        self.total_reward += reward
+        for closed in (info.get('position_changes') or {}).get('closed') or []:
+            self.trade_pnls.append(closed.get('pnl', 0))
+
+
+def summarize(recorders):
+    """
+    Summary rows for a group of recorders, computed as one 2-D metrics batch.
+
+    Returns:
+        list: One dict per recorder, in order
+    """
+    batch = compute_batch(
+        pad_rows([r.equity for r in recorders]),
+        initial_balance=np.array([r.initial_balance for r in recorders]),
+        trade_pnl=pad_rows([r.trade_pnls for r in recorders]),
+        total_reward=[r.total_reward for r in recorders]
+    )
+    return [
+        {
+            'final_balance': row['final_balance'],
+            'total_return': round(row['total_return_pct'], 2),
+            'max_drawdown': round(row['max_drawdown_pct'], 2),
+            'sharpe': round(row['sharpe_ratio'], 4),
+            'num_trades': row['num_trades'],
+            'win_rate': round(row['win_rate'], 2),
+            'total_reward': round(row['total_reward'], 4),
+            'steps': row['num_steps'],
+        }
+        for row in batch_rows(batch)
+    ]
+
+
+def expand_grid(spec):
+    """
+    Expand a sweep specification into individual runs.
+
+    Args:
+        spec (dict): Lists of values to combine:
+            cryptos, windows ([{'start_time', 'end_time'}, ...]),
+            seeds (default [0]), initial_balances (default [10000]),
+            deterministic (default [False])
+
+    Returns:
+        list: One dict per run with a sequential job_id
+    """
+    cryptos = spec.get('cryptos') or []
+    windows = spec.get('windows') or []
+    seeds = spec.get('seeds') or [0]
+    balances = spec.get('initial_balances') or [10000]
+    flags = spec.get('deterministic')
+    flags = [False] if flags is None else (flags if isinstance(flags, list) else [flags])
+
+    runs = []
+    for crypto, window, seed, balance, deterministic in itertools.product(cryptos, windows, seeds, balances, flags):
+        runs.append({
+            'job_id': len(runs),
+            'crypto': crypto,
+            'start_time': window['start_time'],
+            'end_time': window['end_time'],
+            'seed': int(seed),
+            'initial_balance': float(balance),
+            'deterministic': bool(deterministic),
+        })
+    return runs
+
+
+def _init_worker(source_path, cache_dir, model_name, model_path, features, backend='sb3',
+                 strength_normalization='global'):
+    """Process pool initializer: open the feature store and load the model once per worker"""
+    torch.set_num_threads(1)
+    registry = ModelRegistry()
+    registry.register(model_name, model_path)
+    _worker.update({
+        'store': FeatureStore(source_path, cache_dir=cache_dir, strength_normalization=strength_normalization),
+        'model': registry.get(model_name, backend=backend),
+        'features': features,
+    })
+
+
+def _run_group(runs, min_rows=100):
+    """
+    Worker task: run a group of backtests that share seed and deterministic flag
+    in lockstep with BatchBacktestRunner.
+
+    The model is reseeded per group, so a stochastic run must be alone in its
+    group for its actions to depend only on its own seed (see _group_runs).
+
+    Returns:
+        list: One result row per run (runs with too little data get an 'error')
+    """
+    store, model = _worker['store'], _worker['model']
+    T_indicators, MR_indicators, continuous_features = _worker['features']
+
+    columns = list(T_indicators) + list(MR_indicators) + list(continuous_features)
+
+    rows, envs, recorders, valid = [], [], [], []
+    for run in runs:
+        matrix = store.observations(run['crypto'], columns, start=run['start_time'], end=run['end_time'])
+        rows_found = 0 if matrix is None else len(matrix)
+        if rows_found < min_rows:
+            rows.append(dict(run, error=f'Insufficient data points ({rows_found}, need at least {min_rows})'))
+            continue
+        envs.append(LocalTradingEnv.from_observations(matrix, initial_balance=run['initial_balance']))
+        recorders.append(EquityRecorder(run['initial_balance']))
+        valid.append(run)
+
+    if envs:
+        model.set_random_seed(valid[0]['seed'])
+        summary = BatchBacktestRunner(model, envs, deterministic=valid[0]['deterministic'],
+                                      analyzers=recorders).run()
+        for run, result in zip(valid, summarize(recorders)):
+            rows.append(dict(run, **result, bars_per_sec=round(summary['bars_per_sec'], 1)))
+    return rows
+
+
+def _group_runs(runs, max_batch=MAX_BATCH):
+    """
+    Split runs into lockstep groups.
+
+    Deterministic runs sharing a seed are batched up to max_batch. Stochastic
+    runs each get their own group: the policy draws the noise of a batched
+    predict() from one generator, so a batched run's actions would depend on
+    which other runs share its batch. Alone, (crypto, window, seed) gives the
+    same result in any grid.
+    """
+    groups = {}
+    for run in runs:
+        key = (run['seed'], True) if run['deterministic'] else ('run', run['job_id'])
+        groups.setdefault(key, []).append(run)
+    return [
+        group[i:i + max_batch]
+        for group in groups.values()
+        for i in range(0, len(group), max_batch)
+    ]
+
+
+class SweepExecutor:
+    """
+    Fans sweep runs out over a process pool.
+
+    Workers are started once and keep the PPO model loaded (served through
+    the given policy_backends backend); indicators come
+    from the shared on-disk FeatureStore, so every run only reads its own
+    symbol and time slice.
+
+    Usage:
+        executor = SweepExecutor(store, 'default', 'model.zip', (T, MR, cont))
+        for row in executor.run(expand_grid(spec)):
+            print(row)
+    """
+
+    def __init__(self, store, model_name, model_path, features, workers=None, backend='sb3'):
+        self.store = store
+        self.model_name = model_name
+        self.model_path = model_path
+        self.features = features
+        self.backend = backend
+        self.workers = workers or int(os.getenv('SWEEP_WORKERS', os.cpu_count() or 1))
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    initializer=_init_worker,
+                    initargs=(self.store.source_path, self.store.cache_dir, self.model_name,
+                              self.model_path, self.features, self.backend,
+                              self.store.ti.strength_normalization)
+                )
+            return self._pool
+
+    def run(self, runs):
+        """
+        Execute runs and yield result rows as their groups complete.
+
+        Args:
+            runs (list): Runs from expand_grid
+
+        Yields:
+            dict: Result row for one run (with 'error' if it failed)
+        """
+        # Build the cache once in this process so workers only read it
+        self.store.build()
+        pool = self._get_pool()
+        futures = {pool.submit(_run_group, group): group for group in _group_runs(runs)}
+        for future in as_completed(futures):
+            try:
+                rows = future.result()
+            except Exception as e:
+                rows = [dict(run, error=str(e)) for run in futures[future]]
+            for row in rows:
+                yield row
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown()
+                self._pool = None
@@ -0,0 +1,80 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+MODEL_PATH = os.path.join(ROOT, 'ppo_trading_bot_enhanced.zip')
+
+# Same feature groups as app5.py, in the order the shipped model was trained on
+T_INDICATORS = ['HA_signal', 'MACD_signal', 'MA_signal', 'OBV_signal']
+MR_INDICATORS = ['RSI_signal', 'STOCH_signal', 'BBANDS_signal', 'CCI_signal']
+CONTINUOUS_FEATURES = [
+    'RSI', 'CMF', 'VWAP', 'ATR', 'VOLATILITY',
+    'PARKINSON', 'dist_from_high', 'dist_from_low', 'PRICE_ACTION',
+    'Taker Buy Quote', 'Taker Buy Base', 'Number of Trades', 'Quote Asset Volume'
+]
+FEATURES = (T_INDICATORS, MR_INDICATORS, CONTINUOUS_FEATURES)
+SYMBOLS = ['XRPJPY', 'LINKJPY', 'ADAJPY']
+
+
+def make_market_data(symbols=SYMBOLS, n=1500, seed=0):
+    """Hourly random-walk bars in the market data CSV layout"""
+    rng = np.random.default_rng(seed)
+    parts = []
+    for symbol in symbols:
+        close = 100 + np.cumsum(rng.normal(size=n))
+        parts.append(pd.DataFrame({
+            'Open Time': pd.date_range('2024-01-01', periods=n, freq='h').astype(str),
+            'Open': close,
+            'High': close + 1,
+            'Low': close - 1,
+            'Close': close + rng.normal(size=n) * 0.2,
+            'Volume': rng.random(n) * 100,
+            'Quote Asset Volume': rng.random(n),
+            'Number of Trades': rng.integers(1, 100, n),
+            'Taker Buy Base': rng.random(n),
+            'Taker Buy Quote': rng.random(n),
+            'cryptocoin': symbol,
+        }))
+    return pd.concat(parts, ignore_index=True)
+
+
+@pytest.fixture(scope='session')
+def market_csv(tmp_path_factory):
+    path = tmp_path_factory.mktemp('data') / 'market.csv'
+    make_market_data().to_csv(path, index=False)
+    return str(path)
+
+
+@pytest.fixture(scope='session')
+def ppo_model():
+    stable_baselines3 = pytest.importorskip('stable_baselines3')
+    return stable_baselines3.PPO.load(MODEL_PATH, device='cpu')
+
+
+@pytest.fixture(scope='session')
+def app5(tmp_path_factory):
+    """The Flask app module, imported with its job database and caches in a temporary directory"""
+    pytest.importorskip('flask')
+    workdir = tmp_path_factory.mktemp('app')
+    settings = {
+        'JOB_DB': str(workdir / 'jobs.db'),
+        'FEATURE_STORE_DIR': str(workdir / 'feature_store'),
+        'MARKET_STORE_DIR': str(workdir / 'market_store'),
+    }
+    saved = {name: os.environ.get(name) for name in settings}
+    os.environ.update(settings)
+    try:
+        import app5
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+    return app5
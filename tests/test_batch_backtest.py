@@ -0,0 +1,8 @@
+import pytest
+
+from batch_backtest import BatchBacktestRunner
+
+
+def test_runner_rejects_empty_envs():
+    with pytest.raises(ValueError, match='at least one environment'):
+        BatchBacktestRunner(model=None, envs=[])
@@ -0,0 +1,67 @@
+import json
+import os
+
+import pytest
+
+pytest.importorskip('vectorbt')
+
+import feature_store
+from feature_store import FeatureStore
+
+
+@pytest.fixture
+def store(market_csv, tmp_path):
+    return FeatureStore(market_csv, cache_dir=str(tmp_path / 'features'), workers=1)
+
+
+def make_key_dir(store, name, finished=True):
+    path = os.path.join(store._source_dir(), name)
+    os.makedirs(path)
+    if finished:
+        with open(os.path.join(path, FeatureStore.MANIFEST), 'w') as f:
+            json.dump({'key': name}, f)
+    return path
+
+
+def test_key_does_not_read_indicator_source(store, monkeypatch):
+    key = store.key()
+
+    def fail(*args, **kwargs):
+        raise AssertionError('inspect.getsource called by key()')
+
+    monkeypatch.setattr(feature_store.inspect, 'getsource', fail)
+    assert store.key() == key
+
+
+def test_build_prunes_only_finished_stale_keys(store):
+    os.makedirs(store._source_dir())
+    stale = make_key_dir(store, '0123456789abcdef')
+    in_progress = make_key_dir(store, 'fedcba9876543210.4242.tmp', finished=False)
+    unfinished = make_key_dir(store, 'aaaaaaaaaaaaaaaa', finished=False)
+
+    manifest = store.build()
+
+    assert os.path.exists(os.path.join(store._key_dir(manifest['key']), FeatureStore.MANIFEST))
+    assert not os.path.exists(stale)
+    assert os.path.exists(in_progress)
+    assert os.path.exists(unfinished)
+    assert sorted(manifest['symbols']) == ['ADAJPY', 'LINKJPY', 'XRPJPY']
+
+
+def test_build_keeps_key_published_by_another_process(store, monkeypatch):
+    key = store.key()
+    calculate = store.ti.calculate_by_group
+
+    def publish_then_calculate(*args, **kwargs):
+        # Another process finishes the same build while this one is computing
+        published = make_key_dir(store, key)
+        open(os.path.join(published, 'in_use.parquet'), 'w').close()
+        return calculate(*args, **kwargs)
+
+    monkeypatch.setattr(store.ti, 'calculate_by_group', publish_then_calculate)
+    manifest = store.build()
+
+    key_dir = store._key_dir(key)
+    assert manifest == {'key': key}
+    assert os.path.exists(os.path.join(key_dir, 'in_use.parquet'))
+    assert not any(name.endswith('.tmp') for name in os.listdir(store._source_dir()))
@@ -0,0 +1,115 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('vectorbt')
+
+from conftest import make_market_data
+from indicators import OHLCV_COLUMNS, TechnicalIndicators, _ha_open_nb, _rolling_mad
+
+HA_COLUMNS = ['HA_Close', 'HA_Open', 'HA_High', 'HA_Low', 'HA_entries', 'HA_exits', 'HA_strength']
+
+
+def reference_calc_HA(df):
+    """_calc_HA as it was before the numba kernel: a per-row df.loc loop (needs a RangeIndex)"""
+    df["HA_Close"] = (df["Open"] + df["High"] + df["Low"] + df["Close"]) / 4
+    df["HA_Open"] = df["Open"]
+
+    for i in range(1, len(df)):
+        df.loc[i, "HA_Open"] = (df.loc[i - 1, "HA_Open"] + df.loc[i - 1, "HA_Close"]) / 2
+
+    df["HA_High"] = df[["High", "HA_Open", "HA_Close"]].max(axis=1)
+    df["HA_Low"] = df[["Low", "HA_Open", "HA_Close"]].min(axis=1)
+
+    green_flat_bottom = (df["HA_Close"] > df["HA_Open"]) & (df["HA_Low"] == df["HA_Open"])
+    red_flat_top = (df["HA_Close"] < df["HA_Open"]) & (df["HA_High"] == df["HA_Open"])
+
+    df["HA_entries"] = green_flat_bottom
+    df["HA_exits"] = red_flat_top
+
+    ha_body = (df["HA_Close"] - df["HA_Open"]).abs()
+    ha_range = df["HA_High"] - df["HA_Low"]
+    ha_strength = (ha_body / ha_range.replace(0, np.nan)).fillna(0).clip(0, 1)
+
+    signal_mask = green_flat_bottom | red_flat_top
+    df.loc[signal_mask, "HA_strength"] = ha_strength[signal_mask]
+
+
+def groups(df, key='cryptocoin'):
+    """Per-group OHLCV frames with a fresh RangeIndex, as calculate_by_group computes them"""
+    for _, group in df.groupby(key, sort=False):
+        frame = group[OHLCV_COLUMNS].reset_index(drop=True).astype(np.float64)
+        frame['HA_strength'] = 0.0
+        yield frame
+
+
+def assert_matches_reference(frame):
+    expected = frame.copy()
+    reference_calc_HA(expected)
+    actual = frame.copy()
+    TechnicalIndicators()._calc_HA(actual)
+    pd.testing.assert_frame_equal(actual[HA_COLUMNS], expected[HA_COLUMNS])
+
+
+@pytest.fixture
+def market_data():
+    df = make_market_data(symbols=['XRPJPY', 'LINKJPY', 'ADAJPY'], n=300, seed=3)
+    # Missing values at a group's first row, mid-series, and a run of them
+    df.loc[0, 'Open'] = np.nan
+    df.loc[350, 'Close'] = np.nan
+    df.loc[700:705, ['Open', 'High']] = np.nan
+    # Groups of one row
+    single = df.iloc[[10, 20]].assign(cryptocoin=['AVAXTRY', 'DOGEJPY'])
+    return pd.concat([df, single], ignore_index=True)
+
+
+def test_calc_HA_matches_reference_loop_per_group(market_data):
+    frames = list(groups(market_data))
+    assert sorted(len(frame) for frame in frames) == [1, 1, 300, 300, 300]
+    for frame in frames:
+        assert_matches_reference(frame)
+
+
+def test_calc_HA_single_row_and_empty():
+    row = pd.DataFrame({'Open': [10.0], 'High': [12.0], 'Low': [9.0], 'Close': [11.0], 'Volume': [1.0],
+                        'HA_strength': [0.0]})
+    assert_matches_reference(row)
+    assert_matches_reference(row.iloc[:0])
+
+
+def test_ha_open_kernel_nan_propagation():
+    open_ = np.array([np.nan, 2.0, 3.0, 4.0])
+    ha_close = np.array([1.0, 2.0, 3.0, 4.0])
+    assert np.isnan(_ha_open_nb(open_, ha_close)).all()
+
+    open_ = np.array([1.0, 2.0, 3.0, 4.0])
+    ha_close = np.array([1.0, np.nan, 3.0, 4.0])
+    np.testing.assert_array_equal(_ha_open_nb(open_, ha_close), [1.0, 1.0, np.nan, np.nan])
+
+
+def test_calc_HA_ignores_index_labels(market_data):
+    frame = next(groups(market_data))
+    expected = frame.copy()
+    TechnicalIndicators()._calc_HA(expected)
+    shuffled = frame.set_axis(np.arange(len(frame))[::-1] * 7)
+    TechnicalIndicators()._calc_HA(shuffled)
+    np.testing.assert_array_equal(shuffled['HA_Open'].to_numpy(), expected['HA_Open'].to_numpy())
+
+
+@pytest.mark.parametrize('window', [1, 2, 14, 20, 50])
+def test_rolling_mad_matches_pandas_apply(window):
+    values = 100 + np.cumsum(np.random.default_rng(window).normal(size=500))
+    values[0] = np.nan
+    values[100] = np.nan
+    values[250:260] = np.nan
+    expected = pd.Series(values).rolling(window).apply(lambda x: np.mean(np.abs(x - np.mean(x))), raw=True)
+
+    np.testing.assert_allclose(_rolling_mad(values, window), expected.to_numpy(), rtol=1e-12, equal_nan=True)
+    # Chunk boundaries must not shift the output
+    np.testing.assert_allclose(_rolling_mad(values, window, chunk_size=7), expected.to_numpy(),
+                               rtol=1e-12, equal_nan=True)
+
+
+def test_rolling_mad_shorter_than_window():
+    assert np.isnan(_rolling_mad(np.arange(5.0), 10)).all()
+    assert len(_rolling_mad(np.arange(5.0), 10)) == 5
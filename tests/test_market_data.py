@@ -0,0 +1,23 @@
+import os
+
+import pytest
+
+pytest.importorskip('pyarrow')
+
+from market_data import MarketDataStore
+
+
+def test_convert_keeps_identical_published_store(market_csv, tmp_path):
+    root = str(tmp_path / 'market_store')
+    MarketDataStore.convert(market_csv, root)
+    marker = os.path.join(root, 'in_use')
+    open(marker, 'w').close()
+
+    store = MarketDataStore.convert(market_csv, root)
+    assert os.path.exists(marker)
+    assert store.is_current(market_csv)
+
+    store = MarketDataStore.convert(market_csv, root, force=True)
+    assert not os.path.exists(marker)
+    assert store.is_current(market_csv)
+    assert os.listdir(tmp_path) == ['market_store']
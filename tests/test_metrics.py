@@ -0,0 +1,25 @@
+import numpy as np
+
+from metrics import LABELS, compute_metrics, format_metrics
+
+
+def test_labels_are_unique():
+    labels = [label for label, _ in LABELS.values()]
+    assert len(set(labels)) == len(labels)
+
+
+def test_format_metrics_keeps_every_field():
+    metrics = compute_metrics(
+        np.array([10000.0, 10100.0, 9950.0, 10300.0]),
+        initial_balance=10000,
+        trade_pnl=[100.0, -150.0, 350.0],
+        trade_pnl_pct=[1.0, -1.5, 3.5]
+    )
+    formatted = format_metrics(metrics)
+
+    assert len(formatted) == len(LABELS)
+    assert formatted['Avg Win ($)'] == '$225.00'
+    assert formatted['Avg Win (%)'] == '2.25%'
+    assert formatted['Avg Loss ($)'] == '$-150.00'
+    assert formatted['Expectancy ($)'] == '$100.00'
+    assert formatted['Expectancy (%)'] == '1.00%'
@@ -0,0 +1,37 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip('vectorbt')
+
+from conftest import make_market_data
+from indicators import TechnicalIndicators
+from online_indicators import OnlineIndicators
+
+# Rolling standard deviations are kept incrementally, so they drift from pandas' result by rounding
+TOLERANCES = {'VOLATILITY': 1e-7, 'PARKINSON': 1e-7}
+
+
+@pytest.fixture(scope='module')
+def replayed():
+    ti = TechnicalIndicators(strength_normalization='expanding')
+    df = ti.parse_timestamps(make_market_data(['XRPJPY'], n=600))
+    return ti.calculate_from_dataframe(df.copy()), OnlineIndicators().replay(df)
+
+
+def test_replay_has_batch_columns(replayed):
+    batch, online = replayed
+    assert list(online.columns) == list(batch.columns)
+
+
+@pytest.mark.parametrize('name', OnlineIndicators.SIGNAL_INDICATORS)
+def test_replay_signals_match_batch(replayed, name):
+    batch, online = replayed
+    pd.testing.assert_series_equal(online[f'{name}_signal'], batch[f'{name}_signal'])
+
+
+@pytest.mark.parametrize('column', [c for c in OnlineIndicators.FEATURE_COLUMNS if not c.endswith('_signal')])
+def test_replay_features_match_batch(replayed, column):
+    batch, online = replayed
+    np.testing.assert_allclose(online[column].to_numpy(float), batch[column].to_numpy(float),
+                               rtol=TOLERANCES.get(column, 1e-9), atol=1e-12, equal_nan=True)
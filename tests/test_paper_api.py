@@ -0,0 +1,73 @@
+import os
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+
+from conftest import ROOT, make_market_data
+
+
+@pytest.fixture
+def client(app5, tmp_path, monkeypatch):
+    monkeypatch.chdir(ROOT)
+    monkeypatch.setattr(app5, 'PAPER_FEED_DIR', str(tmp_path / 'feeds'))
+    monkeypatch.setattr(app5, 'PAPER_SOCKET_HOSTS', {'feed.internal'})
+    os.makedirs(app5.PAPER_FEED_DIR)
+    return app5.app.test_client()
+
+
+@pytest.mark.parametrize('path', ['/etc/passwd', '../outside.csv', 'nested/../../outside.csv'])
+def test_csv_feed_outside_feed_dir_is_rejected(client, tmp_path, path):
+    (tmp_path / 'outside.csv').write_text('Open Time,Close\n')
+    response = client.post('/api/paper/sessions', json={'source': 'csv', 'path': path})
+    assert response.status_code == 400
+    assert 'must be files under' in response.json['error']
+
+
+def test_csv_feed_symlink_out_of_feed_dir_is_rejected(app5, client, tmp_path):
+    (tmp_path / 'outside.csv').write_text('Open Time,Close\n')
+    os.symlink(tmp_path / 'outside.csv', os.path.join(app5.PAPER_FEED_DIR, 'link.csv'))
+    response = client.post('/api/paper/sessions', json={'source': 'csv', 'path': 'link.csv'})
+    assert response.status_code == 400
+
+
+def test_csv_feed_inside_feed_dir_starts(app5, client):
+    pytest.importorskip('stable_baselines3')
+    make_market_data(symbols=['XRPJPY'], n=50).to_csv(os.path.join(app5.PAPER_FEED_DIR, 'bars.csv'), index=False)
+    response = client.post('/api/paper/sessions', json={'source': 'csv', 'path': 'bars.csv', 'max_bars': 50})
+    assert response.status_code == 202
+    session = app5.paper_sessions[response.json['id']]
+    session._thread.join(30)
+    assert session.state == 'stopped'
+    assert session.bars == 50
+    status = session.status()
+    assert status['strength_normalization'] == 'expanding'
+    assert status['backtest_strength_normalization'] == app5.STRENGTH_NORMALIZATION
+    assert status['normalization_mismatch'] == (app5.STRENGTH_NORMALIZATION != 'expanding')
+
+
+def test_socket_feed_host_must_be_allowed(client):
+    response = client.post('/api/paper/sessions', json={'source': 'socket', 'host': '169.254.169.254', 'port': 80})
+    assert response.status_code == 400
+    assert 'not allowed' in response.json['error']
+
+
+def test_finished_sessions_are_pruned(app5, monkeypatch):
+    now = time.time()
+
+    def session(sid, state, finished_seconds_ago=None):
+        finished_at = None
+        if finished_seconds_ago is not None:
+            finished_at = (datetime.fromtimestamp(now) - timedelta(seconds=finished_seconds_ago)).isoformat(
+                timespec='seconds')
+        return SimpleNamespace(id=sid, state=state, finished_at=finished_at)
+
+    sessions = [session('running', 'running'), session('expired', 'stopped', 7200),
+                session('old', 'failed', 30), session('recent', 'stopped', 10), session('newest', 'stopped', 5)]
+    monkeypatch.setattr(app5, 'paper_sessions', {s.id: s for s in sessions})
+    monkeypatch.setattr(app5, 'PAPER_SESSION_TTL', 3600)
+    monkeypatch.setattr(app5, 'MAX_FINISHED_PAPER_SESSIONS', 2)
+
+    app5.prune_paper_sessions(now=now)
+    assert sorted(app5.paper_sessions) == ['newest', 'recent', 'running']
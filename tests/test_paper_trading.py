@@ -0,0 +1,106 @@
+import threading
+
+import numpy as np
+import pytest
+
+pytest.importorskip('vectorbt')
+
+from conftest import CONTINUOUS_FEATURES, MR_INDICATORS, T_INDICATORS, make_market_data
+from paper_trading import CsvTailFeed, LatencyHistogram, PaperTradingSession, SocketFeed, serve_replay
+
+FEATURE_COLUMNS = T_INDICATORS + MR_INDICATORS + CONTINUOUS_FEATURES
+BUCKET_WIDTH = 10 ** (1 / 40)
+
+
+class ListFeed:
+    def __init__(self, df):
+        self.records = df.to_dict('records')
+
+    def __iter__(self):
+        for record in self.records:
+            yield 0, record
+
+    def close(self):
+        pass
+
+
+class HoldModel:
+    """Never opens a position; counts the observations it was asked about"""
+
+    def __init__(self):
+        self.observations = []
+
+    def predict(self, obs, deterministic=True):
+        self.observations.append(obs.copy())
+        return np.zeros(5, dtype=np.float32), None
+
+
+def test_histogram_percentiles_within_one_bucket():
+    samples = np.random.default_rng(0).lognormal(np.log(2e-3), 1.0, 10_000)
+    hist = LatencyHistogram()
+    for sample in samples:
+        hist.record(sample)
+
+    assert hist.count == len(samples)
+    for q in (50, 99):
+        exact = np.percentile(samples, q)
+        assert exact / BUCKET_WIDTH <= hist.percentile(q) <= exact * BUCKET_WIDTH
+    assert sum(bucket['count'] for bucket in hist.buckets()) == len(samples)
+
+
+def test_histogram_empty():
+    hist = LatencyHistogram()
+    assert hist.percentile(50) is None
+    assert hist.summary() == {'count': 0}
+
+
+def test_csv_tail_waits_for_complete_line(tmp_path):
+    path = tmp_path / 'bars.csv'
+    path.write_text('Open Time,Close\n2024-01-01 00:00:00,1.5\n2024-01-01 01:00:00,2.')
+
+    assert [bar for _, bar in CsvTailFeed(str(path), idle_timeout=0.2)] == [
+        {'Open Time': '2024-01-01 00:00:00', 'Close': 1.5}]
+
+    def finish_line():
+        with open(path, 'a') as f:
+            f.write('25\n')
+
+    timer = threading.Timer(0.1, finish_line)
+    timer.start()
+    bars = [bar for _, bar in CsvTailFeed(str(path), idle_timeout=1.0)]
+    timer.join()
+    assert [bar['Close'] for bar in bars] == [1.5, 2.25]
+
+
+def test_socket_feed_receives_every_bar():
+    df = make_market_data(['XRPJPY'], n=100)
+    port = serve_replay(df)
+    bars = [bar for _, bar in SocketFeed('127.0.0.1', port)]
+
+    assert len(bars) == len(df)
+    assert [bar['Close'] for bar in bars] == df['Close'].tolist()
+
+
+def test_session_counts_warmup_and_decisions():
+    df = make_market_data(['XRPJPY'], n=300)
+    model = HoldModel()
+    session = PaperTradingSession(model, ListFeed(df), FEATURE_COLUMNS)
+    status = session.run()
+
+    assert status['state'] == 'stopped'
+    assert status['bars'] == len(df)
+    assert status['warmup_bars'] > 0
+    assert status['decisions'] == len(df) - status['warmup_bars'] == len(model.observations)
+    assert not np.isnan(model.observations).any()
+    assert session.latency()['total']['count'] == status['decisions']
+    assert status['num_trades'] == 0 and status['portfolio_value'] == status['initial_balance']
+
+
+def test_session_warmup_history_skips_indicator_warmup():
+    df = make_market_data(['XRPJPY'], n=300)
+    session = PaperTradingSession(HoldModel(), ListFeed(df.iloc[200:]), FEATURE_COLUMNS, warmup=df.iloc[:200])
+    status = session.run()
+
+    assert status['bars'] == 100
+    assert status['warmup_bars'] == 0
+    assert status['decisions'] == 100
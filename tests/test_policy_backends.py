@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+pytest.importorskip('stable_baselines3')
+torch = pytest.importorskip('torch')
+
+from conftest import FEATURES, MODEL_PATH
+from feature_store import FeatureStore
+from model_registry import ModelRegistry
+from policy_backends import BACKENDS, available_backends, check_backend, missing_requirements
+
+EXPORTED = [
+    pytest.param(backend, marks=pytest.mark.skipif(
+        backend not in available_backends(), reason=f'{backend} dependencies not installed'))
+    for backend in ('numpy', 'torchscript', 'onnx')
+]
+
+
+@pytest.fixture(scope='module')
+def registry(tmp_path_factory):
+    registry = ModelRegistry(export_dir=str(tmp_path_factory.mktemp('exports')))
+    registry.register('default', MODEL_PATH)
+    return registry
+
+
+@pytest.fixture(scope='module')
+def observations(market_csv, tmp_path_factory):
+    """1024 real observation rows, with the position flag set on a random half"""
+    store = FeatureStore(market_csv, cache_dir=str(tmp_path_factory.mktemp('features')))
+    columns = [column for group in FEATURES for column in group]
+    obs = np.array(store.observations('XRPJPY', columns).observations[:1024])
+    obs[:, -1] = np.random.default_rng(0).integers(0, 2, len(obs))
+    return obs
+
+
+@pytest.mark.parametrize('backend', EXPORTED)
+def test_deterministic_actions_match_sb3(registry, observations, backend):
+    expected, _ = registry.get('default').predict(observations, deterministic=True)
+    actions, _ = registry.get('default', backend=backend).predict(observations, deterministic=True)
+
+    assert actions.shape == expected.shape
+    np.testing.assert_allclose(actions, expected, atol=1e-5)
+
+
+@pytest.mark.parametrize('backend', EXPORTED)
+def test_single_observation_matches_batch(registry, observations, backend):
+    policy = registry.get('default', backend=backend)
+    batch, _ = policy.predict(observations[:8], deterministic=True)
+    single, _ = policy.predict(observations[3], deterministic=True)
+
+    assert single.shape == batch[3].shape
+    np.testing.assert_allclose(single, batch[3], atol=1e-6)
+
+
+@pytest.mark.parametrize('backend', EXPORTED)
+def test_stochastic_actions_follow_sb3_distribution(registry, observations, backend):
+    repeated = np.repeat(observations[:4], 20000, axis=0)
+    torch.manual_seed(0)
+    expected, _ = registry.get('default').predict(repeated, deterministic=False)
+    policy = registry.get('default', backend=backend)
+    policy.set_random_seed(0)
+    actions, _ = policy.predict(repeated, deterministic=False)
+
+    expected = expected.reshape(4, -1, expected.shape[-1])
+    actions = actions.reshape(4, -1, actions.shape[-1])
+    np.testing.assert_allclose(actions.mean(axis=1), expected.mean(axis=1), atol=0.02)
+    np.testing.assert_allclose(actions.std(axis=1), expected.std(axis=1), atol=0.02)
+
+
+@pytest.mark.parametrize('backend', EXPORTED)
+def test_seeded_sampling_is_reproducible(registry, observations, backend):
+    policy = registry.get('default', backend=backend)
+    policy.set_random_seed(7)
+    first, _ = policy.predict(observations[:16])
+    policy.set_random_seed(7)
+    second, _ = policy.predict(observations[:16])
+
+    np.testing.assert_array_equal(first, second)
+
+
+def test_check_backend():
+    for backend in available_backends():
+        check_backend(backend)
+    with pytest.raises(ValueError, match='Unknown backend'):
+        check_backend('tensorrt')
+
+
+def test_unavailable_backend_is_rejected_before_loading(registry, monkeypatch):
+    monkeypatch.setattr('policy_backends.importlib.util.find_spec', lambda name: None)
+    assert missing_requirements('onnx') == ['onnx', 'onnxruntime']
+    assert 'onnx' not in available_backends()
+    assert set(available_backends()) == set(BACKENDS) - {'onnx'}
+    with pytest.raises(ValueError, match='onnx backend is not available'):
+        registry.get('default', backend='onnx')
@@ -0,0 +1,108 @@
+import json
+
+import pandas as pd
+import pytest
+import requests
+
+
+def response(status, body=None, text=None):
+    r = requests.Response()
+    r.status_code = status
+    if body is not None:
+        r._content = json.dumps(body).encode()
+        r.headers['Content-Type'] = 'application/json'
+    else:
+        r._content = (text or '').encode()
+        r.headers['Content-Type'] = 'text/html'
+    return r
+
+
+STEP = {'observation': [0.0], 'reward': 0.0, 'terminated': False, 'truncated': False, 'info': {}}
+UNKNOWN_ENV = {'error': 'Unknown environment'}
+
+
+@pytest.fixture
+def client(app5):
+    return app5.RemoteTradingAPIClient('http://remote.invalid', max_retries=0)
+
+
+def serve(client, monkeypatch, routes):
+    """Answer client requests from {endpoint: [response, ...]}, recording the endpoints called"""
+    calls = []
+
+    def fake_request(method, endpoint, path, idempotent=False, **kwargs):
+        calls.append(endpoint)
+        return routes[endpoint].pop(0)
+
+    monkeypatch.setattr(client, '_request', fake_request)
+    return calls
+
+
+@pytest.mark.parametrize('method, endpoint, args', [
+    ('step_batch', 'step_batch', ('env', [[0.1]])),
+    ('step_multi', 'step_multi', ([('env', [0.1])],)),
+])
+def test_missing_route_falls_back_to_step(client, monkeypatch, method, endpoint, args):
+    calls = serve(client, monkeypatch, {endpoint: [response(404, text='<h1>Not Found</h1>')],
+                                        'step': [response(200, STEP)]})
+    assert getattr(client, method)(*args) == [STEP]
+    assert calls == [endpoint, 'step']
+
+
+@pytest.mark.parametrize('method, endpoint, flag, args', [
+    ('step_batch', 'step_batch', '_batch_supported', ('env', [[0.1]])),
+    ('step_multi', 'step_multi', '_multi_supported', ([('env', [0.1])],)),
+])
+def test_unknown_environment_does_not_disable_endpoint(client, monkeypatch, method, endpoint, flag, args):
+    serve(client, monkeypatch, {endpoint: [response(404, UNKNOWN_ENV), response(200, {'results': [STEP]}),
+                                           response(404, {'detail': 'Not Found'})]})
+    with pytest.raises(requests.HTTPError):
+        getattr(client, method)(*args)
+    assert getattr(client, flag) is None
+
+    assert getattr(client, method)(*args) == [STEP]
+    assert getattr(client, flag) is True
+
+    # Once the endpoint is known to exist, a 404 is an error, never "unsupported"
+    with pytest.raises(requests.HTTPError):
+        getattr(client, method)(*args)
+    assert getattr(client, flag) is True
+
+
+@pytest.fixture
+def bars():
+    return pd.DataFrame({'Open Time': ['2024-01-01 00:00:00'], 'Open': [1.0], 'High': [1.0],
+                         'Low': [1.0], 'Close': [1.0], 'Volume': [1.0]})
+
+
+def test_arrow_rejection_falls_back_to_csv(client, monkeypatch, bars):
+    calls = serve(client, monkeypatch, {'create_environment': [
+        response(415, {'error': 'Unsupported file type'}), response(200, {'env_id': 'csv'})]})
+    assert client.create_environment(bars) == 'csv'
+    assert len(calls) == 2
+    assert client._arrow_supported is False
+
+
+def test_arrow_upload_server_error_is_not_a_rejection(client, monkeypatch, bars):
+    calls = serve(client, monkeypatch, {'create_environment': [
+        response(503, text='Service Unavailable'), response(200, {'env_id': 'arrow'})]})
+    with pytest.raises(requests.HTTPError):
+        client.create_environment(bars)
+    assert len(calls) == 1
+    assert client._arrow_supported is None
+
+    assert client.create_environment(bars) == 'arrow'
+    assert client._arrow_supported is True
+
+
+def test_health_check_fails_fast(app5, monkeypatch):
+    client = app5.RemoteTradingAPIClient('http://remote.invalid', max_retries=3, backoff=10)
+    calls = []
+
+    def unreachable(method, url, **kwargs):
+        calls.append(kwargs['timeout'])
+        raise requests.ConnectionError('unreachable')
+
+    monkeypatch.setattr(client.session, 'request', unreachable)
+    assert client.health_check() is False
+    assert calls == [client.TIMEOUTS['health']]
@@ -0,0 +1,50 @@
+import json
+
+import numpy as np
+import pytest
+
+import streaming
+from streaming import dumps
+
+EVENT = {
+    'type': 'step',
+    'step': np.int64(7),
+    'sharpe': float('nan'),
+    'max_drawdown': np.float64(np.inf),
+    'ratio': np.float32(0.5),
+    'flag': np.bool_(True),
+    'values': np.array([1.5, np.nan, -np.inf, 2.0]),
+    'actions': np.arange(3, dtype=np.int32),
+    'nested': [{'pnl': float('-inf')}, (1, 2.5)],
+    'counts': {1: 2, 3: np.uint8(4)},
+}
+EXPECTED = {
+    'type': 'step',
+    'step': 7,
+    'sharpe': None,
+    'max_drawdown': None,
+    'ratio': 0.5,
+    'flag': True,
+    'values': [1.5, None, None, 2.0],
+    'actions': [0, 1, 2],
+    'nested': [{'pnl': None}, [1, 2.5]],
+    'counts': {'1': 2, '3': 4},
+}
+
+
+def test_json_fallback_matches_orjson_output(monkeypatch):
+    monkeypatch.setattr(streaming, 'orjson', None)
+    assert json.loads(dumps(EVENT)) == EXPECTED
+
+
+def test_orjson_output():
+    if streaming.orjson is None:
+        pytest.skip('orjson not installed')
+    assert json.loads(dumps(EVENT)) == EXPECTED
+
+
+def test_json_fallback_rejects_unknown_types(monkeypatch):
+    monkeypatch.setattr(streaming, 'orjson', None)
+    with pytest.raises(TypeError):
+        dumps({'value': object()})
+
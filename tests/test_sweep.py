@@ -0,0 +1,49 @@
+import pytest
+
+pytest.importorskip('stable_baselines3')
+
+import sweep
+from conftest import FEATURES, MODEL_PATH
+from sweep import _group_runs, _init_worker, _run_group, expand_grid
+
+WINDOW = {'start_time': '2024-01-05 00:00:00', 'end_time': '2024-02-01 00:00:00'}
+RESULT_FIELDS = ('final_balance', 'total_return', 'num_trades', 'total_reward', 'steps')
+
+
+@pytest.fixture
+def worker(market_csv, tmp_path):
+    """Sweep worker state set up in this process instead of a pool worker"""
+    _init_worker(market_csv, str(tmp_path / 'features'), 'default', MODEL_PATH, FEATURES)
+    sweep._worker['store'].build()
+    yield
+    sweep._worker.clear()
+
+
+def run_grid(spec):
+    rows = [row for group in _group_runs(expand_grid(spec)) for row in _run_group(group)]
+    return {(row['crypto'], row['seed'], row['deterministic']): row for row in rows}
+
+
+def result(row):
+    assert 'error' not in row, row.get('error')
+    return {field: row[field] for field in RESULT_FIELDS}
+
+
+@pytest.mark.parametrize('deterministic', [False, True])
+def test_run_result_does_not_depend_on_grid(worker, deterministic):
+    spec = {'windows': [WINDOW], 'seeds': [1], 'deterministic': [deterministic]}
+    alone = run_grid(dict(spec, cryptos=['LINKJPY']))
+    first = run_grid(dict(spec, cryptos=['LINKJPY', 'ADAJPY']))
+    second = run_grid(dict(spec, cryptos=['ADAJPY', 'XRPJPY', 'LINKJPY'], seeds=[0, 1]))
+
+    key = ('LINKJPY', 1, deterministic)
+    assert result(first[key]) == result(alone[key])
+    assert result(second[key]) == result(alone[key])
+
+
+def test_stochastic_runs_are_not_batched():
+    runs = expand_grid({'cryptos': ['A', 'B', 'C'], 'windows': [WINDOW], 'seeds': [0],
+                        'deterministic': [False, True]})
+    groups = _group_runs(runs)
+    assert sorted(len(group) for group in groups) == [1, 1, 1, 3]
+    assert all(run['deterministic'] for group in groups if len(group) > 1 for run in group)
@@ -0,0 +1,200 @@
+import gymnasium as gym
+import numpy as np
+from gymnasium import spaces
+
+
+class TradingAccount:
+    """
+    Cash and long-position bookkeeping behind LocalTradingEnv.
+
+    apply_action() runs the order logic for one bar at a given price:
+    stop loss and take profit first, then the exit or entry signal. It has
+    no notion of a data slice, so the same rules drive both backtests and
+    live paper trading (paper_trading.PaperTradingSession).
+
+    Usage:
+        account = TradingAccount(initial_balance=10000)
+        position_changes = account.apply_action(price, action)
+        account.current_step += 1
+    """
+
+    def __init__(self, initial_balance=10000, fee=0.001, min_position_size=0.1,
+                 max_stop_loss=0.05, max_take_profit=0.10):
+        self.initial_balance = float(initial_balance)
+        self.fee = fee
+        self.min_position_size = min_position_size
+        self.max_stop_loss = max_stop_loss
+        self.max_take_profit = max_take_profit
+        self._reset_state()
+
+    def _reset_state(self):
+        self.current_step = 0
+        self.cash = self.initial_balance
+        self.quantity = 0.0
+        self.entry_price = 0.0
+        self.entry_step = 0
+        self.stop_price = 0.0
+        self.take_profit_price = np.inf
+
+    def _portfolio_value(self, price):
+        return self.cash + self.quantity * price
+
+    def _info(self, price, position_changes):
+        return {
+            'portfolio_value': float(self._portfolio_value(price)),
+            'cash': float(self.cash),
+            'position': float(self.quantity),
+            'current_step': self.current_step,
+            'position_changes': position_changes,
+        }
+
+    def _open(self, price, action):
+        size = max(float(action[2]), self.min_position_size)
+        notional = self.cash * size
+        self.quantity = notional * (1 - self.fee) / price
+        self.cash -= notional
+        self.entry_price = price
+        self.entry_step = self.current_step
+        self.stop_price = price * (1 - float(action[3]) * self.max_stop_loss) if action[3] > 0 else 0.0
+        self.take_profit_price = price * (1 + float(action[4]) * self.max_take_profit) if action[4] > 0 else np.inf
+        return {'entry_price': float(price), 'quantity': float(self.quantity), 'step': self.current_step}
+
+    def _close(self, price, reason):
+        proceeds = self.quantity * price * (1 - self.fee)
+        cost = self.quantity * self.entry_price
+        closed = {
+            'entry_price': float(self.entry_price),
+            'exit_price': float(price),
+            'quantity': float(self.quantity),
+            'pnl': float(proceeds - cost),
+            'pnl_percent': float((proceeds / cost - 1) * 100) if cost > 0 else 0.0,
+            'holding_period': self.current_step - self.entry_step,
+            'close_reason': reason,
+        }
+        self.cash += proceeds
+        self.quantity = 0.0
+        return closed
+
+    def apply_action(self, price, action):
+        """
+        Execute one bar's action at price.
+
+        Args:
+            price (float): Execution price of the bar
+            action: 5 values already clipped to [0, 1] (see LocalTradingEnv)
+
+        Returns:
+            dict: {'opened': [...], 'closed': [...]}
+        """
+        position_changes = {'opened': [], 'closed': []}
+        if self.quantity > 0:
+            if price <= self.stop_price:
+                position_changes['closed'].append(self._close(price, 'stop_loss'))
+            elif price >= self.take_profit_price:
+                position_changes['closed'].append(self._close(price, 'take_profit'))
+            elif action[1] > 0.5:
+                position_changes['closed'].append(self._close(price, 'signal'))
+        elif action[0] > 0.5:
+            position_changes['opened'].append(self._open(price, action))
+        return position_changes
+
+
+class LocalTradingEnv(TradingAccount, gym.Env):
+    """
+    In-process long/flat trading environment over a precomputed feature slice.
+
+    Follows the remote Trading Environment API contract so the same PPO
+    policy and TradingAnalyzer can drive it:
+
+    Observation (float32): the T_indicators, MR_indicators and
+    continuous_features columns of the current bar, followed by a 0/1 flag
+    for an open position.
+
+    Action (5 values in [0, 1]):
+        0: entry signal, opens a long position when > 0.5 and flat
+        1: exit signal, closes the position when > 0.5
+        2: position size as a fraction of cash (at least min_position_size)
+        3: stop loss distance, scaled to [0, max_stop_loss]
+        4: take profit distance, scaled to [0, max_take_profit]
+
+    Info: portfolio_value, cash, position, current_step and position_changes
+    ({'opened': [...], 'closed': [...]}, closed entries carrying entry/exit
+    price, quantity, pnl, pnl_percent, holding_period and close_reason).
+
+    Reward: change in portfolio value over the step, relative to the initial balance.
+
+    The observation array is reused between steps; copy it to keep it.
+
+    Usage:
+        from trading_env import LocalTradingEnv
+
+        env = LocalTradingEnv(df, T_indicators, MR_indicators, continuous_features)
+        env = LocalTradingEnv.from_observations(feature_store.observations(symbol, columns))
+        obs, info = env.reset()
+        obs, reward, terminated, truncated, info = env.step(action)
+    """
+
+    metadata = {'render_modes': []}
+
+    def __init__(self, df, T_indicators, MR_indicators, continuous_features,
+                 initial_balance=10000, fee=0.001, min_position_size=0.1,
+                 max_stop_loss=0.05, max_take_profit=0.10):
+        feature_columns = list(T_indicators) + list(MR_indicators) + list(continuous_features)
+        self._setup(np.ascontiguousarray(df[feature_columns].to_numpy(dtype=np.float32)), df['Close'].to_numpy(dtype=np.float64),
+                    feature_columns, initial_balance=initial_balance, fee=fee,
+                    min_position_size=min_position_size, max_stop_loss=max_stop_loss,
+                    max_take_profit=max_take_profit)
+
+    @classmethod
+    def from_observations(cls, matrix, **kwargs):
+        """
+        Environment over a precomputed observations.ObservationMatrix (e.g.
+        FeatureStore.observations()), without going through a DataFrame.
+
+        Args:
+            matrix (ObservationMatrix): Observation rows, close prices and feature columns
+            **kwargs: initial_balance, fee, min_position_size, max_stop_loss, max_take_profit
+        """
+        env = cls.__new__(cls)
+        env._setup(matrix.features, matrix.prices, matrix.columns, **kwargs)
+        return env
+
+    def _setup(self, features, prices, feature_columns, **account_kwargs):
+        TradingAccount.__init__(self, **account_kwargs)
+        self.feature_columns = list(feature_columns)
+        self.features = features
+        self.prices = prices
+
+        self.observation_space = spaces.Box(
+            low=-np.inf, high=np.inf, shape=(self.features.shape[1] + 1,), dtype=np.float32
+        )
+        self.action_space = spaces.Box(low=0.0, high=1.0, shape=(5,), dtype=np.float32)
+        self._obs = np.empty(self.observation_space.shape, dtype=np.float32)
+
+    def _observation(self):
+        # Filled in place: the returned array is only valid until the next step
+        obs = self._obs
+        obs[:-1] = self.features[min(self.current_step, len(self.features) - 1)]
+        obs[-1] = 1.0 if self.quantity > 0 else 0.0
+        return obs
+
+    def reset(self, seed=None, options=None):
+        super().reset(seed=seed)
+        self._reset_state()
+        return self._observation(), self._info(self.prices[0], {'opened': [], 'closed': []})
+
+    def step(self, action):
+        action = np.clip(np.asarray(action, dtype=np.float64).ravel(), 0.0, 1.0)
+        price = self.prices[self.current_step]
+        previous_value = self._portfolio_value(price)
+        position_changes = self.apply_action(price, action)
+
+        self.current_step += 1
+        terminated = self.current_step >= len(self.prices) - 1
+        next_price = self.prices[min(self.current_step, len(self.prices) - 1)]
+
+        if terminated and self.quantity > 0:
+            position_changes['closed'].append(self._close(next_price, 'end_of_data'))
+
+        reward = (self._portfolio_value(next_price) - previous_value) / self.initial_balance
+        return self._observation(), float(reward), terminated, False, self._info(next_price, position_changes)